@@ -5,4 +5,8 @@ class AdminAppConfig(AppConfig):
     name = 'apps.admin'
     label = 'admin_app'  # Using a unique label to avoid conflict with Django's admin
     default_auto_field = 'django.db.models.BigAutoField'
-    verbose_name = 'Platform Administration' 
\ No newline at end of file
+    verbose_name = 'Platform Administration'
+    
+    def ready(self):
+        """Import signals when the app is ready."""
+        import apps.admin.signals
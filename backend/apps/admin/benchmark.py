@@ -0,0 +1,207 @@
+"""
+Latency and query-count benchmark for the main API endpoints.
+
+Each scenario (login, attorney search, legal request list, admin dashboard)
+is requested ``iterations`` times after ``warmup`` untimed requests, and
+summarised as p50/p95/p99 latency in milliseconds and the mean number of
+queries per request.
+
+Requests go through Django's test client in-process by default, which also
+counts queries. With ``base_url`` they are sent over HTTP to a running
+server (e.g. ``gunicorn config.wsgi``) instead; queries are then not counted.
+The benchmarked users are read from the local database, so a server under
+test must use the same database, seeded with ``seed_data`` first.
+
+Results can be saved as a JSON baseline and later runs compared against it:
+a scenario regresses when its p95 latency or queries per request grow by
+more than the tolerance.
+"""
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client as TestClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.users.authentication import ClaimsRefreshToken
+from apps.users.models import User
+from .seed import DEFAULT_PASSWORD, DEFAULT_PREFIX
+
+PERCENTILES = (50, 95, 99)
+DEFAULT_TOLERANCE = 0.2
+
+
+class Scenario:
+    """One benchmarked request: ``user`` is None for anonymous requests."""
+
+    def __init__(self, name, method, path, user=None, data=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.user = user
+        self.data = data
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(latencies, queries, errors):
+    summary = {f'p{percent}': round(percentile(latencies, percent) * 1000, 2) for percent in PERCENTILES}
+    summary['requests'] = len(latencies)
+    summary['errors'] = errors
+    summary['queries'] = round(sum(queries) / len(queries), 2) if queries else None
+    return summary
+
+
+def _host():
+    # The test client sends "testserver", which ALLOWED_HOSTS usually rejects
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+class TestClientTransport:
+    """Send requests in-process through Django's test client, counting queries."""
+
+    counts_queries = True
+
+    def __init__(self):
+        # Server errors are counted like any other failed request, not raised
+        self.client = TestClient(raise_request_exception=False, HTTP_HOST=_host())
+
+    def request(self, method, path, data=None, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        if method == 'POST':
+            response = self.client.post(path, data=json.dumps(data or {}), content_type='application/json', **headers)
+        else:
+            response = self.client.get(path, data, **headers)
+        return response.status_code
+
+
+class HTTPTransport:
+    """Send requests to a running server at ``base_url``."""
+
+    counts_queries = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, data=None, token=None):
+        url = self.base_url + path
+        body = None
+        headers = {'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        if method == 'POST':
+            body = json.dumps(data or {}).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data:
+            url += '?' + urllib.parse.urlencode(data)
+        request = urllib.request.Request(url, data=body, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+
+
+def default_scenarios(prefix=DEFAULT_PREFIX, password=DEFAULT_PASSWORD):
+    """
+    The benchmarked endpoints, run as the first seeded client and any admin.
+
+    Raises ``ValueError`` when the seeded client or an admin is missing.
+    """
+    client_user = User.objects.filter(email=f'{prefix}.client0@example.com').first()
+    admin = User.objects.filter(user_type='ADMIN', is_active=True).order_by('date_joined').first()
+    if client_user is None:
+        raise ValueError(f"No seeded client with prefix '{prefix}', run seed_data first")
+    if admin is None:
+        raise ValueError("No admin user, create one with create_admin first")
+    return [
+        Scenario('login', 'POST', reverse('token_obtain_pair'), data={'email': client_user.email, 'password': password}),
+        Scenario('attorney_search', 'GET', reverse('attorneys:attorney-search'), client_user, {'search': 'law'}),
+        Scenario('legal_request_list', 'GET', reverse('clients:legal-request-list'), client_user),
+        Scenario('admin_dashboard', 'GET', reverse('admin_app:dashboard-list'), admin),
+    ]
+
+
+def run_benchmark(scenarios, iterations=50, warmup=5, transport=None):
+    """Run ``scenarios`` and return ``{name: summary}``."""
+    transport = transport or TestClientTransport()
+    tokens = {}
+    results = {}
+    for scenario in scenarios:
+        token = None
+        if scenario.user is not None:
+            if scenario.user.pk not in tokens:
+                tokens[scenario.user.pk] = str(ClaimsRefreshToken.for_user(scenario.user).access_token)
+            token = tokens[scenario.user.pk]
+
+        for _ in range(warmup):
+            transport.request(scenario.method, scenario.path, scenario.data, token)
+
+        latencies, queries, errors = [], [], 0
+        for _ in range(iterations):
+            if transport.counts_queries:
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    status_code = transport.request(scenario.method, scenario.path, scenario.data, token)
+                    latencies.append(time.perf_counter() - started)
+                queries.append(len(context.captured_queries))
+            else:
+                started = time.perf_counter()
+                status_code = transport.request(scenario.method, scenario.path, scenario.data, token)
+                latencies.append(time.perf_counter() - started)
+            if status_code >= 400:
+                errors += 1
+        results[scenario.name] = summarize(latencies, queries, errors)
+    return results
+
+
+def save_baseline(results, path):
+    with open(path, 'w') as baseline:
+        json.dump(results, baseline, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare ``results`` with ``baseline``.
+
+    Returns ``{name: {metric: (baseline, current, change)}}`` for p95 latency
+    and queries, and the names of the scenarios that regressed by more than
+    ``tolerance`` (a fraction) on either.
+    """
+    changes = {}
+    regressions = []
+    for name, summary in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        changes[name] = {}
+        for metric in ('p95', 'queries'):
+            before, after = previous.get(metric), summary.get(metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else (0.0 if after == before else float('inf'))
+            changes[name][metric] = (before, after, change)
+            if change > tolerance and name not in regressions:
+                regressions.append(name)
+    return changes, regressions
@@ -0,0 +1,23 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.admin.stats import backfill_stats
+
+
+class Command(BaseCommand):
+    help = 'Computes and upserts daily platform statistics for a date range'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, required=True, help='First day (YYYY-MM-DD)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk insert')
+
+    def handle(self, *args, **options):
+        start = options['start']
+        end = options['end'] or timezone.localdate()
+        if start > end:
+            raise CommandError('--start must not be after --end')
+
+        written = backfill_stats(start, end, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote platform statistics for {written} days ({start} to {end})'))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.admin.benchmark import (
+    DEFAULT_TOLERANCE, HTTPTransport, TestClientTransport, compare, default_scenarios, load_baseline,
+    run_benchmark, save_baseline
+)
+from apps.admin.seed import DEFAULT_PASSWORD, DEFAULT_PREFIX
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the main API endpoints, reporting p50/p95/p99 latency and queries per request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint')
+        parser.add_argument('--base-url', help='Benchmark a running server (e.g. http://127.0.0.1:8000) instead')
+        parser.add_argument('--only', nargs='+', help='Names of the scenarios to run')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='Email prefix of the seeded users')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of the seeded users')
+        parser.add_argument('--save', metavar='PATH', help='Save the results as a JSON baseline')
+        parser.add_argument('--compare', metavar='PATH', help='Compare the results with a saved baseline')
+        parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                            help='Allowed p95/query growth before a scenario counts as regressed')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error on regressions')
+
+    def handle(self, *args, **options):
+        try:
+            scenarios = default_scenarios(options['prefix'], options['password'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options['only']:
+            scenarios = [scenario for scenario in scenarios if scenario.name in options['only']]
+
+        transport = HTTPTransport(options['base_url']) if options['base_url'] else TestClientTransport()
+        results = run_benchmark(scenarios, options['iterations'], options['warmup'], transport)
+
+        self.stdout.write(f"{'scenario':<20} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'errors':>7}")
+        for name, summary in results.items():
+            queries = '-' if summary['queries'] is None else f"{summary['queries']:g}"
+            self.stdout.write(
+                f"{name:<20} {summary['p50']:>7.2f}ms {summary['p95']:>7.2f}ms {summary['p99']:>7.2f}ms "
+                f"{queries:>8} {summary['errors']:>7}"
+            )
+
+        if options['save']:
+            save_baseline(results, options['save'])
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['save']}"))
+
+        if options['compare']:
+            changes, regressions = compare(results, load_baseline(options['compare']), options['tolerance'])
+            for name, metrics in changes.items():
+                for metric, (before, after, change) in metrics.items():
+                    self.stdout.write(f'{name} {metric}: {before:g} -> {after:g} ({change:+.0%})')
+            if regressions:
+                message = f"Regressed beyond {options['tolerance']:.0%}: {', '.join(regressions)}"
+                if options['fail_on_regression']:
+                    raise CommandError(message)
+                self.stdout.write(self.style.WARNING(message))
+            else:
+                self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
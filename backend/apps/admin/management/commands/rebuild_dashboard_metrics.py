@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from apps.admin.metrics import rebuild_metrics
+
+
+class Command(BaseCommand):
+    help = 'Reconciles the materialized admin dashboard counters with the live tables'
+
+    def handle(self, *args, **options):
+        corrections = rebuild_metrics()
+        if not corrections:
+            self.stdout.write(self.style.SUCCESS('Dashboard metrics are consistent'))
+            return
+        for metric, delta in sorted(corrections.items()):
+            self.stdout.write(f'{metric}: {delta:+d}')
+        self.stdout.write(self.style.WARNING(f'Corrected {len(corrections)} dashboard metrics'))
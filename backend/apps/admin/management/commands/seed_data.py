@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.admin.seed import DEFAULT_BATCH_SIZE, DEFAULT_PASSWORD, DEFAULT_PREFIX, clear_seed_data, seed_data
+
+
+class Command(BaseCommand):
+    help = 'Seeds synthetic users, attorneys, legal requests, reviews and chat messages for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=100, help='Number of client users')
+        parser.add_argument('--attorneys', type=int, default=20, help='Number of attorney users')
+        parser.add_argument('--specialties', type=int, default=10, help='Number of specialties (at most 15)')
+        parser.add_argument('--requests-per-client', type=int, default=5, help='Legal requests per client')
+        parser.add_argument('--review-rate', type=float, default=0.5, help='Share of completed requests reviewed')
+        parser.add_argument('--chat-sessions', type=int, default=50, help='Number of chat sessions')
+        parser.add_argument('--messages-per-session', type=int, default=10, help='Messages per chat session')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='Email prefix marking seeded users')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password shared by seeded users')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per bulk insert')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--clear', action='store_true', help='Delete existing seed data with the prefix first')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted = clear_seed_data(options['prefix'])
+            self.stdout.write(f'Deleted {deleted} rows of previous seed data')
+
+        try:
+            report = seed_data(
+                clients=options['clients'],
+                attorneys=options['attorneys'],
+                specialties=options['specialties'],
+                requests_per_client=options['requests_per_client'],
+                review_rate=options['review_rate'],
+                chat_sessions=options['chat_sessions'],
+                messages_per_session=options['messages_per_session'],
+                prefix=options['prefix'],
+                password=options['password'],
+                batch_size=options['batch_size'],
+                seed=options['seed'],
+            )
+        except ValueError as exc:
+            raise CommandError(f'{exc} (use --clear to replace it)')
+
+        for table, count in report.as_dict().items():
+            self.stdout.write(f'{table}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Seeded {sum(report.as_dict().values())} rows'))
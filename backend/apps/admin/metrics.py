@@ -0,0 +1,175 @@
+"""
+Materialized counters behind the admin dashboard.
+
+Every tracked model maps a row to the set of metrics it counts towards (a
+pending attorney counts towards ``total_users`` and
+``pending_attorney_verifications``). Signals diff that set before and after
+each save or delete and add the difference to ``DashboardMetric`` rows keyed
+by (metric, date), so the dashboard reads one small grouped query instead of
+counting the live tables.
+
+Writes that bypass signals (``QuerySet.update``, raw SQL) are not seen;
+``rebuild_metrics`` compares the counters with a live recompute and records
+the correction. Run it once after deploying to seed the counters.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from apps.users.models import User
+from apps.attorneys.models import Attorney
+from apps.clients.models import Client, LegalRequest
+from .models import DashboardMetric
+
+DASHBOARD_METRICS = (
+    'total_users',
+    'total_attorneys',
+    'total_clients',
+    'active_attorneys',
+    'pending_attorney_verifications',
+    'pending_client_verifications',
+    'total_legal_requests',
+    'pending_legal_requests',
+    'completed_legal_requests',
+    'pro_bono_requests',
+)
+
+
+def user_metrics(values):
+    metrics = {'total_users'}
+    if values['verification_status'] == 'PENDING':
+        if values['user_type'] == 'ATTORNEY':
+            metrics.add('pending_attorney_verifications')
+        elif values['user_type'] == 'CLIENT':
+            metrics.add('pending_client_verifications')
+    return metrics
+
+
+def attorney_metrics(values):
+    metrics = {'total_attorneys'}
+    if values['license_status'] == 'ACTIVE':
+        metrics.add('active_attorneys')
+    return metrics
+
+
+def client_metrics(values):
+    return {'total_clients'}
+
+
+def legal_request_metrics(values):
+    metrics = {'total_legal_requests'}
+    if values['status'] == 'PENDING':
+        metrics.add('pending_legal_requests')
+    elif values['status'] == 'COMPLETED':
+        metrics.add('completed_legal_requests')
+    if values['is_pro_bono']:
+        metrics.add('pro_bono_requests')
+    return metrics
+
+
+# Model -> (fields the metrics depend on, function mapping those values to metrics)
+TRACKED_MODELS = {
+    User: (('user_type', 'verification_status'), user_metrics),
+    Attorney: (('license_status',), attorney_metrics),
+    Client: ((), client_metrics),
+    LegalRequest: (('status', 'is_pro_bono'), legal_request_metrics),
+}
+
+
+def metrics_for(instance, values=None):
+    """Return the set of metrics ``instance`` (or the given field values) counts towards."""
+    fields, compute = TRACKED_MODELS[type(instance)]
+    if values is None:
+        values = {field: getattr(instance, field) for field in fields}
+    return compute(values)
+
+
+def diff_metrics(old, new):
+    """Counter deltas for a row moving from metric set ``old`` to ``new``."""
+    deltas = Counter()
+    for metric in new - old:
+        deltas[metric] += 1
+    for metric in old - new:
+        deltas[metric] -= 1
+    return deltas
+
+
+def record_changes(deltas, date=None):
+    """
+    Add ``deltas`` to the counters for ``date`` (today by default).
+
+    Each counter is bumped with an ``UPDATE ... SET value = value + n``; the
+    row is inserted on first use. Runs inside the caller's transaction when
+    there is one, so the counters roll back with the change they describe.
+    """
+    date = date or timezone.localdate()
+    with transaction.atomic():
+        # Sorted so concurrent writers lock counter rows in the same order
+        for metric in sorted(deltas):
+            delta = deltas[metric]
+            if not delta:
+                continue
+            counter = DashboardMetric.objects.filter(metric=metric, date=date)
+            if counter.update(value=F('value') + delta):
+                continue
+            try:
+                with transaction.atomic():
+                    DashboardMetric.objects.create(metric=metric, date=date, value=delta)
+            except IntegrityError:
+                # Another writer created the row first
+                counter.update(value=F('value') + delta)
+
+
+def read_totals():
+    """Current value of every dashboard metric, read from the counters."""
+    totals = dict.fromkeys(DASHBOARD_METRICS, 0)
+    rows = DashboardMetric.objects.order_by().values('metric').annotate(total=Sum('value'))
+    for row in rows:
+        totals[row['metric']] = row['total']
+    return totals
+
+
+def live_totals():
+    """Recompute every dashboard metric from the live tables."""
+    totals = {}
+    totals.update(User.objects.aggregate(
+        total_users=Count('id'),
+        pending_attorney_verifications=Count(
+            'id', filter=Q(user_type='ATTORNEY', verification_status='PENDING')
+        ),
+        pending_client_verifications=Count(
+            'id', filter=Q(user_type='CLIENT', verification_status='PENDING')
+        ),
+    ))
+    totals.update(Attorney.objects.aggregate(
+        total_attorneys=Count('id'),
+        active_attorneys=Count('id', filter=Q(license_status='ACTIVE')),
+    ))
+    totals.update(Client.objects.aggregate(total_clients=Count('id')))
+    totals.update(LegalRequest.objects.aggregate(
+        total_legal_requests=Count('id'),
+        pending_legal_requests=Count('id', filter=Q(status='PENDING')),
+        completed_legal_requests=Count('id', filter=Q(status='COMPLETED')),
+        pro_bono_requests=Count('id', filter=Q(is_pro_bono=True)),
+    ))
+    return totals
+
+
+def rebuild_metrics():
+    """
+    Bring the counters in line with the live tables.
+
+    Records the difference as today's correction and returns it (empty when
+    the counters were already consistent).
+    """
+    with transaction.atomic():
+        stored = read_totals()
+        corrections = {
+            metric: value - stored[metric]
+            for metric, value in live_totals().items()
+            if value != stored[metric]
+        }
+        record_changes(corrections)
+    return corrections
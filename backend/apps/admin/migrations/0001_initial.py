@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:27
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformStats',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(unique=True)),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('total_attorneys', models.PositiveIntegerField(default=0)),
+                ('total_clients', models.PositiveIntegerField(default=0)),
+                ('active_attorneys', models.PositiveIntegerField(default=0)),
+                ('active_clients', models.PositiveIntegerField(default=0)),
+                ('total_requests', models.PositiveIntegerField(default=0)),
+                ('completed_requests', models.PositiveIntegerField(default=0)),
+                ('pro_bono_requests', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'platform statistics',
+                'verbose_name_plural': 'platform statistics',
+                'db_table': 'platform_stats',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AdminNotification',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100)),
+                ('message', models.TextField()),
+                ('category', models.CharField(choices=[('ATTORNEY_REGISTRATION', 'Attorney Registration'), ('USER_REPORT', 'User Report'), ('SYSTEM_ALERT', 'System Alert'), ('OTHER', 'Other')], max_length=25)),
+                ('is_read', models.BooleanField(default=False)),
+                ('reference_id', models.UUIDField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('admin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'admin notification',
+                'verbose_name_plural': 'admin notifications',
+                'db_table': 'admin_notifications',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DashboardMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=50)),
+                ('date', models.DateField()),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'dashboard metric',
+                'verbose_name_plural': 'dashboard metrics',
+                'db_table': 'dashboard_metrics',
+                'ordering': ['metric', 'date'],
+                'unique_together': {('metric', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SystemConfiguration',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('value', models.TextField()),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_editable', models.BooleanField(default=True)),
+                ('last_modified_at', models.DateTimeField(auto_now=True)),
+                ('last_modified_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'system configuration',
+                'verbose_name_plural': 'system configurations',
+                'db_table': 'system_configurations',
+                'ordering': ['key'],
+            },
+        ),
+    ]
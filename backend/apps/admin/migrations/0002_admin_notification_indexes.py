@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adminnotification',
+            index=models.Index(fields=['admin', '-created_at'], name='admin_notification_admin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminnotification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['admin', '-created_at'], name='admin_notification_unread_idx'),
+        ),
+    ]
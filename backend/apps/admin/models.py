@@ -25,6 +25,28 @@ class PlatformStats(models.Model):
         return f"Platform Stats for {self.date}"
 
 
+class DashboardMetric(models.Model):
+    """
+    Incrementally maintained counter for the admin dashboard.
+    
+    Each row holds the net change of one metric on one day, so the current
+    value of a metric is the sum of its rows.
+    """
+    metric = models.CharField(max_length=50)
+    date = models.DateField()
+    value = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'dashboard metric'
+        verbose_name_plural = 'dashboard metrics'
+        db_table = 'dashboard_metrics'
+        unique_together = ['metric', 'date']
+        ordering = ['metric', 'date']
+    
+    def __str__(self):
+        return f"{self.metric} on {self.date}: {self.value:+d}"
+
+
 class AdminNotification(models.Model):
     """Notifications for administrators."""
     CATEGORY_CHOICES = (
@@ -48,6 +70,14 @@ class AdminNotification(models.Model):
         verbose_name_plural = 'admin notifications'
         db_table = 'admin_notifications'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['admin', '-created_at'], name='admin_notification_admin_idx'),
+            models.Index(
+                fields=['admin', '-created_at'],
+                name='admin_notification_unread_idx',
+                condition=models.Q(is_read=False),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.category}) - {self.created_at}"
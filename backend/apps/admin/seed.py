@@ -0,0 +1,224 @@
+"""
+Synthetic data for load testing.
+
+``seed_data`` writes configurable volumes of clients, attorneys, specialties,
+legal requests, reviews and chat sessions with one ``bulk_create`` per table
+and batch. ``bulk_create`` sends no signals and skips ``save()``, so the work
+they would do row by row is done once at the end: client and attorney
+profiles are created directly, and attorney search documents, rating
+aggregates and the dashboard counters are rebuilt from the inserted rows.
+
+Every seeded user's email starts with ``<prefix>.``, so a seeded dataset can
+be told apart from real accounts and removed with ``clear_seed_data``. All
+users share one password (hashed once), which the benchmark uses to log in.
+Generation is driven by a seeded ``random.Random``, so the same options
+produce the same dataset.
+"""
+import random
+from datetime import time
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from apps.users.models import User
+from apps.attorneys.geo import encode_geohash
+from apps.attorneys.models import Attorney, AvailabilitySlot, Specialty
+from apps.attorneys.ratings import reconcile_ratings
+from apps.attorneys.search import refresh_documents
+from apps.chatbot.models import ChatMessage, ChatSession
+from apps.clients.models import Client, ClientAttorneyReview, LegalRequest
+from .metrics import rebuild_metrics
+
+DEFAULT_PREFIX = 'seed'
+DEFAULT_PASSWORD = 'password123'
+DEFAULT_BATCH_SIZE = 1000
+
+FIRST_NAMES = [
+    'Ada', 'Grace', 'Alan', 'Linus', 'Margaret', 'Dennis', 'Barbara', 'Ken',
+    'Frances', 'John', 'Radia', 'Edsger', 'Karen', 'Tim', 'Hedy', 'Donald',
+]
+LAST_NAMES = [
+    'Lovelace', 'Hopper', 'Turing', 'Torvalds', 'Hamilton', 'Ritchie', 'Liskov',
+    'Thompson', 'Allen', 'Backus', 'Perlman', 'Dijkstra', 'Jones', 'Lee', 'Lamarr', 'Knuth',
+]
+SPECIALTIES = [
+    'Family Law', 'Criminal Defense', 'Immigration', 'Employment', 'Real Estate',
+    'Intellectual Property', 'Tax', 'Personal Injury', 'Bankruptcy', 'Estate Planning',
+    'Corporate', 'Environmental', 'Civil Rights', 'Consumer Protection', 'Contracts',
+]
+REQUEST_TOPICS = [
+    'Contract review', 'Custody arrangement', 'Visa application', 'Wrongful dismissal',
+    'Lease dispute', 'Trademark filing', 'Tax audit', 'Accident claim', 'Debt relief', 'Will drafting',
+]
+QUESTIONS = [
+    'How do I file for divorce?', 'What are my rights as a tenant?', 'Can my employer fire me without notice?',
+    'How long does a visa application take?', 'Do I need a lawyer for small claims court?',
+    'What happens if I die without a will?', 'How do I register a trademark?',
+]
+# Approximate bounding box of the continental United States
+LATITUDES = (25.0, 49.0)
+LONGITUDES = (-124.0, -67.0)
+
+
+class SeedReport:
+    """Number of rows written per table."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, table, count):
+        self.counts[table] = self.counts.get(table, 0) + count
+
+    def as_dict(self):
+        return dict(self.counts)
+
+
+def _name(rng):
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+
+def _create(model, objects, batch_size, report):
+    created = model.objects.bulk_create(objects, batch_size=batch_size)
+    report.add(model._meta.db_table, len(created))
+    return created
+
+
+def _users(prefix, kind, count, password, rng, user_type):
+    for index in range(count):
+        first_name, last_name = _name(rng)
+        yield User(
+            email=f'{prefix}.{kind}{index}@example.com',
+            password=password,
+            first_name=first_name,
+            last_name=last_name,
+            user_type=user_type,
+            verification_status='VERIFIED',
+            email_verified=True,
+        )
+
+
+def seed_data(
+    clients=100, attorneys=20, specialties=10, requests_per_client=5, review_rate=0.5,
+    chat_sessions=50, messages_per_session=10, prefix=DEFAULT_PREFIX, password=DEFAULT_PASSWORD,
+    batch_size=DEFAULT_BATCH_SIZE, seed=0,
+):
+    """
+    Insert a synthetic dataset and return a ``SeedReport``.
+
+    ``review_rate`` is the share of completed legal requests that get a
+    review. Raises ``ValueError`` when users with ``prefix`` already exist.
+    """
+    if User.objects.filter(email__startswith=f'{prefix}.').exists():
+        raise ValueError(f"Seed data with prefix '{prefix}' already exists")
+
+    rng = random.Random(seed)
+    report = SeedReport()
+    password = make_password(password)
+
+    with transaction.atomic():
+        Specialty.objects.bulk_create(
+            [Specialty(name=name) for name in SPECIALTIES[:specialties]], ignore_conflicts=True
+        )
+        specialty_ids = list(
+            Specialty.objects.filter(name__in=SPECIALTIES[:specialties]).values_list('id', flat=True)
+        )
+
+        client_users = _create(User, _users(prefix, 'client', clients, password, rng, 'CLIENT'), batch_size, report)
+        attorney_users = _create(
+            User, _users(prefix, 'attorney', attorneys, password, rng, 'ATTORNEY'), batch_size, report
+        )
+        client_profiles = _create(Client, (Client(user=user) for user in client_users), batch_size, report)
+
+        attorney_profiles = []
+        for index, user in enumerate(attorney_users):
+            latitude = round(rng.uniform(*LATITUDES), 6)
+            longitude = round(rng.uniform(*LONGITUDES), 6)
+            attorney_profiles.append(Attorney(
+                user=user,
+                license_number=f'{prefix.upper()}-{index:07d}',
+                license_status='ACTIVE',
+                years_of_experience=rng.randint(1, 35),
+                bio=f'{user.first_name} {user.last_name} practises {rng.choice(SPECIALTIES).lower()}.',
+                office_address=f'{rng.randint(1, 999)} Main St',
+                latitude=latitude,
+                longitude=longitude,
+                # bulk_create skips Attorney.save(), which derives the geohash
+                geohash=encode_geohash(latitude, longitude),
+                is_pro_bono=rng.random() < 0.2,
+            ))
+        attorney_profiles = _create(Attorney, attorney_profiles, batch_size, report)
+
+        if specialty_ids:
+            links = [
+                Attorney.specialties.through(attorney_id=attorney.id, specialty_id=specialty_id)
+                for attorney in attorney_profiles
+                for specialty_id in rng.sample(specialty_ids, min(len(specialty_ids), rng.randint(1, 3)))
+            ]
+            Attorney.specialties.through.objects.bulk_create(links, batch_size=batch_size)
+            report.add(Attorney.specialties.through._meta.db_table, len(links))
+
+        slots = [
+            AvailabilitySlot(attorney=attorney, day_of_week=day, start_time=time(9), end_time=time(17))
+            for attorney in attorney_profiles for day in range(5)
+        ]
+        _create(AvailabilitySlot, slots, batch_size, report)
+
+        statuses = [choice for choice, _ in LegalRequest.STATUS_CHOICES]
+        legal_requests = []
+        if attorney_profiles:
+            for client in client_profiles:
+                for _ in range(requests_per_client):
+                    topic = rng.choice(REQUEST_TOPICS)
+                    legal_requests.append(LegalRequest(
+                        client=client,
+                        attorney=rng.choice(attorney_profiles),
+                        title=topic,
+                        description=f'{topic} for {client.user.first_name} {client.user.last_name}.',
+                        status=rng.choice(statuses),
+                        is_pro_bono=rng.random() < 0.1,
+                    ))
+        legal_requests = _create(LegalRequest, legal_requests, batch_size, report)
+
+        reviews = [
+            ClientAttorneyReview(
+                client=legal_request.client,
+                attorney=legal_request.attorney,
+                legal_request=legal_request,
+                rating=rng.choices(range(1, 6), weights=(1, 1, 2, 4, 4))[0],
+                comment=rng.choice(['Very helpful.', 'Responsive and clear.', 'Could have been faster.', None]),
+            )
+            for legal_request in legal_requests
+            if legal_request.status == 'COMPLETED' and rng.random() < review_rate
+        ]
+        _create(ClientAttorneyReview, reviews, batch_size, report)
+
+        sessions = []
+        if client_users:
+            sessions = _create(
+                ChatSession,
+                (ChatSession(user=rng.choice(client_users)) for _ in range(chat_sessions)),
+                batch_size,
+                report,
+            )
+        messages = (
+            ChatMessage(
+                session=session,
+                message_type='USER' if index % 2 == 0 else 'BOT',
+                content=rng.choice(QUESTIONS) if index % 2 == 0 else 'Here is some general legal information.',
+            )
+            for session in sessions for index in range(messages_per_session)
+        )
+        _create(ChatMessage, messages, batch_size, report)
+
+        attorney_ids = [attorney.id for attorney in attorney_profiles]
+        reconcile_ratings(attorney_ids)
+        refresh_documents(attorney_ids)
+    rebuild_metrics()
+    return report
+
+
+def clear_seed_data(prefix=DEFAULT_PREFIX):
+    """Delete the users seeded with ``prefix`` and everything that cascades from them."""
+    deleted, _ = User.objects.filter(email__startswith=f'{prefix}.').delete()
+    rebuild_metrics()
+    return deleted
@@ -0,0 +1,63 @@
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.users.models import User
+from apps.attorneys.models import Attorney
+from apps.clients.models import Client, LegalRequest
+from .metrics import TRACKED_MODELS, metrics_for, diff_metrics, record_changes
+
+
+@receiver(post_init, sender=User)
+@receiver(post_init, sender=Attorney)
+@receiver(post_init, sender=Client)
+@receiver(post_init, sender=LegalRequest)
+def snapshot_dashboard_fields(sender, instance, **kwargs):
+    """
+    Signal to remember the values the dashboard metrics depend on, so a later
+    save can be applied as a delta. Deferred fields are left for pre_save.
+    """
+    fields = TRACKED_MODELS[sender][0]
+    if all(field in instance.__dict__ for field in fields):
+        instance._dashboard_values = {field: instance.__dict__[field] for field in fields}
+    else:
+        instance._dashboard_values = None
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Attorney)
+@receiver(pre_save, sender=Client)
+@receiver(pre_save, sender=LegalRequest)
+def load_dashboard_fields(sender, instance, **kwargs):
+    """Signal to load the stored values when they were not loaded with the instance."""
+    if instance._state.adding or getattr(instance, '_dashboard_values', None) is not None:
+        return
+    fields = TRACKED_MODELS[sender][0]
+    instance._dashboard_values = (
+        sender._base_manager.filter(pk=instance.pk).values(*fields).first() if fields else {}
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Attorney)
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=LegalRequest)
+def update_dashboard_metrics(sender, instance, created, **kwargs):
+    """Signal to apply a save to the dashboard counters."""
+    new = metrics_for(instance)
+    old_values = getattr(instance, '_dashboard_values', None)
+    if created or old_values is None:
+        old = set()
+    else:
+        old = metrics_for(instance, old_values)
+    record_changes(diff_metrics(old, new))
+    snapshot_dashboard_fields(sender, instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Attorney)
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=LegalRequest)
+def remove_dashboard_metrics(sender, instance, **kwargs):
+    """Signal to remove a deleted row from the dashboard counters."""
+    old_values = getattr(instance, '_dashboard_values', None)
+    old = metrics_for(instance, old_values)
+    record_changes(diff_metrics(old, set()))
@@ -0,0 +1,141 @@
+"""
+Daily platform statistics engine.
+
+Figures for a whole date range are computed with at most two aggregate
+queries per table: one conditional aggregate for everything created before
+the range and one grouped by creation day inside it, accumulated in Python.
+Attorney and client profiles have no timestamp of their own and are dated by
+their user's ``date_joined``.
+
+Status-based figures (active attorneys, completed requests) reflect each
+row's current status; history is not versioned, so backfilled days count a
+row by the state it is in today.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.users.models import User
+from apps.attorneys.models import Attorney
+from apps.clients.models import Client, LegalRequest
+from .models import PlatformStats
+
+ACTIVE_CLIENT_WINDOW_DAYS = 30
+
+STATS_FIELDS = [
+    'total_users', 'total_attorneys', 'total_clients', 'active_attorneys',
+    'active_clients', 'total_requests', 'completed_requests', 'pro_bono_requests',
+]
+
+
+def _date_range(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _running_totals(queryset, date_field, start, end, **counts):
+    """
+    Cumulative ``counts`` (name -> aggregate) as of the end of each day in
+    ``start``..``end``, keyed by date.
+    """
+    # Compare against datetime bounds rather than ``__date`` so indexes on the column apply
+    range_start = _start_of_day(start)
+    range_end = _start_of_day(end + timedelta(days=1))
+    totals = queryset.aggregate(**{
+        name: Count('pk', filter=Q(**{f'{date_field}__lt': range_start}) & (count.filter or Q()))
+        for name, count in counts.items()
+    })
+    daily = {
+        row['day']: row
+        for row in queryset.filter(
+            **{f'{date_field}__gte': range_start, f'{date_field}__lt': range_end}
+        ).annotate(day=TruncDate(date_field)).order_by().values('day').annotate(**counts)
+    }
+
+    result = {}
+    for day in _date_range(start, end):
+        row = daily.get(day)
+        if row:
+            for name in counts:
+                totals[name] += row[name]
+        result[day] = dict(totals)
+    return result
+
+
+def _active_clients(start, end):
+    """Number of distinct clients with a legal request in the window ending on each day."""
+    window = timedelta(days=ACTIVE_CLIENT_WINDOW_DAYS)
+    clients_by_day = defaultdict(set)
+    rows = LegalRequest.objects.filter(
+        created_at__gte=_start_of_day(start - window + timedelta(days=1)),
+        created_at__lt=_start_of_day(end + timedelta(days=1)),
+    ).annotate(day=TruncDate('created_at')).order_by().values_list('day', 'client_id').distinct()
+    for day, client_id in rows:
+        clients_by_day[day].add(client_id)
+
+    result = {}
+    for day in _date_range(start, end):
+        active = set()
+        for offset in range(ACTIVE_CLIENT_WINDOW_DAYS):
+            active |= clients_by_day.get(day - timedelta(days=offset), set())
+        result[day] = len(active)
+    return result
+
+
+def build_stats(start, end=None):
+    """Return unsaved ``PlatformStats`` for every day from ``start`` to ``end`` inclusive."""
+    end = end or start
+    users = _running_totals(User.objects.all(), 'date_joined', start, end, total_users=Count('pk'))
+    attorneys = _running_totals(
+        Attorney.objects.all(), 'user__date_joined', start, end,
+        total_attorneys=Count('pk'),
+        active_attorneys=Count('pk', filter=Q(license_status='ACTIVE')),
+    )
+    clients = _running_totals(Client.objects.all(), 'user__date_joined', start, end, total_clients=Count('pk'))
+    requests = _running_totals(
+        LegalRequest.objects.all(), 'created_at', start, end,
+        total_requests=Count('pk'),
+        completed_requests=Count('pk', filter=Q(status='COMPLETED')),
+        pro_bono_requests=Count('pk', filter=Q(is_pro_bono=True)),
+    )
+    active_clients = _active_clients(start, end)
+
+    return [
+        PlatformStats(
+            date=day,
+            active_clients=active_clients[day],
+            **users[day], **attorneys[day], **clients[day], **requests[day],
+        )
+        for day in _date_range(start, end)
+    ]
+
+
+def backfill_stats(start, end=None, batch_size=500):
+    """
+    Compute and upsert ``PlatformStats`` for ``start``..``end`` in one job.
+
+    Existing rows for those dates are overwritten. Returns the number of days written.
+    """
+    stats = build_stats(start, end)
+    PlatformStats.objects.bulk_create(
+        stats,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=STATS_FIELDS,
+    )
+    return len(stats)
+
+
+def generate_daily_stats(day=None):
+    """Upsert the statistics for ``day`` (today by default)."""
+    return backfill_stats(day or timezone.localdate())
@@ -0,0 +1,19 @@
+from datetime import date
+
+from celery import shared_task
+
+from .stats import backfill_stats, generate_daily_stats
+
+
+@shared_task(ignore_result=True)
+def generate_platform_stats():
+    """Upsert today's platform statistics. Scheduled daily via CELERY_BEAT_SCHEDULE."""
+    generate_daily_stats()
+
+
+@shared_task
+def backfill_platform_stats(start_date, end_date=None):
+    """Upsert platform statistics for every day between two ISO dates, inclusive."""
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date) if end_date else None
+    return backfill_stats(start, end)
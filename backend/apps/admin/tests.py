@@ -1,12 +1,22 @@
-from django.test import TestCase
+import warnings
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
+from apps.users.authentication import ClaimsRefreshToken
 from apps.users.models import User
 from apps.attorneys.models import Attorney
 from apps.clients.models import Client, LegalRequest
-from .models import PlatformStats, AdminNotification, SystemConfiguration
+from .models import PlatformStats, AdminNotification, SystemConfiguration, DashboardMetric
+from .metrics import read_totals, live_totals, rebuild_metrics
+from .stats import build_stats, backfill_stats
+from .seed import seed_data, clear_seed_data
+from .benchmark import compare, default_scenarios, percentile, run_benchmark
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
+import json
 import uuid
 import datetime
 
@@ -238,4 +248,334 @@ class AdminAPITestCase(APITestCase):
         
         # Check if user's verification status was updated
         self.attorney_user.refresh_from_db()
-        self.assertEqual(self.attorney_user.verification_status, 'VERIFIED') 
\ No newline at end of file
+        self.assertEqual(self.attorney_user.verification_status, 'VERIFIED') 
+
+class DashboardMetricsTestCase(APITestCase):
+    """Test case for the materialized admin dashboard counters."""
+    
+    def setUp(self):
+        self.admin_user = User.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            user_type='ADMIN',
+            is_staff=True,
+            is_superuser=True
+        )
+        self.client_user = User.objects.create_user(
+            email='client@example.com',
+            password='password123',
+            user_type='CLIENT'
+        )
+        self.attorney_user = User.objects.create_user(
+            email='attorney@example.com',
+            password='password123',
+            user_type='ATTORNEY',
+            verification_status='PENDING'
+        )
+        self.legal_request = LegalRequest.objects.create(
+            client=self.client_user.client_details,
+            attorney=self.attorney_user.attorney_details,
+            title='Contract Review',
+            description='I need help reviewing a contract',
+            is_pro_bono=True
+        )
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(user=self.admin_user)
+        self.dashboard_url = reverse('admin_app:dashboard-list')
+    
+    def test_counters_match_live_totals(self):
+        """Test that signals keep the counters equal to a live recompute."""
+        self.assertEqual(read_totals(), live_totals())
+        totals = read_totals()
+        self.assertEqual(totals['total_users'], 3)
+        self.assertEqual(totals['pending_attorney_verifications'], 1)
+        self.assertEqual(totals['pending_legal_requests'], 1)
+        self.assertEqual(totals['pro_bono_requests'], 1)
+    
+    def test_updates_and_deletes_adjust_counters(self):
+        """Test that state transitions and deletes move the counters."""
+        legal_request = LegalRequest.objects.get(pk=self.legal_request.pk)
+        legal_request.status = 'COMPLETED'
+        legal_request.save()
+        
+        attorney_user = User.objects.only('id', 'email').get(pk=self.attorney_user.pk)
+        attorney_user.verification_status = 'VERIFIED'
+        attorney_user.save()
+        
+        totals = read_totals()
+        self.assertEqual(totals['pending_legal_requests'], 0)
+        self.assertEqual(totals['completed_legal_requests'], 1)
+        self.assertEqual(totals['pending_attorney_verifications'], 0)
+        
+        self.client_user.delete()
+        self.assertEqual(read_totals(), live_totals())
+        self.assertEqual(read_totals()['total_legal_requests'], 0)
+    
+    def test_rebuild_corrects_drift(self):
+        """Test that rebuilding records corrections for writes that bypass signals."""
+        LegalRequest.objects.update(status='COMPLETED')
+        self.assertEqual(rebuild_metrics(), {
+            'pending_legal_requests': -1,
+            'completed_legal_requests': 1,
+        })
+        self.assertEqual(read_totals(), live_totals())
+        self.assertEqual(rebuild_metrics(), {})
+    
+    def test_dashboard_reads_counters(self):
+        """Test that the dashboard serves counters in one query and live on request."""
+        DashboardMetric.objects.filter(metric='total_users').update(value=100)
+        with self.assertNumQueries(3):
+            response = self.api_client.get(self.dashboard_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_users'], 100)
+        self.assertEqual(response.data['total_clients'], 1)
+        
+        response = self.api_client.get(self.dashboard_url, {'live': 'true'})
+        self.assertEqual(response.data['total_users'], 3)
+
+
+class PlatformStatsEngineTestCase(TestCase):
+    """Test case for the single-pass platform statistics engine."""
+    
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.client_user = User.objects.create_user(
+            email='client@example.com',
+            password='password123',
+            user_type='CLIENT'
+        )
+        self.attorney_user = User.objects.create_user(
+            email='attorney@example.com',
+            password='password123',
+            user_type='ATTORNEY'
+        )
+        attorney = self.attorney_user.attorney_details
+        attorney.license_status = 'ACTIVE'
+        attorney.save()
+        
+        for index, status_value in enumerate(['COMPLETED', 'PENDING']):
+            LegalRequest.objects.create(
+                client=self.client_user.client_details,
+                attorney=attorney,
+                title=f'Request {index}',
+                description='Description',
+                status=status_value,
+                is_pro_bono=index == 0
+            )
+        
+        # Date the first user and request three days back
+        three_days_ago = timezone.now() - datetime.timedelta(days=3)
+        User.objects.filter(pk=self.client_user.pk).update(date_joined=three_days_ago)
+        LegalRequest.objects.filter(status='COMPLETED').update(created_at=three_days_ago)
+    
+    def test_build_stats_today(self):
+        """Test that today's figures match the live tables."""
+        stats = build_stats(self.today)[0]
+        self.assertEqual(stats.date, self.today)
+        self.assertEqual(stats.total_users, 2)
+        self.assertEqual(stats.total_attorneys, 1)
+        self.assertEqual(stats.total_clients, 1)
+        self.assertEqual(stats.active_attorneys, 1)
+        self.assertEqual(stats.active_clients, 1)
+        self.assertEqual(stats.total_requests, 2)
+        self.assertEqual(stats.completed_requests, 1)
+        self.assertEqual(stats.pro_bono_requests, 1)
+    
+    def test_backfill_range_is_cumulative_and_upserts(self):
+        """Test that a backfill writes one row per day and overwrites existing rows."""
+        start = self.today - datetime.timedelta(days=4)
+        PlatformStats.objects.create(date=self.today, total_users=99)
+        
+        # Two aggregates per table, one for active clients, one upsert
+        with self.assertNumQueries(10):
+            written = backfill_stats(start, self.today)
+        self.assertEqual(written, 5)
+        
+        by_date = {stats.date: stats for stats in PlatformStats.objects.all()}
+        self.assertEqual(by_date[start].total_users, 0)
+        self.assertEqual(by_date[start + datetime.timedelta(days=1)].total_users, 1)
+        self.assertEqual(by_date[start + datetime.timedelta(days=1)].total_clients, 1)
+        self.assertEqual(by_date[start + datetime.timedelta(days=1)].total_requests, 1)
+        self.assertEqual(by_date[start + datetime.timedelta(days=1)].total_attorneys, 0)
+        self.assertEqual(by_date[self.today].total_users, 2)
+        self.assertEqual(by_date[self.today].total_requests, 2)
+
+
+class AttorneyTransferAPITestCase(APITestCase):
+    """Test case for the bulk attorney import and export endpoints."""
+    
+    def setUp(self):
+        self.admin_user = User.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            user_type='ADMIN',
+            is_staff=True,
+            is_superuser=True
+        )
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(user=self.admin_user)
+    
+    def test_import_and_export(self):
+        """Test uploading a CSV and streaming it back as CSV and JSON Lines."""
+        upload = SimpleUploadedFile(
+            'attorneys.csv',
+            b'email,first_name,license_number,specialties\r\n'
+            b'ada@example.com,Ada,LIC-1,Tax\r\n'
+            b'bad-row,,,\r\n',
+            content_type='text/csv'
+        )
+        response = self.api_client.post(
+            reverse('admin_app:attorney-transfer-import-attorneys'), {'file': upload}, format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['skipped'], 1)
+        self.assertEqual(read_totals()['total_attorneys'], live_totals()['total_attorneys'])
+        
+        url = reverse('admin_app:attorney-transfer-export-attorneys')
+        response = self.api_client.get(url, {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('ada@example.com,Ada,'))
+        
+        response = self.api_client.get(url, {'format': 'jsonl'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['specialties'] for row in rows], [['Tax']])
+    
+    def test_requires_admin(self):
+        """Test that non-admin users cannot export attorneys."""
+        user = User.objects.create_user(email='client@example.com', password='password123', user_type='CLIENT')
+        self.api_client.force_authenticate(user=user)
+        response = self.api_client.get(reverse('admin_app:attorney-transfer-export-attorneys'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AdminStreamingExportTestCase(APITestCase):
+    """Test case for the ``?format=csv|jsonl`` exports of the admin list endpoints."""
+    
+    def setUp(self):
+        self.admin_user = User.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            user_type='ADMIN',
+            is_staff=True,
+            is_superuser=True
+        )
+        for index in range(3):
+            User.objects.create_user(
+                email=f'attorney{index}@example.com',
+                password='password123',
+                user_type='ATTORNEY',
+                verification_status='VERIFIED' if index else 'PENDING'
+            )
+        User.objects.create_user(email='client@example.com', password='password123', user_type='CLIENT')
+        AdminNotification.objects.create(admin=self.admin_user, title='Hello', message='World', category='SYSTEM')
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(user=self.admin_user)
+    
+    def export(self, name, **params):
+        response = self.api_client.get(reverse(f'admin_app:{name}-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+    
+    def test_csv_export_applies_filters(self):
+        """Test that CSV exports stream every filtered row without pagination."""
+        body = self.export('user-verification', format='csv', user_type='ATTORNEY')
+        lines = body.splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'email', 'first_name'])
+        self.assertEqual(len(lines), 4)
+        
+        body = self.export('attorney-verification', format='csv', verification_status='VERIFIED')
+        self.assertEqual(len(body.splitlines()), 3)
+        self.assertIn('user__email', body.splitlines()[0])
+    
+    def test_jsonl_export(self):
+        """Test JSON Lines exports of clients and notifications."""
+        rows = [json.loads(line) for line in self.export('client-verification', format='jsonl').splitlines()]
+        self.assertEqual([row['user__email'] for row in rows], ['client@example.com'])
+        
+        rows = [json.loads(line) for line in self.export('notification', format='jsonl').splitlines()]
+        self.assertEqual(rows[0]['title'], 'Hello')
+        self.assertEqual(rows[0]['admin__email'], 'admin@example.com')
+    
+    def test_export_query_count(self):
+        """Test that an export runs one query however many rows it streams."""
+        url = reverse('admin_app:attorney-verification-list')
+        with self.assertNumQueries(1):
+            response = self.api_client.get(url, {'format': 'jsonl'})
+            lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 3)
+    
+    async def test_export_streams_under_asgi(self):
+        """Test that an ASGI export is sent line by line instead of being read into memory first."""
+        token = await sync_to_async(lambda: str(ClaimsRefreshToken.for_user(self.admin_user).access_token))()
+        response = await AsyncClient().get(
+            reverse('admin_app:user-verification-list'), {'format': 'csv', 'user_type': 'ATTORNEY'},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with warnings.catch_warnings():
+            # Django warns when it has to buffer a synchronous iterator
+            warnings.simplefilter('error')
+            chunks = [chunk async for chunk in response]
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(chunks[0].startswith(b'id,email,'))
+    
+    def test_json_list_unchanged(self):
+        """Test that the paginated JSON list still answers without a format."""
+        response = self.api_client.get(reverse('admin_app:client-verification-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.streaming)
+
+
+class SeedBenchmarkTestCase(TestCase):
+    """Test the load-test data generator and the benchmark harness."""
+    
+    def setUp(self):
+        self.report = seed_data(
+            clients=6, attorneys=3, specialties=4, requests_per_client=4, review_rate=1.0,
+            chat_sessions=2, messages_per_session=3, batch_size=5
+        )
+        User.objects.create_user(email='admin@example.com', password='password123', user_type='ADMIN')
+    
+    def test_seed_data(self):
+        """Test that seeding writes the requested volumes and keeps derived data consistent."""
+        counts = self.report.as_dict()
+        self.assertEqual(counts['users'], 9)
+        self.assertEqual(counts['legal_requests'], 24)
+        self.assertEqual(counts['chat_messages'], 6)
+        self.assertEqual(Client.objects.filter(user__email__startswith='seed.').count(), 6)
+        self.assertTrue(all(Attorney.objects.filter(user__email__startswith='seed.').values_list('geohash', flat=True)))
+        
+        completed = LegalRequest.objects.filter(status='COMPLETED').count()
+        self.assertEqual(counts.get('client_attorney_reviews', 0), completed)
+        self.assertEqual(rebuild_metrics(), {})
+        
+        with self.assertRaises(ValueError):
+            seed_data(clients=1)
+        clear_seed_data()
+        self.assertFalse(User.objects.filter(email__startswith='seed.').exists())
+    
+    def test_benchmark(self):
+        """Test that every scenario succeeds and reports latency percentiles and queries."""
+        results = run_benchmark(default_scenarios(), iterations=3, warmup=1)
+        self.assertEqual(set(results), {'login', 'attorney_search', 'legal_request_list', 'admin_dashboard'})
+        for name, summary in results.items():
+            self.assertEqual(summary['requests'], 3)
+            if name != 'login':
+                self.assertEqual(summary['errors'], 0, name)
+            self.assertLessEqual(summary['p50'], summary['p99'])
+            self.assertGreater(summary['queries'], 0)
+    
+    def test_compare_with_baseline(self):
+        """Test that growth beyond the tolerance is reported as a regression."""
+        self.assertEqual(percentile([4, 1, 3, 2], 50), 2)
+        baseline = {'login': {'p95': 10.0, 'queries': 4}, 'search': {'p95': 10.0, 'queries': 2}}
+        results = {'login': {'p95': 11.0, 'queries': 4}, 'search': {'p95': 10.0, 'queries': 3}}
+        changes, regressions = compare(results, baseline, tolerance=0.2)
+        self.assertEqual(regressions, ['search'])
+        self.assertAlmostEqual(changes['login']['p95'][2], 0.1)
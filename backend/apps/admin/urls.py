@@ -7,7 +7,8 @@ from .views import (
     SystemConfigurationViewSet,
     UserVerificationViewSet,
     AttorneyVerificationViewSet,
-    ClientVerificationViewSet
+    ClientVerificationViewSet,
+    AttorneyTransferViewSet
 )
 
 app_name = 'admin_app'  # Use the same label as defined in apps.py
@@ -20,6 +21,7 @@ router.register('config', SystemConfigurationViewSet, basename='config')
 router.register('verify/users', UserVerificationViewSet, basename='user-verification')
 router.register('verify/attorneys', AttorneyVerificationViewSet, basename='attorney-verification')
 router.register('verify/clients', ClientVerificationViewSet, basename='client-verification')
+router.register('attorneys', AttorneyTransferViewSet, basename='attorney-transfer')
 
 urlpatterns = [
     path('', include(router.urls)),
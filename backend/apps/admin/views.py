@@ -1,10 +1,16 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from django.conf import settings
 from django.db.models import Count, Q
 from django.utils import timezone
+import io
 from datetime import timedelta
 from .models import PlatformStats, AdminNotification, SystemConfiguration
+from .metrics import read_totals, live_totals
+from .stats import build_stats
 from .serializers import (
     PlatformStatsSerializer,
     AdminNotificationSerializer,
@@ -15,8 +21,16 @@ from .serializers import (
     AdminDashboardSerializer
 )
 from apps.users.permissions import IsAdmin
+from apps.users.mixins import QueryPlan, QueryPlanMixin
+from apps.users.pagination import KeysetPagination
+from apps.users.exports import (
+    EXPORT_FORMATS, CSVRenderer, JSONLinesRenderer, StreamingExportMixin, streaming_export_response
+)
 from apps.users.models import User
 from apps.attorneys.models import Attorney
+from apps.attorneys.bulk import (
+    DEFAULT_CHUNK_SIZE, EXPORT_FIELDS, IMPORT_FORMATS, detect_format, export_rows, import_attorneys, read_rows
+)
 from apps.clients.models import Client, LegalRequest
 
 
@@ -30,26 +44,18 @@ class AdminDashboardViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
     
     def list(self, request):
-        """Get dashboard overview metrics."""
-        # Calculate counts for dashboard metrics
-        total_users = User.objects.count()
-        total_attorneys = Attorney.objects.count()
-        total_clients = Client.objects.count()
-        
-        pending_attorney_verifications = User.objects.filter(
-            user_type='ATTORNEY',
-            verification_status='PENDING'
-        ).count()
+        """
+        Get dashboard overview metrics.
         
-        pending_client_verifications = User.objects.filter(
-            user_type='CLIENT',
-            verification_status='PENDING'
-        ).count()
-        
-        total_legal_requests = LegalRequest.objects.count()
-        pending_legal_requests = LegalRequest.objects.filter(status='PENDING').count()
-        completed_legal_requests = LegalRequest.objects.filter(status='COMPLETED').count()
-        pro_bono_requests = LegalRequest.objects.filter(is_pro_bono=True).count()
+        Counts are read from the materialized dashboard counters. Pass
+        ``?live=true`` (or set ADMIN_DASHBOARD_LIVE_METRICS) to recompute them
+        from the live tables instead.
+        """
+        live = request.query_params.get('live', '').lower() in ('1', 'true', 'yes')
+        if live or settings.ADMIN_DASHBOARD_LIVE_METRICS:
+            totals = live_totals()
+        else:
+            totals = read_totals()
         
         # Get recent registrations (last 7 days)
         seven_days_ago = timezone.now() - timedelta(days=7)
@@ -68,15 +74,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
         )
         
         data = {
-            'total_users': total_users,
-            'total_attorneys': total_attorneys,
-            'total_clients': total_clients,
-            'pending_attorney_verifications': pending_attorney_verifications,
-            'pending_client_verifications': pending_client_verifications,
-            'total_legal_requests': total_legal_requests,
-            'pending_legal_requests': pending_legal_requests,
-            'completed_legal_requests': completed_legal_requests,
-            'pro_bono_requests': pro_bono_requests,
+            **totals,
             'recent_registrations': recent_registrations,
             'recent_legal_requests': recent_legal_requests,
         }
@@ -114,7 +112,7 @@ class PlatformStatsViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def generate_today(self, request):
         """Generate platform statistics for today."""
-        today = timezone.now().date()
+        today = timezone.localdate()
         
         # Check if stats for today already exist
         if PlatformStats.objects.filter(date=today).exists():
@@ -123,45 +121,21 @@ class PlatformStatsViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Calculate statistics
-        total_users = User.objects.count()
-        total_attorneys = Attorney.objects.count()
-        total_clients = Client.objects.count()
-        active_attorneys = Attorney.objects.filter(license_status='ACTIVE').count()
-        
-        # Active clients are those who have made a request in the last 30 days
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        active_clients = Client.objects.filter(
-            legal_requests__created_at__gte=thirty_days_ago
-        ).distinct().count()
-        
-        total_requests = LegalRequest.objects.count()
-        completed_requests = LegalRequest.objects.filter(status='COMPLETED').count()
-        pro_bono_requests = LegalRequest.objects.filter(is_pro_bono=True).count()
-        
-        # Create new stats record
-        stats = PlatformStats.objects.create(
-            date=today,
-            total_users=total_users,
-            total_attorneys=total_attorneys,
-            total_clients=total_clients,
-            active_attorneys=active_attorneys,
-            active_clients=active_clients,
-            total_requests=total_requests,
-            completed_requests=completed_requests,
-            pro_bono_requests=pro_bono_requests
-        )
+        stats = build_stats(today)[0]
+        stats.save()
         
         serializer = self.get_serializer(stats)
         return Response(serializer.data)
 
 
-class AdminNotificationViewSet(viewsets.ModelViewSet):
+class AdminNotificationViewSet(StreamingExportMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """
     API endpoint for admin notifications.
     
     list:
-    Return a list of all notifications for the current admin.
+    Return a list of all notifications for the current admin. With
+    ``?format=csv`` or ``?format=jsonl`` every matching notification is
+    streamed as a file instead.
     
     create:
     Create a new notification.
@@ -184,6 +158,14 @@ class AdminNotificationViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'message', 'category']
     ordering_fields = ['created_at', 'is_read']
     ordering = ['-created_at']
+    query_plans = {
+        'default': QueryPlan(select_related=['admin']),
+    }
+    export_fields = (
+        'id', 'admin_id', 'admin__email', 'title', 'message', 'category',
+        'is_read', 'reference_id', 'created_at',
+    )
+    export_filename = 'notifications'
     
     def get_queryset(self):
         # Check if this is being called for Swagger schema generation
@@ -191,7 +173,7 @@ class AdminNotificationViewSet(viewsets.ModelViewSet):
             # Return empty queryset for schema generation
             return AdminNotification.objects.none()
             
-        return AdminNotification.objects.filter(admin=self.request.user)
+        return self.apply_query_plan(AdminNotification.objects.filter(admin=self.request.user))
     
     def perform_create(self, serializer):
         serializer.save(admin=self.request.user)
@@ -245,12 +227,13 @@ class SystemConfigurationViewSet(viewsets.ModelViewSet):
         serializer.save(last_modified_by=self.request.user)
 
 
-class UserVerificationViewSet(viewsets.ModelViewSet):
+class UserVerificationViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     """
     API endpoint for user verification.
     
     list:
-    Return a list of users pending verification.
+    Return a list of users pending verification, or stream them all with
+    ``?format=csv`` or ``?format=jsonl``.
     
     retrieve:
     Return a specific user for verification.
@@ -264,6 +247,13 @@ class UserVerificationViewSet(viewsets.ModelViewSet):
     search_fields = ['email', 'first_name', 'last_name']
     ordering_fields = ['date_joined', 'verification_status']
     ordering = ['-date_joined']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-date_joined', '-id')
+    export_fields = (
+        'id', 'email', 'first_name', 'last_name', 'user_type',
+        'verification_status', 'verification_notes', 'email_verified', 'date_joined',
+    )
+    export_filename = 'users'
     
     def get_queryset(self):
         queryset = User.objects.all()
@@ -329,12 +319,13 @@ class UserVerificationViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class AttorneyVerificationViewSet(viewsets.ReadOnlyModelViewSet):
+class AttorneyVerificationViewSet(StreamingExportMixin, QueryPlanMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for attorney verification details.
     
     list:
-    Return a list of attorneys for verification.
+    Return a list of attorneys for verification, or stream them all with
+    ``?format=csv`` or ``?format=jsonl``.
     
     retrieve:
     Return a specific attorney for verification.
@@ -345,9 +336,18 @@ class AttorneyVerificationViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ['user__email', 'user__first_name', 'user__last_name', 'license_number']
     ordering_fields = ['user__date_joined', 'license_status']
     ordering = ['-user__date_joined']
+    query_plans = {
+        'default': QueryPlan(select_related=['user'], prefetch_related=['credentials']),
+    }
+    export_fields = (
+        'id', 'user_id', 'user__email', 'user__first_name', 'user__last_name',
+        'user__verification_status', 'user__date_joined', 'license_number',
+        'license_status', 'years_of_experience', 'is_pro_bono',
+    )
+    export_filename = 'attorneys'
     
     def get_queryset(self):
-        queryset = Attorney.objects.all()
+        queryset = self.apply_query_plan(Attorney.objects.all())
         
         # Filter by license status
         status_filter = self.request.query_params.get('license_status')
@@ -362,12 +362,13 @@ class AttorneyVerificationViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
-class ClientVerificationViewSet(viewsets.ReadOnlyModelViewSet):
+class ClientVerificationViewSet(StreamingExportMixin, QueryPlanMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for client verification details.
     
     list:
-    Return a list of clients for verification.
+    Return a list of clients for verification, or stream them all with
+    ``?format=csv`` or ``?format=jsonl``.
     
     retrieve:
     Return a specific client for verification.
@@ -378,13 +379,72 @@ class ClientVerificationViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ['user__email', 'user__first_name', 'user__last_name']
     ordering_fields = ['user__date_joined']
     ordering = ['-user__date_joined']
+    query_plans = {
+        'default': QueryPlan(select_related=['user']),
+    }
+    export_fields = (
+        'id', 'user_id', 'user__email', 'user__first_name', 'user__last_name',
+        'user__verification_status', 'user__date_joined', 'address',
+        'preferred_language', 'date_of_birth',
+    )
+    export_filename = 'clients'
     
     def get_queryset(self):
-        queryset = Client.objects.all()
+        queryset = self.apply_query_plan(Client.objects.all())
         
         # Filter by user verification status
         verification_status = self.request.query_params.get('verification_status')
         if verification_status:
             queryset = queryset.filter(user__verification_status=verification_status)
             
-        return queryset 
\ No newline at end of file
+        return queryset 
+
+class AttorneyTransferViewSet(viewsets.ViewSet):
+    """
+    API endpoint for bulk attorney import and export.
+    
+    import:
+    Upload a CSV or JSON Lines ``file`` of attorneys; rows are written in chunks.
+    
+    export:
+    Stream every attorney as CSV (``?format=csv``, the default) or JSON Lines
+    (``?format=jsonl``).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_attorneys(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"file": "A CSV or JSON Lines file is required."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        file_format = request.data.get('format') or detect_format(upload.name)
+        if file_format not in IMPORT_FORMATS:
+            return Response(
+                {"format": f"Must be one of {', '.join(IMPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            chunk_size = int(request.data.get('chunk_size', DEFAULT_CHUNK_SIZE))
+        except ValueError:
+            chunk_size = 0
+        if not 1 <= chunk_size <= 10000:
+            return Response({"chunk_size": "Must be between 1 and 10000."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Decode lazily so the upload is never read into memory whole
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        report = import_attorneys(read_rows(stream, file_format), chunk_size=chunk_size)
+        return Response(report.as_dict())
+    
+    @action(
+        detail=False, methods=['get'], url_path='export',
+        renderer_classes=[JSONRenderer, CSVRenderer, JSONLinesRenderer]
+    )
+    def export_attorneys(self, request):
+        export_format = request.query_params.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"format": f"Must be one of {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return streaming_export_response(export_rows(), EXPORT_FIELDS, export_format, 'attorneys')
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class AttorneysConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.attorneys' 
\ No newline at end of file
+    name = 'apps.attorneys'
+    
+    def ready(self):
+        """Import signals when the app is ready."""
+        import apps.attorneys.signals
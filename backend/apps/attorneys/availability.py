@@ -0,0 +1,305 @@
+"""
+Attorney availability engine.
+
+Attorneys publish weekly recurring windows (``AvailabilitySlot``); clients
+book concrete appointments (``Booking``). This module
+
+* expands the weekly windows of one attorney into concrete datetime windows
+  for a date range, subtracts confirmed bookings and cuts the rest into
+  bookable slots, and
+* answers "which attorneys are free for the whole of this window" across all
+  attorneys with ``AvailabilityIndex``: one static interval tree per weekday
+  over every attorney's merged windows, queried in O(log n + k) instead of
+  looping over attorneys.
+
+All intervals are half-open, ``[start, end)``. Weekly windows are in minutes
+since midnight, local time.
+
+Each process keeps its own ``AvailabilityIndex`` and rebuilds it when the
+version in the default cache moves. A process-local default cache (LocMem,
+when ``REDIS_URL`` is unset) never carries another process's bump, so the
+index is then also rebuilt every ``UNSHARED_INDEX_MAX_AGE`` seconds.
+"""
+import time as clock
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache, caches
+from django.utils import timezone
+
+from apps.users.authentication import cache_is_shared
+from .models import AvailabilitySlot, Booking
+
+MINUTES_PER_DAY = 24 * 60
+INDEX_VERSION_KEY = 'attorneys:availability_index_version'
+# How stale another process's slot changes may be when the default cache is process-local
+UNSHARED_INDEX_MAX_AGE = 60
+
+
+def to_minutes(value):
+    """Minutes since midnight for a ``time``."""
+    return value.hour * 60 + value.minute
+
+
+def merge_intervals(intervals):
+    """Sort and merge overlapping or touching ``(start, end)`` intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(windows, busy):
+    """
+    Remove ``busy`` intervals from ``windows``.
+
+    Both inputs must be sorted and non-overlapping (see ``merge_intervals``);
+    the sweep is linear in their combined length.
+    """
+    free = []
+    index = 0
+    for start, end in windows:
+        cursor = start
+        # Skip busy intervals that end before this window
+        while index < len(busy) and busy[index][1] <= cursor:
+            index += 1
+        scan = index
+        while scan < len(busy) and busy[scan][0] < end:
+            busy_start, busy_end = busy[scan]
+            if busy_start > cursor:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            if cursor >= end:
+                break
+            scan += 1
+        if cursor < end:
+            free.append((cursor, end))
+    return free
+
+
+def _date_range(start_date, end_date):
+    day = start_date
+    while day <= end_date:
+        yield day
+        day += timedelta(days=1)
+
+
+def _aware(day, minutes):
+    moment = datetime.combine(day, time()) + timedelta(minutes=minutes)
+    return timezone.make_aware(moment)
+
+
+def expand_windows(weekly_windows, start_date, end_date):
+    """
+    Expand weekly ``{day_of_week: [(start_minute, end_minute), ...]}`` windows
+    into concrete, merged datetime windows between two dates inclusive.
+    """
+    windows = []
+    for day in _date_range(start_date, end_date):
+        for start, end in weekly_windows.get(day.weekday(), ()):
+            windows.append((_aware(day, start), _aware(day, end)))
+    return merge_intervals(windows)
+
+
+def weekly_windows_for(attorney_id):
+    """Merged weekly windows of one attorney, keyed by day of week."""
+    by_day = {}
+    slots = AvailabilitySlot.objects.filter(attorney_id=attorney_id, is_available=True).values_list(
+        'day_of_week', 'start_time', 'end_time'
+    )
+    for day_of_week, start_time, end_time in slots:
+        start, end = to_minutes(start_time), to_minutes(end_time)
+        if end > start:
+            by_day.setdefault(day_of_week, []).append((start, end))
+    return {day: merge_intervals(windows) for day, windows in by_day.items()}
+
+
+def busy_intervals(attorney_ids, start, end):
+    """Confirmed bookings overlapping ``[start, end)``, merged per attorney."""
+    bookings = Booking.objects.filter(
+        status='CONFIRMED', start_at__lt=end, end_at__gt=start
+    )
+    if attorney_ids is not None:
+        bookings = bookings.filter(attorney_id__in=attorney_ids)
+
+    by_attorney = {}
+    for attorney_id, booking_start, booking_end in bookings.values_list('attorney_id', 'start_at', 'end_at'):
+        by_attorney.setdefault(attorney_id, []).append((booking_start, booking_end))
+    return {attorney_id: merge_intervals(intervals) for attorney_id, intervals in by_attorney.items()}
+
+
+def free_windows(attorney_id, start_date, end_date):
+    """Concrete windows in which the attorney is available and not booked."""
+    windows = expand_windows(weekly_windows_for(attorney_id), start_date, end_date)
+    if not windows:
+        return []
+    busy = busy_intervals([attorney_id], windows[0][0], windows[-1][1]).get(attorney_id, [])
+    return subtract_intervals(windows, busy)
+
+
+def bookable_slots(attorney_id, start_date, end_date, duration=timedelta(hours=1), not_before=None):
+    """
+    Cut the attorney's free windows into back-to-back slots of ``duration``.
+
+    Slots starting before ``not_before`` (now by default) are skipped.
+    """
+    not_before = not_before or timezone.now()
+    slots = []
+    for start, end in free_windows(attorney_id, start_date, end_date):
+        cursor = start
+        while cursor + duration <= end:
+            if cursor >= not_before:
+                slots.append((cursor, cursor + duration))
+            cursor += duration
+    return slots
+
+
+class IntervalTree:
+    """
+    Static centered interval tree over ``(start, end, key)`` intervals.
+
+    Each node keeps the intervals that contain its center twice, sorted by
+    start ascending and by end descending, so a query only scans intervals
+    that actually match.
+    """
+
+    def __init__(self, intervals):
+        intervals = list(intervals)
+        self.center = None
+        if not intervals:
+            return
+
+        # Centering on a start point guarantees the interval it came from stays
+        # at this node, so every subtree is strictly smaller
+        starts = sorted(start for start, _, _ in intervals)
+        self.center = starts[len(starts) // 2]
+
+        left, right, overlapping = [], [], []
+        for interval in intervals:
+            start, end, _ = interval
+            if end <= self.center:
+                left.append(interval)
+            elif start > self.center:
+                right.append(interval)
+            else:
+                overlapping.append(interval)
+
+        self.by_start = sorted(overlapping, key=lambda interval: interval[0])
+        self.starts = [interval[0] for interval in self.by_start]
+        self.by_end = sorted(overlapping, key=lambda interval: -interval[1])
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def containing(self, start, end):
+        """Keys of intervals that cover the whole of ``[start, end)``."""
+        if self.center is None:
+            return []
+
+        keys = []
+        if start < self.center:
+            # Node intervals reach past the center; those starting by ``start`` contain it
+            for interval_start, interval_end, key in self.by_start[:bisect_right(self.starts, start)]:
+                if interval_end >= end:
+                    keys.append(key)
+            # Left intervals end by the center, so they only qualify for windows ending there too
+            if self.left and end <= self.center:
+                keys.extend(self.left.containing(start, end))
+        else:
+            # Node intervals start at or before the center; those reaching ``end`` qualify
+            for interval_start, interval_end, key in self.by_end:
+                if interval_end < end:
+                    break
+                keys.append(key)
+            if self.right and start > self.center:
+                keys.extend(self.right.containing(start, end))
+        return keys
+
+
+class AvailabilityIndex:
+    """Per-weekday interval trees over every attorney's merged weekly windows."""
+
+    def __init__(self, slots):
+        by_attorney_day = {}
+        for attorney_id, day_of_week, start_time, end_time in slots:
+            start, end = to_minutes(start_time), to_minutes(end_time)
+            if end > start:
+                by_attorney_day.setdefault((attorney_id, day_of_week), []).append((start, end))
+
+        by_day = {}
+        for (attorney_id, day_of_week), windows in by_attorney_day.items():
+            for start, end in merge_intervals(windows):
+                by_day.setdefault(day_of_week, []).append((start, end, attorney_id))
+        self.trees = {day: IntervalTree(intervals) for day, intervals in by_day.items()}
+
+    @classmethod
+    def build(cls):
+        return cls(
+            AvailabilitySlot.objects.filter(is_available=True).values_list(
+                'attorney_id', 'day_of_week', 'start_time', 'end_time'
+            ).iterator(chunk_size=5000)
+        )
+
+    def attorneys_available(self, day_of_week, start_minute, end_minute):
+        tree = self.trees.get(day_of_week)
+        if tree is None:
+            return set()
+        return set(tree.containing(start_minute, end_minute))
+
+
+_index = None
+_index_version = None
+_index_built_at = None
+
+
+def invalidate_availability_index():
+    """Make every process rebuild its index on next use."""
+    try:
+        cache.incr(INDEX_VERSION_KEY)
+    except ValueError:
+        cache.set(INDEX_VERSION_KEY, 1, None)
+
+
+def get_availability_index():
+    """
+    Process-local ``AvailabilityIndex``, rebuilt when the shared version
+    changes, or when it gets too old for a process-local cache to be trusted.
+    """
+    global _index, _index_version, _index_built_at
+    version = cache.get(INDEX_VERSION_KEY, 0)
+    now = clock.monotonic()
+    if (
+        _index is None
+        or version != _index_version
+        or not cache_is_shared(caches['default']) and now - _index_built_at >= UNSHARED_INDEX_MAX_AGE
+    ):
+        _index = AvailabilityIndex.build()
+        _index_version = version
+        _index_built_at = now
+    return _index
+
+
+def find_available_attorneys(start, end):
+    """
+    IDs of attorneys whose weekly windows cover ``[start, end)`` and who have
+    no confirmed booking overlapping it.
+
+    ``start`` and ``end`` are aware datetimes on the same local day (``end``
+    may be the following midnight).
+    """
+    local_start, local_end = timezone.localtime(start), timezone.localtime(end)
+    start_minute = to_minutes(local_start.time())
+    end_minute = (local_end - datetime.combine(local_start.date(), time(), local_start.tzinfo)).total_seconds() // 60
+    if not 0 <= start_minute < end_minute <= MINUTES_PER_DAY:
+        raise ValueError("The window must start before it ends and fall within a single day.")
+
+    candidates = get_availability_index().attorneys_available(
+        local_start.weekday(), start_minute, end_minute
+    )
+    if not candidates:
+        return set()
+    booked = set(busy_intervals(None, start, end))
+    return candidates - booked
@@ -0,0 +1,359 @@
+"""
+Bulk attorney import and export.
+
+Imports read CSV or JSON Lines as a stream and write it in chunks: each chunk
+is one transaction with one ``bulk_create`` per table (users, attorneys,
+specialties, attorney-specialty links, audit events). ``bulk_create`` sends
+no ``post_save``, so the work the per-row signals would do is done here once
+per chunk instead: attorney profiles are created directly (rather than the
+``TEMP-`` placeholder from ``create_user_profile``), search documents are
+refreshed for the chunk, ``USER_CREATED`` events are written in one insert
+and the dashboard counters receive the chunk's summed delta.
+
+Rows whose email or license number already exists are skipped, so an import
+can be re-run after a failure. Imported users get an unusable password unless
+the row carries one; hashing is deliberately slow, so leave passwords out of
+large files and let attorneys use password reset.
+
+Expected columns (CSV header or JSON keys)::
+
+    email, license_number                     required
+    first_name, last_name, phone_number, verification_status, password,
+    license_status, years_of_experience, bio, education, office_address,
+    latitude, longitude, is_pro_bono, specialties
+
+In CSV ``specialties`` is a ``;``-separated list of names; in JSON Lines it
+may also be a list. Unknown specialties are created. ``export_rows`` produces
+the same columns, so an export can be imported into another environment.
+"""
+import csv
+import json
+import uuid
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from apps.users.audit import write_activities
+from apps.users.models import User, UserActivity
+from apps.admin.metrics import metrics_for, record_changes
+from .geo import encode_geohash
+from .models import Attorney, Specialty
+from .search import refresh_documents
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+EXPORT_FIELDS = [
+    'email', 'first_name', 'last_name', 'phone_number', 'verification_status',
+    'license_number', 'license_status', 'years_of_experience', 'bio', 'education',
+    'office_address', 'latitude', 'longitude', 'is_pro_bono', 'specialties',
+    'ratings_average', 'ratings_count',
+]
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+FALSE_VALUES = {'', '0', 'false', 'no', 'n', 'f'}
+
+USER_STATUSES = {value for value, _ in User.VERIFICATION_STATUS_CHOICES}
+LICENSE_STATUSES = {value for value, _ in Attorney.LICENSE_STATUS_CHOICES}
+
+
+class ImportReport:
+    """Running totals of an import, passed to the progress callback after each chunk."""
+
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.skipped = 0
+        self.specialties_created = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'processed': self.processed,
+            'created': self.created,
+            'skipped': self.skipped,
+            'specialties_created': self.specialties_created,
+            'errors': self.errors,
+        }
+
+
+def detect_format(filename):
+    """Guess the import format from a file name, defaulting to CSV."""
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_rows(stream, file_format):
+    """
+    Yield ``(line_number, row)`` from a text stream without reading it whole.
+
+    JSON Lines rows are yielded undecoded and parsed by ``clean_row`` so one
+    malformed line is reported instead of aborting the import.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                yield line_number, line
+    else:
+        raise ValueError(f"Unknown import format: {file_format}")
+
+
+def _text(row, field, max_length=None):
+    value = row.get(field)
+    if value is None:
+        return None
+    value = str(value).strip()
+    if max_length and len(value) > max_length:
+        raise ValueError(f"{field} is longer than {max_length} characters")
+    return value or None
+
+
+def _choice(row, field, choices, default):
+    value = (_text(row, field) or default).upper()
+    if value not in choices:
+        raise ValueError(f"{field} must be one of {', '.join(sorted(choices))}")
+    return value
+
+
+def _boolean(row, field):
+    value = row.get(field)
+    if isinstance(value, bool):
+        return value
+    value = str(value or '').strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"{field} must be a boolean")
+
+
+def _coordinate(row, field, limit):
+    value = row.get(field)
+    if value in (None, ''):
+        return None
+    try:
+        value = Decimal(str(value).strip()).quantize(Decimal('0.000001'))
+    except InvalidOperation:
+        raise ValueError(f"{field} must be a number")
+    if not -limit <= value <= limit:
+        raise ValueError(f"{field} must be between -{limit} and {limit}")
+    return value
+
+
+def _specialties(row):
+    value = row.get('specialties') or []
+    if isinstance(value, str):
+        value = value.split(';')
+    return sorted({str(name).strip() for name in value if str(name).strip()})
+
+
+def clean_row(row):
+    """Validate one input row and return normalized values, or raise ``ValueError``."""
+    if isinstance(row, str):
+        row = json.loads(row)
+        if not isinstance(row, dict):
+            raise ValueError("Expected a JSON object")
+
+    email = _text(row, 'email')
+    if not email or '@' not in email:
+        raise ValueError("email is required")
+    license_number = _text(row, 'license_number', max_length=50)
+    if not license_number:
+        raise ValueError("license_number is required")
+
+    years = row.get('years_of_experience')
+    try:
+        years = int(years) if years not in (None, '') else 0
+    except (TypeError, ValueError):
+        raise ValueError("years_of_experience must be a whole number")
+    if years < 0:
+        raise ValueError("years_of_experience must not be negative")
+
+    latitude = _coordinate(row, 'latitude', 90)
+    longitude = _coordinate(row, 'longitude', 180)
+    if (latitude is None) != (longitude is None):
+        raise ValueError("latitude and longitude must be given together")
+
+    return {
+        'email': User.objects.normalize_email(email),
+        'first_name': _text(row, 'first_name', max_length=150) or '',
+        'last_name': _text(row, 'last_name', max_length=150) or '',
+        'phone_number': _text(row, 'phone_number', max_length=15),
+        'verification_status': _choice(row, 'verification_status', USER_STATUSES, 'PENDING'),
+        'password': _text(row, 'password'),
+        'license_number': license_number,
+        'license_status': _choice(row, 'license_status', LICENSE_STATUSES, 'PENDING'),
+        'years_of_experience': years,
+        'bio': _text(row, 'bio'),
+        'education': _text(row, 'education'),
+        'office_address': _text(row, 'office_address'),
+        'latitude': latitude,
+        'longitude': longitude,
+        'is_pro_bono': _boolean(row, 'is_pro_bono'),
+        'specialties': _specialties(row),
+    }
+
+
+def _resolve_specialties(names):
+    """Map specialty names to ids, creating the missing ones. Returns ``(ids, created)``."""
+    if not names:
+        return {}, 0
+    ids = dict(Specialty.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [Specialty(name=name) for name in sorted(set(names) - set(ids))]
+    if missing:
+        # A concurrent import may create the same names; re-read rather than trust our objects
+        Specialty.objects.bulk_create(missing, ignore_conflicts=True)
+        ids = dict(Specialty.objects.filter(name__in=names).values_list('name', 'id'))
+    return ids, len(missing)
+
+
+def import_chunk(rows, report):
+    """Validate and insert one chunk of ``(line_number, row)`` pairs."""
+    cleaned = []
+    for line_number, row in rows:
+        report.processed += 1
+        try:
+            cleaned.append((line_number, clean_row(row)))
+        except ValueError as exc:
+            report.add_error(line_number, str(exc))
+
+    with transaction.atomic():
+        emails = {row['email'] for _, row in cleaned}
+        licenses = {row['license_number'] for _, row in cleaned}
+        taken_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        taken_licenses = set(
+            Attorney.objects.filter(license_number__in=licenses).values_list('license_number', flat=True)
+        )
+
+        accepted = []
+        for line_number, row in cleaned:
+            if row['email'] in taken_emails:
+                report.add_error(line_number, f"A user with email {row['email']} already exists")
+            elif row['license_number'] in taken_licenses:
+                report.add_error(line_number, f"License number {row['license_number']} already exists")
+            else:
+                # Also catches duplicates within the chunk
+                taken_emails.add(row['email'])
+                taken_licenses.add(row['license_number'])
+                accepted.append(row)
+        if not accepted:
+            return
+
+        specialty_ids, specialties_created = _resolve_specialties(
+            {name for row in accepted for name in row['specialties']}
+        )
+        report.specialties_created += specialties_created
+
+        now = timezone.now()
+        users, attorneys, links, activities = [], [], [], []
+        deltas = Counter()
+        for row in accepted:
+            user = User(
+                id=uuid.uuid4(),
+                email=row['email'],
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                phone_number=row['phone_number'],
+                user_type='ATTORNEY',
+                verification_status=row['verification_status'],
+                password=make_password(row['password']),
+            )
+            attorney = Attorney(
+                id=uuid.uuid4(),
+                user_id=user.id,
+                license_number=row['license_number'],
+                license_status=row['license_status'],
+                years_of_experience=row['years_of_experience'],
+                bio=row['bio'],
+                education=row['education'],
+                office_address=row['office_address'],
+                latitude=row['latitude'],
+                longitude=row['longitude'],
+                # Attorney.save() is bypassed, so fill the spatial bucket here
+                geohash=(
+                    encode_geohash(row['latitude'], row['longitude'])
+                    if row['latitude'] is not None else None
+                ),
+                is_pro_bono=row['is_pro_bono'],
+            )
+            users.append(user)
+            attorneys.append(attorney)
+            links.extend(
+                Attorney.specialties.through(attorney_id=attorney.id, specialty_id=specialty_ids[name])
+                for name in row['specialties']
+            )
+            activities.append(UserActivity(
+                id=uuid.uuid4(),
+                user_id=user.id,
+                activity_type='USER_CREATED',
+                timestamp=now,
+                details={'user_type': 'ATTORNEY', 'source': 'bulk_import'},
+            ))
+            deltas.update(metrics_for(user))
+            deltas.update(metrics_for(attorney))
+
+        User.objects.bulk_create(users)
+        Attorney.objects.bulk_create(attorneys)
+        Attorney.specialties.through.objects.bulk_create(links)
+        write_activities(activities)
+        record_changes(deltas)
+        refresh_documents([attorney.id for attorney in attorneys])
+        report.created += len(attorneys)
+
+
+def import_attorneys(rows, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Import ``(line_number, row)`` pairs (see ``read_rows``) in chunks.
+
+    ``progress`` is called with the ``ImportReport`` after every chunk. Each
+    chunk commits on its own, so a failure keeps the chunks already written.
+    """
+    report = ImportReport()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return report
+        import_chunk(chunk, report)
+        if progress:
+            progress(report)
+
+
+def export_rows(queryset=None, chunk_size=2000):
+    """Yield one dict per attorney in ``EXPORT_FIELDS`` order, a chunk at a time."""
+    queryset = queryset if queryset is not None else Attorney.objects.all()
+    queryset = queryset.select_related('user').prefetch_related('specialties').order_by('pk')
+    for attorney in queryset.iterator(chunk_size=chunk_size):
+        user = attorney.user
+        yield {
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'phone_number': user.phone_number,
+            'verification_status': user.verification_status,
+            'license_number': attorney.license_number,
+            'license_status': attorney.license_status,
+            'years_of_experience': attorney.years_of_experience,
+            'bio': attorney.bio,
+            'education': attorney.education,
+            'office_address': attorney.office_address,
+            'latitude': attorney.latitude,
+            'longitude': attorney.longitude,
+            'is_pro_bono': attorney.is_pro_bono,
+            'specialties': sorted(specialty.name for specialty in attorney.specialties.all()),
+            'ratings_average': attorney.ratings_average,
+            'ratings_count': attorney.ratings_count,
+        }
@@ -0,0 +1,164 @@
+"""
+Geospatial helpers for attorney proximity search.
+
+Attorneys carry a geohash of their office coordinates. A "near" query first
+narrows the candidates to the handful of geohash cells covering the search
+bounding box (an indexed prefix lookup), then to the bounding box itself, and
+finally ranks the survivors by exact haversine distance.
+"""
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Precision stored on the attorney row (~4.8m x 4.8m cells)
+GEOHASH_PRECISION = 9
+
+# Upper bound on the number of prefix cells used to prefilter a query
+MAX_COVERING_CELLS = 16
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate pair as a geohash string."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude = float(latitude)
+    longitude = float(longitude)
+
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(geohash) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(geohash)
+
+
+def cell_size(precision):
+    """Return the (lat, lng) size in degrees of a geohash cell."""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Return (min_lat, min_lng, max_lat, max_lng) enclosing a search circle."""
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat < 1e-6:
+        lng_delta = 180.0
+    else:
+        lng_delta = min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+    return (
+        max(-90.0, latitude - lat_delta),
+        longitude - lng_delta,
+        min(90.0, latitude + lat_delta),
+        longitude + lng_delta,
+    )
+
+
+def covering_cells(min_lat, min_lng, max_lat, max_lng, max_cells=MAX_COVERING_CELLS):
+    """
+    Return the set of geohash prefixes covering a bounding box.
+
+    The finest precision that needs at most ``max_cells`` cells is used. Returns
+    None when the box crosses the antimeridian or is too large to be narrowed
+    down by a prefix lookup.
+    """
+    if min_lng < -180.0 or max_lng > 180.0:
+        return None
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_step, lng_step = cell_size(precision)
+        lat_start = math.floor((min_lat + 90.0) / lat_step)
+        lat_end = math.floor((max_lat + 90.0) / lat_step)
+        lng_start = math.floor((min_lng + 180.0) / lng_step)
+        lng_end = math.floor((max_lng + 180.0) / lng_step)
+        if (lat_end - lat_start + 1) * (lng_end - lng_start + 1) > max_cells:
+            continue
+
+        cells = set()
+        for lat_index in range(lat_start, lat_end + 1):
+            cell_lat = min(89.999999, -90.0 + (lat_index + 0.5) * lat_step)
+            for lng_index in range(lng_start, lng_end + 1):
+                cell_lng = min(179.999999, -180.0 + (lng_index + 0.5) * lng_step)
+                cells.add(encode_geohash(cell_lat, cell_lng, precision))
+        return cells
+    return None
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres between two coordinates."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_expression(latitude, longitude, lat_field='latitude', lng_field='longitude'):
+    """ORM expression computing the haversine distance (km) to a fixed point."""
+    origin_lat = math.radians(latitude)
+    origin_lng = math.radians(longitude)
+    row_lat = Radians(Cast(F(lat_field), FloatField()))
+    row_lng = Radians(Cast(F(lng_field), FloatField()))
+
+    a = (
+        Power(Sin((row_lat - Value(origin_lat)) / Value(2.0)), 2)
+        + Value(math.cos(origin_lat)) * Cos(row_lat)
+        * Power(Sin((row_lng - Value(origin_lng)) / Value(2.0)), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a), output_field=FloatField())
+
+
+def filter_nearby(queryset, latitude, longitude, radius_km):
+    """
+    Restrict a queryset of geocoded rows to those within ``radius_km``.
+
+    The result is annotated with ``distance_km`` but left unordered so callers
+    can decide whether distance ranking applies.
+    """
+    min_lat, min_lng, max_lat, max_lng = bounding_box(latitude, longitude, radius_km)
+
+    cells = covering_cells(min_lat, min_lng, max_lat, max_lng)
+    if cells:
+        prefix_filter = Q()
+        for cell in cells:
+            prefix_filter |= Q(geohash__startswith=cell)
+        queryset = queryset.filter(prefix_filter)
+
+    queryset = queryset.filter(latitude__gte=min_lat, latitude__lte=max_lat)
+    if min_lng >= -180.0 and max_lng <= 180.0:
+        queryset = queryset.filter(longitude__gte=min_lng, longitude__lte=max_lng)
+
+    return queryset.annotate(
+        distance_km=haversine_expression(latitude, longitude)
+    ).filter(distance_km__lte=radius_km)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from apps.attorneys.bulk import EXPORT_FIELDS, export_rows
+from apps.users.exports import EXPORT_FORMATS, stream_rows
+
+
+class Command(BaseCommand):
+    help = 'Streams every attorney to a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help='Output file (standard output by default)')
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', help='Output format')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Attorneys loaded per query')
+
+    def handle(self, *args, **options):
+        rows = export_rows(chunk_size=options['chunk_size'])
+        lines = stream_rows(rows, EXPORT_FIELDS, options['format'])
+        if options['path'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        count = -1 if options['format'] == 'csv' else 0
+        with open(options['path'], 'w', encoding='utf-8', newline='') as output:
+            for line in lines:
+                output.write(line)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} attorneys to {options['path']}"))
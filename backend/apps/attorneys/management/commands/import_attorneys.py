@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.attorneys.bulk import DEFAULT_CHUNK_SIZE, IMPORT_FORMATS, detect_format, import_attorneys, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Imports attorneys, their users and specialties from a CSV or JSON Lines file in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Input format (guessed from the file name by default)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows written per transaction')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or detect_format(options['path'])
+
+        def progress(report):
+            self.stdout.write(
+                f'{report.processed} rows read, {report.created} attorneys created, {report.skipped} skipped'
+            )
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                report = import_attorneys(
+                    read_rows(stream, file_format), chunk_size=options['chunk_size'], progress=progress
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in report.errors:
+            self.stdout.write(self.style.WARNING(f"Line {error['line']}: {error['error']}"))
+        if report.skipped > len(report.errors):
+            self.stdout.write(self.style.WARNING(f'... {report.skipped - len(report.errors)} more rows skipped'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} attorneys ({report.specialties_created} new specialties), '
+            f'skipped {report.skipped} rows'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.attorneys.search import refresh_documents
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search documents for all attorneys'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of documents written per upsert')
+
+    def handle(self, *args, **options):
+        written = refresh_documents(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} attorney search documents'))
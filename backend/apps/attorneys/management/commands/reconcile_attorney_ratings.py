@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from apps.attorneys.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recomputes attorney rating aggregates from reviews and fixes any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of attorneys updated per batch')
+
+    def handle(self, *args, **options):
+        fixed = reconcile_ratings(batch_size=options['batch_size'])
+        if fixed:
+            self.stdout.write(self.style.WARNING(f'Fixed rating aggregates for {fixed} attorneys'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Attorney rating aggregates are consistent'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:08
+
+from django.db import migrations, models
+
+from apps.attorneys.geo import encode_geohash
+
+
+def populate_geohash(apps, schema_editor):
+    Attorney = apps.get_model('attorneys', 'Attorney')
+    attorneys = Attorney.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for attorney in attorneys.iterator():
+        attorney.geohash = encode_geohash(attorney.latitude, attorney.longitude)
+        attorney.save(update_fields=['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attorneys', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attorney',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE attorney_search_documents
+    ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(document, ''))) STORED
+    """,
+    "CREATE INDEX attorney_search_vector_gin ON attorney_search_documents USING GIN (search_vector)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS attorney_search_vector_gin",
+    "ALTER TABLE attorney_search_documents DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE attorney_search_fts USING fts5(attorney_id UNINDEXED, document, tokenize='porter unicode61')",
+    """
+    CREATE TRIGGER attorney_search_fts_insert AFTER INSERT ON attorney_search_documents BEGIN
+        INSERT INTO attorney_search_fts (attorney_id, document) VALUES (new.attorney_id, new.document);
+    END
+    """,
+    """
+    CREATE TRIGGER attorney_search_fts_update AFTER UPDATE ON attorney_search_documents BEGIN
+        DELETE FROM attorney_search_fts WHERE attorney_id = old.attorney_id;
+        INSERT INTO attorney_search_fts (attorney_id, document) VALUES (new.attorney_id, new.document);
+    END
+    """,
+    """
+    CREATE TRIGGER attorney_search_fts_delete AFTER DELETE ON attorney_search_documents BEGIN
+        DELETE FROM attorney_search_fts WHERE attorney_id = old.attorney_id;
+    END
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS attorney_search_fts_insert",
+    "DROP TRIGGER IF EXISTS attorney_search_fts_update",
+    "DROP TRIGGER IF EXISTS attorney_search_fts_delete",
+    "DROP TABLE IF EXISTS attorney_search_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_full_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_FORWARD)
+
+
+def drop_full_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+def populate_documents(apps, schema_editor):
+    Attorney = apps.get_model('attorneys', 'Attorney')
+    AttorneySearchDocument = apps.get_model('attorneys', 'AttorneySearchDocument')
+
+    documents = []
+    for attorney in Attorney.objects.select_related('user').prefetch_related('specialties').iterator(chunk_size=500):
+        user = attorney.user
+        parts = [
+            user.first_name, user.last_name, user.email,
+            attorney.bio, attorney.education, attorney.office_address,
+        ]
+        parts.extend(specialty.name for specialty in attorney.specialties.all())
+        documents.append(AttorneySearchDocument(
+            attorney=attorney,
+            document='\n'.join(part for part in parts if part),
+        ))
+        if len(documents) >= 500:
+            AttorneySearchDocument.objects.bulk_create(documents)
+            documents = []
+    if documents:
+        AttorneySearchDocument.objects.bulk_create(documents)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attorneys', '0003_attorney_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttorneySearchDocument',
+            fields=[
+                ('attorney', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='attorneys.attorney')),
+                ('document', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'attorney search document',
+                'verbose_name_plural': 'attorney search documents',
+                'db_table': 'attorney_search_documents',
+            },
+        ),
+        migrations.RunPython(create_full_text_index, drop_full_text_index),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:14
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    Attorney = apps.get_model('attorneys', 'Attorney')
+    ClientAttorneyReview = apps.get_model('clients', 'ClientAttorneyReview')
+
+    rows = ClientAttorneyReview.objects.values('attorney_id').annotate(
+        total=Sum('rating'),
+        count=Count('id'),
+        **{f'stars_{rating}': Count('id', filter=Q(rating=rating)) for rating in range(1, 6)}
+    )
+    for row in rows.iterator():
+        updates = {
+            'ratings_sum': row['total'] or 0,
+            'ratings_count': row['count'],
+            'ratings_average': (Decimal(row['total'] or 0) / Decimal(row['count'])).quantize(
+                Decimal('0.01'), rounding=ROUND_HALF_UP
+            ),
+        }
+        for rating in range(1, 6):
+            updates[f'ratings_{rating}_count'] = row[f'stars_{rating}']
+        Attorney.objects.filter(pk=row['attorney_id']).update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attorneys', '0004_attorney_search_document'),
+        ('clients', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attorney',
+            name='ratings_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attorney',
+            name='ratings_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attorney',
+            name='ratings_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attorney',
+            name='ratings_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attorney',
+            name='ratings_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attorney',
+            name='ratings_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:26
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attorneys', '0005_attorney_rating_aggregates'),
+        ('clients', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('start_at', models.DateTimeField()),
+                ('end_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('CONFIRMED', 'Confirmed'), ('CANCELLED', 'Cancelled')], default='CONFIRMED', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('attorney', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='attorneys.attorney')),
+                ('legal_request', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='clients.legalrequest')),
+            ],
+            options={
+                'verbose_name': 'booking',
+                'verbose_name_plural': 'bookings',
+                'db_table': 'attorney_bookings',
+                'ordering': ['start_at'],
+                'indexes': [models.Index(fields=['attorney', 'start_at'], name='booking_attorney_start_idx'), models.Index(fields=['start_at', 'end_at'], name='booking_window_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attorneys', '0006_booking'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='availabilityslot',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['attorney', 'day_of_week', 'start_time'], name='availability_open_slot_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
 from django.conf import settings
+from decimal import Decimal, ROUND_HALF_UP
 import uuid
 
+from .geo import encode_geohash
+
 class Specialty(models.Model):
     """Attorney legal specialties."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -38,9 +41,17 @@ class Attorney(models.Model):
     office_address = models.TextField(blank=True, null=True)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, null=True, db_index=True, editable=False)
     is_pro_bono = models.BooleanField(default=False)
     ratings_average = models.DecimalField(max_digits=3, decimal_places=2, default=0.0)
     ratings_count = models.PositiveIntegerField(default=0)
+    # Running aggregates maintained by apps.attorneys.ratings
+    ratings_sum = models.PositiveIntegerField(default=0)
+    ratings_1_count = models.PositiveIntegerField(default=0)
+    ratings_2_count = models.PositiveIntegerField(default=0)
+    ratings_3_count = models.PositiveIntegerField(default=0)
+    ratings_4_count = models.PositiveIntegerField(default=0)
+    ratings_5_count = models.PositiveIntegerField(default=0)
     
     class Meta:
         verbose_name = 'attorney'
@@ -49,6 +60,29 @@ class Attorney(models.Model):
     
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name} ({self.license_number})"
+    
+    def save(self, *args, **kwargs):
+        # Keep the spatial bucket in sync with the coordinates
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = None
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
+    
+    @property
+    def ratings_histogram(self):
+        """Number of reviews per star rating."""
+        return {rating: getattr(self, f'ratings_{rating}_count') for rating in range(1, 6)}
+    
+    @staticmethod
+    def compute_ratings_average(ratings_sum, ratings_count):
+        if not ratings_count:
+            return Decimal('0.00')
+        return (Decimal(ratings_sum) / Decimal(ratings_count)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
 
 class AttorneyCredential(models.Model):
@@ -86,7 +120,64 @@ class AvailabilitySlot(models.Model):
         verbose_name_plural = 'availability slots'
         db_table = 'attorney_availability_slots'
         ordering = ['day_of_week', 'start_time']
+        # Availability is only ever computed from open slots
+        indexes = [
+            models.Index(
+                fields=['attorney', 'day_of_week', 'start_time'],
+                name='availability_open_slot_idx',
+                condition=models.Q(is_available=True),
+            ),
+        ]
     
     def __str__(self):
         days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        return f"{self.attorney.user.email} - {days[self.day_of_week]} {self.start_time} to {self.end_time}" 
\ No newline at end of file
+        return f"{self.attorney.user.email} - {days[self.day_of_week]} {self.start_time} to {self.end_time}" 
+
+class Booking(models.Model):
+    """An appointment that blocks part of an attorney's availability."""
+    STATUS_CHOICES = (
+        ('CONFIRMED', 'Confirmed'),
+        ('CANCELLED', 'Cancelled'),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    attorney = models.ForeignKey(Attorney, on_delete=models.CASCADE, related_name='bookings')
+    legal_request = models.ForeignKey('clients.LegalRequest', on_delete=models.SET_NULL, blank=True, null=True, related_name='bookings')
+    start_at = models.DateTimeField()
+    end_at = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='CONFIRMED')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'booking'
+        verbose_name_plural = 'bookings'
+        db_table = 'attorney_bookings'
+        ordering = ['start_at']
+        indexes = [
+            models.Index(fields=['attorney', 'start_at'], name='booking_attorney_start_idx'),
+            models.Index(fields=['start_at', 'end_at'], name='booking_window_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.attorney.user.email} - {self.start_at} to {self.end_at} ({self.status})"
+
+
+class AttorneySearchDocument(models.Model):
+    """
+    Denormalized full-text search document for an attorney.
+    
+    The document concatenates the attorney's name, email, bio, education, office
+    address and specialty names. It is indexed by a tsvector/GIN column on
+    PostgreSQL and an FTS5 table on SQLite (see migration 0004).
+    """
+    attorney = models.OneToOneField(Attorney, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    document = models.TextField(blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'attorney search document'
+        verbose_name_plural = 'attorney search documents'
+        db_table = 'attorney_search_documents'
+    
+    def __str__(self):
+        return f"Search document for {self.attorney_id}"
@@ -0,0 +1,117 @@
+"""
+Incrementally maintained attorney rating aggregates.
+
+Attorneys carry a running ``ratings_sum``/``ratings_count`` and one counter per
+star. Review writes adjust them with a single atomic ``UPDATE`` built from
+F-expressions, so posting a review costs O(1) regardless of how many reviews
+the attorney already has. ``reconcile_ratings`` recomputes everything in bulk
+to repair drift (e.g. after raw SQL or ``QuerySet.update`` on reviews).
+"""
+from django.db.models import Count, DecimalField, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+from .models import Attorney
+
+RATING_VALUES = (1, 2, 3, 4, 5)
+
+
+def histogram_field(rating):
+    """Name of the attorney column counting ``rating``-star reviews."""
+    return f'ratings_{rating}_count'
+
+
+def apply_rating_change(attorney_id, added=None, removed=None):
+    """
+    Atomically add and/or remove one rating from an attorney's aggregates.
+
+    Editing a review is ``added=new, removed=old``; deleting it is
+    ``removed=old``.
+    """
+    if added is None and removed is None:
+        return
+
+    count_delta = 0
+    sum_delta = 0
+    updates = {}
+
+    for rating, sign in ((added, 1), (removed, -1)):
+        if rating is None:
+            continue
+        count_delta += sign
+        sum_delta += sign * rating
+        if rating in RATING_VALUES:
+            field = histogram_field(rating)
+            updates[field] = updates.get(field, F(field)) + sign
+
+    new_sum = F('ratings_sum') + sum_delta
+    new_count = F('ratings_count') + count_delta
+    updates['ratings_sum'] = new_sum
+    updates['ratings_count'] = new_count
+    # Every SET clause sees the pre-update row, so derive the average from the
+    # deltas. Cast to float so SQLite doesn't truncate with integer division;
+    # Round casts back to numeric on PostgreSQL.
+    updates['ratings_average'] = Coalesce(
+        Round(Cast(new_sum, FloatField()) / NullIf(new_count, Value(0)), 2),
+        Value(0),
+        output_field=DecimalField(max_digits=3, decimal_places=2),
+    )
+    Attorney.objects.filter(pk=attorney_id).update(**updates)
+
+
+def reconcile_ratings(attorney_ids=None, batch_size=500):
+    """
+    Recompute rating aggregates from the reviews table and fix any drift.
+
+    Uses one grouped aggregate over reviews and batched ``bulk_update`` for the
+    attorneys whose stored values differ. Returns the number of attorneys fixed.
+    """
+    from apps.clients.models import ClientAttorneyReview
+
+    reviews = ClientAttorneyReview.objects.all()
+    attorneys = Attorney.objects.all()
+    if attorney_ids is not None:
+        reviews = reviews.filter(attorney_id__in=attorney_ids)
+        attorneys = attorneys.filter(pk__in=attorney_ids)
+
+    aggregates = {
+        row['attorney_id']: row
+        for row in reviews.values('attorney_id').annotate(
+            total=Sum('rating'),
+            count=Count('id'),
+            **{
+                histogram_field(rating): Count('id', filter=Q(rating=rating))
+                for rating in RATING_VALUES
+            },
+        )
+    }
+
+    fields = ['ratings_sum', 'ratings_count', 'ratings_average'] + [
+        histogram_field(rating) for rating in RATING_VALUES
+    ]
+    stale = []
+    fixed = 0
+    for attorney in attorneys.only('pk', *fields).iterator(chunk_size=batch_size):
+        row = aggregates.get(attorney.pk, {})
+        expected = {
+            'ratings_sum': row.get('total') or 0,
+            'ratings_count': row.get('count', 0),
+        }
+        for rating in RATING_VALUES:
+            expected[histogram_field(rating)] = row.get(histogram_field(rating), 0)
+        expected['ratings_average'] = attorney.compute_ratings_average(
+            expected['ratings_sum'], expected['ratings_count']
+        )
+
+        if any(getattr(attorney, field) != value for field, value in expected.items()):
+            for field, value in expected.items():
+                setattr(attorney, field, value)
+            stale.append(attorney)
+        if len(stale) >= batch_size:
+            Attorney.objects.bulk_update(stale, fields)
+            fixed += len(stale)
+            stale = []
+
+    if stale:
+        Attorney.objects.bulk_update(stale, fields)
+        fixed += len(stale)
+    return fixed
@@ -0,0 +1,158 @@
+"""
+Full-text search over precomputed attorney search documents.
+
+Each attorney has one ``AttorneySearchDocument`` row that is refreshed whenever
+the attorney, its user or its specialties change (see ``signals.py``). Queries
+are answered from a database-native full-text index:
+
+* PostgreSQL: a generated ``tsvector`` column with a GIN index, ranked by
+  ``ts_rank``.
+* SQLite: an FTS5 virtual table kept in sync by triggers, ranked by ``bm25``.
+
+Other backends fall back to DRF's ``icontains`` search.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .models import Attorney, AttorneySearchDocument
+
+DOCUMENT_TABLE = 'attorney_search_documents'
+FTS_TABLE = 'attorney_search_fts'
+TEXT_SEARCH_CONFIG = 'english'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_document(attorney):
+    """Build the search document text for an attorney."""
+    user = attorney.user
+    parts = [
+        user.first_name,
+        user.last_name,
+        user.email,
+        attorney.bio,
+        attorney.education,
+        attorney.office_address,
+    ]
+    parts.extend(specialty.name for specialty in attorney.specialties.all())
+    return '\n'.join(part for part in parts if part)
+
+
+def refresh_documents(attorney_ids=None, batch_size=500):
+    """
+    Recompute search documents for the given attorneys (all when None).
+
+    Documents are written with a single upsert per batch. Returns the number of
+    documents written.
+    """
+    queryset = Attorney.objects.select_related('user').prefetch_related('specialties').order_by('pk')
+    if attorney_ids is not None:
+        attorney_ids = list(attorney_ids)
+        if not attorney_ids:
+            return 0
+        queryset = queryset.filter(pk__in=attorney_ids)
+
+    written = 0
+    batch = []
+    for attorney in queryset.iterator(chunk_size=batch_size):
+        batch.append(AttorneySearchDocument(
+            attorney=attorney,
+            document=build_document(attorney),
+            updated_at=timezone.now(),
+        ))
+        if len(batch) >= batch_size:
+            written += _upsert(batch)
+            batch = []
+    if batch:
+        written += _upsert(batch)
+    return written
+
+
+def _upsert(documents):
+    AttorneySearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['attorney'],
+        update_fields=['document', 'updated_at'],
+    )
+    return len(documents)
+
+
+def _fts5_query(terms):
+    """Quote user terms for FTS5, prefix-matching the last one."""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_attorneys(queryset, query):
+    """
+    Filter an attorney queryset by a full-text query.
+
+    The result is annotated with ``search_rank`` (higher is better). Returns
+    None when the database has no full-text backend.
+    """
+    terms = _TOKEN_RE.findall(query.lower())
+    attorney_table = Attorney._meta.db_table
+    if not terms:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        text_query = ' '.join(terms)
+        matches = RawSQL(
+            f"SELECT attorney_id FROM {DOCUMENT_TABLE} "
+            f"WHERE search_vector @@ websearch_to_tsquery(%s, %s)",
+            (TEXT_SEARCH_CONFIG, text_query),
+        )
+        rank = RawSQL(
+            f"SELECT ts_rank(d.search_vector, websearch_to_tsquery(%s, %s)) "
+            f"FROM {DOCUMENT_TABLE} d WHERE d.attorney_id = {attorney_table}.id",
+            (TEXT_SEARCH_CONFIG, text_query),
+            output_field=FloatField(),
+        )
+    elif connection.vendor == 'sqlite':
+        match = _fts5_query(terms)
+        matches = RawSQL(
+            f"SELECT attorney_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            (match,),
+        )
+        # bm25() is lower-is-better, so negate it to get a descending rank
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND attorney_id = {attorney_table}.id",
+            (match,),
+            output_field=FloatField(),
+        )
+    else:
+        return None
+
+    return queryset.filter(pk__in=matches).annotate(search_rank=rank)
+
+
+class AttorneyDocumentSearchFilter(filters.SearchFilter):
+    """
+    Search filter backed by the attorney search document index.
+
+    Results are ranked by relevance unless an explicit ``ordering`` parameter
+    is given. Falls back to the view's ``search_fields`` when the database has
+    no full-text backend.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+
+        results = search_attorneys(queryset, query)
+        if results is None:
+            return super().filter_queryset(request, queryset, view)
+
+        if 'search_rank' in results.query.annotations and api_settings.ORDERING_PARAM not in request.query_params:
+            results = results.order_by('-search_rank')
+        return results
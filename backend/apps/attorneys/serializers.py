@@ -56,6 +56,7 @@ class AttorneyDetailSerializer(serializers.ModelSerializer):
     specialties = SpecialtySerializer(many=True, read_only=True)
     availability = serializers.SerializerMethodField()
     credentials = AttorneyCredentialSerializer(many=True, read_only=True)
+    ratings_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
     
     class Meta:
         model = Attorney
@@ -63,7 +64,7 @@ class AttorneyDetailSerializer(serializers.ModelSerializer):
             'id', 'user', 'license_number', 'license_status', 'specialties',
             'years_of_experience', 'bio', 'education', 'office_address',
             'latitude', 'longitude', 'is_pro_bono', 'ratings_average', 
-            'ratings_count', 'availability', 'credentials'
+            'ratings_count', 'ratings_histogram', 'availability', 'credentials'
         ]
         read_only_fields = ['id', 'user', 'license_status', 'ratings_average', 'ratings_count']
     
@@ -110,6 +111,7 @@ class AttorneySearchSerializer(serializers.ModelSerializer):
     user_last_name = serializers.CharField(source='user.last_name', read_only=True)
     user_email = serializers.CharField(source='user.email', read_only=True)
     specialties = SpecialtySerializer(many=True, read_only=True)
+    distance_km = serializers.SerializerMethodField()
     
     class Meta:
         model = Attorney
@@ -117,5 +119,10 @@ class AttorneySearchSerializer(serializers.ModelSerializer):
             'id', 'user_first_name', 'user_last_name', 'user_email',
             'license_number', 'license_status', 'specialties',
             'years_of_experience', 'office_address', 'latitude', 'longitude',
-            'is_pro_bono', 'ratings_average', 'ratings_count'
-        ] 
\ No newline at end of file
+            'is_pro_bono', 'ratings_average', 'ratings_count', 'distance_km'
+        ]
+    
+    def get_distance_km(self, obj):
+        # Only present on proximity searches (see apps.attorneys.geo.filter_nearby)
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 3) if distance is not None else None 
\ No newline at end of file
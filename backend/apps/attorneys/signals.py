@@ -0,0 +1,66 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+from .models import Attorney, Specialty, AvailabilitySlot
+from .availability import invalidate_availability_index
+from .search import refresh_documents
+
+User = get_user_model()
+
+# Fields that feed the attorney search document
+ATTORNEY_DOCUMENT_FIELDS = {'bio', 'education', 'office_address'}
+USER_DOCUMENT_FIELDS = {'first_name', 'last_name', 'email'}
+
+
+def _touches(update_fields, document_fields):
+    return update_fields is None or bool(document_fields & set(update_fields))
+
+
+@receiver(post_save, sender=Attorney)
+def refresh_attorney_document(sender, instance, created, update_fields=None, **kwargs):
+    """Refresh the search document when an attorney's searchable fields change."""
+    if created or _touches(update_fields, ATTORNEY_DOCUMENT_FIELDS):
+        refresh_documents([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def refresh_user_attorney_document(sender, instance, created, update_fields=None, **kwargs):
+    """Refresh the search document when an attorney's name or email changes."""
+    if created or instance.user_type != 'ATTORNEY':
+        return
+    if _touches(update_fields, USER_DOCUMENT_FIELDS):
+        refresh_documents(Attorney.objects.filter(user=instance).values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=Attorney.specialties.through)
+def refresh_specialty_documents(sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh search documents when attorney specialties are added or removed."""
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+
+    if not reverse:
+        if action != 'pre_clear':
+            refresh_documents([instance.pk])
+        return
+
+    # Specialty side: a clear needs the attorney ids captured before the rows go
+    if action == 'pre_clear':
+        instance._cleared_attorney_ids = list(instance.attorneys.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        refresh_documents(getattr(instance, '_cleared_attorney_ids', []))
+    else:
+        refresh_documents(pk_set or [])
+
+
+@receiver(post_save, sender=Specialty)
+def refresh_renamed_specialty_documents(sender, instance, created, update_fields=None, **kwargs):
+    """Refresh search documents of every attorney holding a renamed specialty."""
+    if not created and _touches(update_fields, {'name'}):
+        refresh_documents(instance.attorneys.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=AvailabilitySlot)
+@receiver(post_delete, sender=AvailabilitySlot)
+def invalidate_availability(sender, **kwargs):
+    """Rebuild the availability index after weekly windows change."""
+    invalidate_availability_index()
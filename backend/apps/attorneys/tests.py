@@ -3,10 +3,24 @@ from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from apps.users.models import User
-from .models import Attorney, Specialty, AttorneyCredential, AvailabilitySlot
+from .models import Attorney, Specialty, AttorneyCredential, AvailabilitySlot, AttorneySearchDocument, Booking
+from . import availability
+from .availability import IntervalTree, bookable_slots, find_available_attorneys, subtract_intervals
+from .geo import encode_geohash, bounding_box, covering_cells, haversine_km
+from .bulk import EXPORT_FIELDS, export_rows, import_attorneys, read_rows
+from apps.admin.metrics import live_totals, read_totals
+from apps.users.exports import stream_rows
+from apps.users.models import UserActivity
+from django.core.management import call_command
+import io
+import json
+import os
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+import random
 import uuid
 import datetime
+from decimal import Decimal
 
 
 class AttorneyModelTestCase(TestCase):
@@ -335,4 +349,370 @@ class AttorneyCredentialAPITestCase(APITestCase):
         # Refresh the credential from the database
         self.credential.refresh_from_db()
         self.assertEqual(self.credential.is_verified, False)
-        self.assertEqual(self.credential.verified_by, self.admin_user) 
\ No newline at end of file
+        self.assertEqual(self.credential.verified_by, self.admin_user) 
+
+class GeohashTestCase(TestCase):
+    """Test case for the geohash helpers used by proximity search."""
+    
+    def test_encode_geohash(self):
+        """Test geohash encoding against a known reference value."""
+        self.assertEqual(encode_geohash(57.64911, 10.40744), 'u4pruydqq')
+        self.assertEqual(encode_geohash(57.64911, 10.40744, precision=5), 'u4pru')
+    
+    def test_covering_cells_contain_points_in_box(self):
+        """Test that the covering cells include every point in the bounding box."""
+        box = bounding_box(42.3601, -71.0589, 10)
+        cells = covering_cells(*box)
+        self.assertTrue(cells)
+        for lat in (box[0], 42.3601, box[2]):
+            for lng in (box[1], -71.0589, box[3]):
+                geohash = encode_geohash(lat, lng)
+                self.assertTrue(any(geohash.startswith(cell) for cell in cells))
+    
+    def test_geohash_kept_in_sync_on_save(self):
+        """Test that saving an attorney recomputes its geohash."""
+        user = User.objects.create_user(
+            email='geo@example.com',
+            password='password123',
+            user_type='ATTORNEY'
+        )
+        attorney = user.attorney_details
+        self.assertIsNone(attorney.geohash)
+        
+        attorney.latitude = Decimal('42.360100')
+        attorney.longitude = Decimal('-71.058900')
+        attorney.save(update_fields=['latitude', 'longitude'])
+        attorney.refresh_from_db()
+        self.assertEqual(attorney.geohash, encode_geohash(42.3601, -71.0589))
+
+
+class AttorneyProximitySearchAPITestCase(APITestCase):
+    """Test case for the near=lat,lng search mode."""
+    
+    def setUp(self):
+        locations = {
+            'boston@example.com': ('42.360100', '-71.058900'),
+            'cambridge@example.com': ('42.373600', '-71.109700'),
+            'newyork@example.com': ('40.712800', '-74.006000'),
+        }
+        for email, (lat, lng) in locations.items():
+            user = User.objects.create_user(email=email, password='password123', user_type='ATTORNEY')
+            attorney = user.attorney_details
+            attorney.latitude = Decimal(lat)
+            attorney.longitude = Decimal(lng)
+            attorney.save()
+        
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(user=user)
+        self.search_url = reverse('attorneys:attorney-search')
+    
+    def test_search_near_orders_by_distance(self):
+        """Test that proximity search returns attorneys in range ordered by distance."""
+        response = self.api_client.get(self.search_url, {'near': '42.3601,-71.0589', 'radius_km': 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        emails = [row['user_email'] for row in response.data]
+        self.assertEqual(emails, ['boston@example.com', 'cambridge@example.com'])
+        self.assertAlmostEqual(response.data[0]['distance_km'], 0, places=2)
+        self.assertAlmostEqual(
+            response.data[1]['distance_km'],
+            haversine_km(42.3601, -71.0589, 42.3736, -71.1097),
+            places=2
+        )
+    
+    def test_search_near_large_radius(self):
+        """Test that a large radius falls back to the bounding box prefilter."""
+        response = self.api_client.get(self.search_url, {'near': '42.3601,-71.0589', 'radius_km': 500})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(response.data[-1]['user_email'], 'newyork@example.com')
+    
+    def test_search_near_invalid(self):
+        """Test that malformed coordinates are rejected."""
+        response = self.api_client.get(self.search_url, {'near': 'boston'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AttorneyFullTextSearchTestCase(APITestCase):
+    """Test case for the attorney search document index."""
+    
+    def setUp(self):
+        self.family = Specialty.objects.create(name='Family Law')
+        self.criminal = Specialty.objects.create(name='Criminal Defense')
+        
+        self.jane_user = User.objects.create_user(
+            email='jane@example.com',
+            password='password123',
+            first_name='Jane',
+            last_name='Smith',
+            user_type='ATTORNEY'
+        )
+        self.jane = self.jane_user.attorney_details
+        self.jane.bio = 'Divorce and custody disputes'
+        self.jane.save()
+        self.jane.specialties.add(self.family)
+        
+        self.john_user = User.objects.create_user(
+            email='john@example.com',
+            password='password123',
+            first_name='John',
+            last_name='Doe',
+            user_type='ATTORNEY'
+        )
+        self.john = self.john_user.attorney_details
+        self.john.bio = 'Felony trials and appeals'
+        self.john.save()
+        self.john.specialties.add(self.criminal)
+        
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(user=self.jane_user)
+        self.search_url = reverse('attorneys:attorney-search')
+    
+    def search(self, query):
+        response = self.api_client.get(self.search_url, {'search': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['user_email'] for row in response.data]
+    
+    def test_document_includes_specialties(self):
+        """Test that the search document includes user fields and specialty names."""
+        document = AttorneySearchDocument.objects.get(attorney=self.jane).document
+        self.assertIn('Jane', document)
+        self.assertIn('Divorce and custody disputes', document)
+        self.assertIn('Family Law', document)
+    
+    def test_search_matches_document(self):
+        """Test that search matches bio text, names and specialties."""
+        self.assertEqual(self.search('custody'), ['jane@example.com'])
+        self.assertEqual(self.search('criminal'), ['john@example.com'])
+        self.assertEqual(self.search('doe'), ['john@example.com'])
+    
+    def test_document_refreshed_on_change(self):
+        """Test that user, attorney and specialty changes refresh the document."""
+        self.john_user.last_name = 'Carter'
+        self.john_user.save()
+        self.assertEqual(self.search('carter'), ['john@example.com'])
+        
+        self.john.specialties.remove(self.criminal)
+        self.assertEqual(self.search('criminal'), [])
+        
+        self.family.name = 'Matrimonial Law'
+        self.family.save()
+        self.assertEqual(self.search('matrimonial'), ['jane@example.com'])
+    
+    def test_search_ranks_by_relevance(self):
+        """Test that more relevant documents are ranked first."""
+        self.john.bio = 'Custody appeals, custody hearings and custody mediation'
+        self.john.save()
+        self.assertEqual(self.search('custody'), ['john@example.com', 'jane@example.com'])
+
+
+class AvailabilityEngineTestCase(APITestCase):
+    """Test case for availability expansion and the attorney availability index."""
+    
+    def setUp(self):
+        # 2030-01-01 is a Tuesday
+        self.tuesday = datetime.date(2030, 1, 1)
+        self.attorneys = []
+        for index, (start, end) in enumerate([(9, 17), (13, 15), (14, 18)]):
+            user = User.objects.create_user(
+                email=f'attorney{index}@example.com', password='password123', user_type='ATTORNEY'
+            )
+            attorney = user.attorney_details
+            AvailabilitySlot.objects.create(
+                attorney=attorney,
+                day_of_week=1,
+                start_time=datetime.time(start),
+                end_time=datetime.time(end)
+            )
+            self.attorneys.append(attorney)
+        
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(user=user)
+    
+    def at(self, hour, day=None):
+        return timezone.make_aware(datetime.datetime.combine(day or self.tuesday, datetime.time(hour)))
+    
+    def test_interval_tree_matches_brute_force(self):
+        """Test that the interval tree returns exactly the covering intervals."""
+        rng = random.Random(7)
+        intervals = []
+        for key in range(300):
+            start = rng.randrange(0, 1400)
+            intervals.append((start, start + rng.randrange(1, 300), key))
+        tree = IntervalTree(intervals)
+        
+        for _ in range(200):
+            start = rng.randrange(0, 1400)
+            end = start + rng.randrange(1, 120)
+            expected = {key for s, e, key in intervals if s <= start and e >= end}
+            self.assertEqual(set(tree.containing(start, end)), expected)
+    
+    def test_subtract_intervals(self):
+        """Test removing busy intervals from availability windows."""
+        self.assertEqual(
+            subtract_intervals([(0, 10), (20, 30)], [(2, 4), (8, 22), (29, 40)]),
+            [(0, 2), (4, 8), (22, 29)]
+        )
+    
+    def test_bookable_slots_skip_bookings(self):
+        """Test that bookings are cut out of the expanded weekly windows."""
+        Booking.objects.create(attorney=self.attorneys[1], start_at=self.at(13), end_at=self.at(14))
+        Booking.objects.create(
+            attorney=self.attorneys[1], start_at=self.at(14), end_at=self.at(15), status='CANCELLED'
+        )
+        slots = bookable_slots(
+            self.attorneys[1].id, self.tuesday, self.tuesday + datetime.timedelta(days=7),
+            not_before=self.at(0)
+        )
+        next_tuesday = self.tuesday + datetime.timedelta(days=7)
+        self.assertEqual(slots, [
+            (self.at(14), self.at(15)),
+            (self.at(13, next_tuesday), self.at(14, next_tuesday)),
+            (self.at(14, next_tuesday), self.at(15, next_tuesday)),
+        ])
+    
+    def test_find_available_attorneys(self):
+        """Test the 'who is free Tuesday 2-4pm' query."""
+        self.assertEqual(
+            find_available_attorneys(self.at(14), self.at(16)),
+            {self.attorneys[0].id, self.attorneys[2].id}
+        )
+        Booking.objects.create(attorney=self.attorneys[0], start_at=self.at(15), end_at=self.at(16))
+        self.assertEqual(find_available_attorneys(self.at(14), self.at(16)), {self.attorneys[2].id})
+        wednesday = self.tuesday + datetime.timedelta(days=1)
+        self.assertEqual(find_available_attorneys(self.at(14, wednesday), self.at(15, wednesday)), set())
+        
+        # Changing a weekly window rebuilds the index
+        AvailabilitySlot.objects.filter(attorney=self.attorneys[1]).delete()
+        AvailabilitySlot.objects.create(
+            attorney=self.attorneys[1], day_of_week=1, start_time=datetime.time(12), end_time=datetime.time(16)
+        )
+        self.assertIn(self.attorneys[1].id, find_available_attorneys(self.at(14), self.at(16)))
+    
+    def test_index_expires_with_process_local_cache(self):
+        """Test that unannounced slot changes are picked up once a process-local index ages out."""
+        self.assertNotIn(self.attorneys[1].id, find_available_attorneys(self.at(14), self.at(16)))
+        # Written by another process, whose bump this process's LocMem cache never sees
+        AvailabilitySlot.objects.bulk_create([AvailabilitySlot(
+            attorney=self.attorneys[1], day_of_week=1, start_time=datetime.time(14), end_time=datetime.time(16)
+        )])
+        self.assertNotIn(self.attorneys[1].id, find_available_attorneys(self.at(14), self.at(16)))
+        availability._index_built_at -= availability.UNSHARED_INDEX_MAX_AGE
+        self.assertIn(self.attorneys[1].id, find_available_attorneys(self.at(14), self.at(16)))
+    
+    def test_available_filter_and_slots_api(self):
+        """Test the availability filter on the attorney list and the slots endpoint."""
+        response = self.api_client.get(reverse('attorneys:attorney-list'), {
+            'available_from': '2030-01-01T14:00:00', 'available_to': '2030-01-01T16:00:00'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual({row['id'] for row in rows}, {str(self.attorneys[0].id), str(self.attorneys[2].id)})
+        
+        response = self.api_client.get(reverse('attorneys:attorney-list'), {
+            'available_from': '2030-01-01T14:00:00', 'available_to': '2030-01-02T16:00:00'
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.api_client.get(
+            reverse('attorneys:attorney-availability', kwargs={'pk': self.attorneys[1].id}),
+            {'start_date': '2030-01-01', 'end_date': '2030-01-01', 'duration': 30}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['slots']), 4)
+        self.assertEqual(response.data['slots'][0]['start'], self.at(13))
+
+
+class AttorneyBulkImportTestCase(TestCase):
+    """Test case for the chunked attorney import and streaming export."""
+    
+    CSV = (
+        "email,first_name,last_name,license_number,license_status,years_of_experience,"
+        "latitude,longitude,is_pro_bono,specialties\n"
+        "ada@example.com,Ada,Lovelace,LIC-1,ACTIVE,12,40.7128,-74.0060,yes,Family Law;Immigration\n"
+        "bob@example.com,Bob,Stone,LIC-2,,3,,,no,Immigration\n"
+        "ada@example.com,Ada,Again,LIC-3,,,,,,\n"
+        "carl@example.com,Carl,Ray,LIC-4,,-2,,,,\n"
+        "dana@example.com,Dana,Lee,LIC-5,PENDING,1,51.5,,no,\n"
+    )
+    
+    def setUp(self):
+        Specialty.objects.create(name='Immigration')
+    
+    def import_csv(self, text, **kwargs):
+        return import_attorneys(read_rows(io.StringIO(text), 'csv'), **kwargs)
+    
+    def test_import_creates_profiles_without_signals(self):
+        """Test that imported users get exactly one attorney profile with the side effects applied."""
+        progress = []
+        report = self.import_csv(self.CSV, chunk_size=2, progress=lambda r: progress.append(r.processed))
+        
+        self.assertEqual(report.created, 2)
+        self.assertEqual(report.skipped, 3)
+        self.assertEqual(progress, [2, 4, 5])
+        self.assertEqual(sorted(error['line'] for error in report.errors), [4, 5, 6])
+        self.assertEqual(report.specialties_created, 1)
+        
+        ada = Attorney.objects.get(user__email='ada@example.com')
+        self.assertEqual(ada.license_number, 'LIC-1')
+        self.assertEqual(ada.user.user_type, 'ATTORNEY')
+        self.assertFalse(ada.user.has_usable_password())
+        self.assertEqual(ada.geohash, encode_geohash(Decimal('40.712800'), Decimal('-74.006000')))
+        self.assertTrue(ada.is_pro_bono)
+        self.assertEqual(sorted(ada.specialties.values_list('name', flat=True)), ['Family Law', 'Immigration'])
+        self.assertFalse(Attorney.objects.filter(license_number__startswith='TEMP-').exists())
+        
+        # Work the per-row signals would have done
+        self.assertEqual(AttorneySearchDocument.objects.count(), 2)
+        self.assertEqual(UserActivity.objects.filter(activity_type='USER_CREATED').count(), 2)
+        self.assertEqual(read_totals(), live_totals())
+    
+    def test_import_is_rerunnable(self):
+        """Test that rows already imported are skipped on a second run."""
+        self.import_csv(self.CSV)
+        report = self.import_csv(self.CSV)
+        self.assertEqual(report.created, 0)
+        self.assertEqual(Attorney.objects.count(), 2)
+    
+    def test_jsonl_import_reports_bad_lines(self):
+        """Test JSON Lines input with list specialties and a malformed line."""
+        text = '\n'.join([
+            json.dumps({'email': 'eve@example.com', 'license_number': 'LIC-9', 'specialties': ['Tax']}),
+            '{not json',
+            '',
+            json.dumps({'email': 'fay@example.com'}),
+        ])
+        report = import_attorneys(read_rows(io.StringIO(text), 'jsonl'))
+        self.assertEqual(report.created, 1)
+        self.assertEqual([error['line'] for error in report.errors], [2, 4])
+        self.assertTrue(Specialty.objects.filter(name='Tax').exists())
+    
+    def test_export_round_trip(self):
+        """Test that an export streams rows that import back unchanged."""
+        self.import_csv(self.CSV)
+        exported = ''.join(stream_rows(export_rows(chunk_size=1), EXPORT_FIELDS, 'csv'))
+        self.assertEqual(exported.count('\r\n'), 3)
+        
+        Attorney.objects.all().delete()
+        User.objects.all().delete()
+        report = self.import_csv(exported)
+        self.assertEqual(report.created, 2)
+        ada = Attorney.objects.get(license_number='LIC-1')
+        self.assertEqual(ada.years_of_experience, 12)
+        self.assertEqual(ada.specialties.count(), 2)
+    
+    def test_commands(self):
+        """Test the import and export management commands."""
+        path = self.id().replace('.', '_') + '.csv'
+        try:
+            with open(path, 'w') as handle:
+                handle.write(self.CSV)
+            out = io.StringIO()
+            call_command('import_attorneys', path, '--chunk-size', '2', stdout=out)
+        finally:
+            os.remove(path)
+        self.assertIn('Imported 2 attorneys', out.getvalue())
+        
+        out = io.StringIO()
+        call_command('export_attorneys', '--format', 'jsonl', stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(sorted(row['email'] for row in rows), ['ada@example.com', 'bob@example.com'])
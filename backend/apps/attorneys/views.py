@@ -1,9 +1,16 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from django.db.models import Q, Count, Avg
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import timedelta
 from .models import Attorney, Specialty, AttorneyCredential, AvailabilitySlot
+from .availability import bookable_slots, find_available_attorneys
+from .geo import filter_nearby
+from .search import AttorneyDocumentSearchFilter
 from .serializers import (
     AttorneySerializer,
     AttorneyDetailSerializer,
@@ -14,6 +21,7 @@ from .serializers import (
     AvailabilitySlotSerializer
 )
 from apps.users.permissions import IsAttorney, IsAttorneyOwner, IsAdmin, IsOwnerOrAdmin
+from apps.users.mixins import QueryPlan, QueryPlanMixin
 from apps.clients.models import ClientAttorneyReview
 from apps.clients.serializers import ClientAttorneyReviewSerializer
 
@@ -35,7 +43,16 @@ class SpecialtyViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ['name', 'description']
 
 
-class AttorneyViewSet(viewsets.ModelViewSet):
+# Relations walked by the nested UserSerializer
+USER_RELATIONS = ['user', 'user__client_profile', 'user__attorney_profile']
+
+ATTORNEY_DETAIL_PLAN = QueryPlan(
+    select_related=USER_RELATIONS,
+    prefetch_related=['specialties', 'availability_slots', 'credentials'],
+)
+
+
+class AttorneyViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     """
     API endpoint for attorney profile management.
     
@@ -57,13 +74,27 @@ class AttorneyViewSet(viewsets.ModelViewSet):
     queryset = Attorney.objects.all()
     serializer_class = AttorneySerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.OrderingFilter, AttorneyDocumentSearchFilter]
     search_fields = ['user__first_name', 'user__last_name', 'user__email', 'bio', 'education', 'office_address']
     ordering_fields = ['user__last_name', 'ratings_average', 'years_of_experience']
     ordering = ['user__last_name']
+    query_plans = {
+        'default': QueryPlan(select_related=USER_RELATIONS, prefetch_related=['specialties']),
+        'retrieve': ATTORNEY_DETAIL_PLAN,
+        'profile': ATTORNEY_DETAIL_PLAN,
+        'search': QueryPlan(
+            select_related=['user'],
+            prefetch_related=['specialties'],
+            only=[
+                'id', 'user', 'user__first_name', 'user__last_name', 'user__email',
+                'license_number', 'license_status', 'years_of_experience', 'office_address',
+                'latitude', 'longitude', 'is_pro_bono', 'ratings_average', 'ratings_count',
+            ],
+        ),
+    }
     
     def get_queryset(self):
-        queryset = Attorney.objects.all()
+        queryset = self.apply_query_plan(Attorney.objects.all())
         
         # Filter by active status
         active_only = self.request.query_params.get('active_only')
@@ -89,9 +120,64 @@ class AttorneyViewSet(viewsets.ModelViewSet):
         min_experience = self.request.query_params.get('min_experience')
         if min_experience:
             queryset = queryset.filter(years_of_experience__gte=int(min_experience))
+        
+        # Filter by distance from a point (near=lat,lng&radius_km=10)
+        near = self.get_near_params()
+        if near:
+            queryset = filter_nearby(queryset, *near)
+        
+        # Filter to attorneys free for a whole window (available_from=...&available_to=...)
+        window = self.get_available_window()
+        if window:
+            try:
+                available = find_available_attorneys(*window)
+            except ValueError as exc:
+                raise ValidationError({"available_to": str(exc)})
+            queryset = queryset.filter(pk__in=available)
             
         return queryset
     
+    def get_available_window(self):
+        """Parse the ``available_from`` and ``available_to`` query parameters."""
+        params = self.request.query_params
+        if 'available_from' not in params and 'available_to' not in params:
+            return None
+        
+        window = []
+        for name in ('available_from', 'available_to'):
+            try:
+                value = parse_datetime(params.get(name, ''))
+            except ValueError:
+                value = None
+            if value is None:
+                raise ValidationError({name: "Expected an ISO 8601 date and time."})
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            window.append(value)
+        return tuple(window)
+    
+    def get_near_params(self):
+        """Parse the ``near`` and ``radius_km`` query parameters."""
+        near = self.request.query_params.get('near')
+        if not near:
+            return None
+        
+        try:
+            latitude, longitude = (float(value) for value in near.split(','))
+        except ValueError:
+            raise ValidationError({"near": "Expected 'latitude,longitude'."})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({"near": "Coordinates are out of range."})
+        
+        try:
+            radius_km = float(self.request.query_params.get('radius_km', 10))
+        except ValueError:
+            raise ValidationError({"radius_km": "Expected a number of kilometres."})
+        if radius_km <= 0:
+            raise ValidationError({"radius_km": "Radius must be positive."})
+        
+        return latitude, longitude, radius_km
+    
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return AttorneyDetailSerializer
@@ -118,7 +204,7 @@ class AttorneyViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            attorney = Attorney.objects.get(user=request.user)
+            attorney = self.apply_query_plan(Attorney.objects.all()).get(user=request.user)
             serializer = AttorneyDetailSerializer(attorney)
             return Response(serializer.data)
         except Attorney.DoesNotExist:
@@ -131,14 +217,58 @@ class AttorneyViewSet(viewsets.ModelViewSet):
     def search(self, request):
         """Search for attorneys with various filters."""
         queryset = self.filter_queryset(self.get_queryset())
+        
+        # Rank proximity searches by distance unless an ordering was requested
+        if self.get_near_params() and 'ordering' not in request.query_params:
+            queryset = queryset.order_by('distance_km')
+        
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def availability(self, request, pk=None):
+        """
+        Get bookable time slots for an attorney.
+        
+        Expands the attorney's weekly availability between ``start_date`` and
+        ``end_date`` (YYYY-MM-DD, at most 31 days apart), removes confirmed
+        bookings and splits the rest into ``duration``-minute slots (default 60).
+        """
+        attorney = get_object_or_404(Attorney.objects.only('id'), pk=pk)
+        params = request.query_params
+        
+        today = timezone.localdate()
+        try:
+            start_date = parse_date(params['start_date']) if 'start_date' in params else today
+            end_date = parse_date(params['end_date']) if 'end_date' in params else start_date + timedelta(days=6)
+        except (TypeError, ValueError):
+            start_date = end_date = None
+        if start_date is None or end_date is None:
+            raise ValidationError({"detail": "Dates must be in YYYY-MM-DD format."})
+        if end_date < start_date or (end_date - start_date).days > 31:
+            raise ValidationError({"end_date": "Must be on or after start_date and at most 31 days later."})
+        
+        try:
+            duration = int(params.get('duration', 60))
+        except ValueError:
+            raise ValidationError({"duration": "Expected a number of minutes."})
+        if not 5 <= duration <= 24 * 60:
+            raise ValidationError({"duration": "Must be between 5 and 1440 minutes."})
+        
+        slots = bookable_slots(attorney.id, start_date, end_date, duration=timedelta(minutes=duration))
+        return Response({
+            'attorney_id': attorney.id,
+            'duration': duration,
+            'slots': [{'start': start, 'end': end} for start, end in slots],
+        })
+    
     @action(detail=True, methods=['get'])
     def reviews(self, request, pk=None):
         """Get reviews for a specific attorney."""
         attorney = self.get_object()
-        reviews = ClientAttorneyReview.objects.filter(attorney=attorney)
+        reviews = ClientAttorneyReview.objects.filter(attorney=attorney).select_related(
+            'client__user', 'attorney__user', 'legal_request__client__user'
+        )
         serializer = ClientAttorneyReviewSerializer(reviews, many=True)
         return Response(serializer.data)
 
@@ -0,0 +1,270 @@
+"""
+Cache of chatbot answers keyed on question fingerprints.
+
+Many questions are near-identical ("How do I file for divorce?", "how can I
+file for a divorce"). A question is analyzed like the resources are (see
+``apps.chatbot.text``: lowercased, stopwords removed, stemmed) except that
+negations are kept, since "have not paid" asks the opposite of "have paid".
+It is reduced to a 64-bit SimHash of its terms and of each pair of adjacent
+terms, so that word order counts too ("Can my employer fire me?" is not
+"Can I fire my employer?"). Questions with the same terms in the same order
+get the same fingerprint and similar ones get fingerprints a few bits
+apart, so a cached
+answer is served for any question within ``MAX_DISTANCE`` bits. Candidates
+are found by splitting fingerprints into ``MAX_DISTANCE + 1`` bands: two
+fingerprints that close agree on at least one whole band.
+
+Entries live in a per-process LRU of ``MAX_ENTRIES`` answers that expire
+after ``TTL`` seconds. Answers are derived from the legal resources, so the
+cache is emptied whenever they change: on commit of a save or delete in this
+process (see ``apps.chatbot.signals``), and in other processes when the
+resource index version shared through ``CHATBOT_RETRIEVAL['CACHE_ALIAS']``
+moves. Answers generated while the version moved are not stored. A
+process-local version cache (LocMem) never carries another process's bump,
+so with one entries expire after ``UNSHARED_TTL`` seconds instead.
+
+The cache keys on the question alone, so it is only used for generators
+that answer from the question and the retrieved resources and say so with
+``cacheable = True``, like ``StubGenerator`` (see ``apps.chatbot.generation``).
+
+Hits, misses and the generation time saved by hits are counted in the
+cache named by ``CACHE_ALIAS`` and reported by ``answer_cache_stats``. They
+cover every process only when that cache is shared; with a process-local one
+they are the answering process's own, which the stats say as ``shared``.
+
+Settings are read from ``CHATBOT_ANSWER_CACHE``.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from apps.users.authentication import cache_is_shared
+from .retrieval import VERSION_KEY, get_retrieval_settings
+from .text import analyze
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 1000,
+    'TTL': 3600,
+    'MAX_DISTANCE': 3,
+    'CACHE_ALIAS': 'default',
+    # TTL when resource changes in other processes cannot be seen (process-local version cache)
+    'UNSHARED_TTL': 60,
+}
+
+FINGERPRINT_BITS = 64
+
+STATS_KEY_PREFIX = 'chatbot:answer_cache:'
+STATS = ('hits', 'misses', 'saved_ms')
+
+
+def get_answer_cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'CHATBOT_ANSWER_CACHE', {})}
+
+
+def _term_hash(term):
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash(terms):
+    """64-bit SimHash of ``terms``, each weighted by its count."""
+    weights = [0] * FINGERPRINT_BITS
+    for term, count in Counter(terms).items():
+        term_hash = _term_hash(term)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if term_hash >> bit & 1 else -count
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def shingles(terms):
+    """``terms`` followed by each pair of adjacent terms."""
+    return terms + [f'{first} {second}' for first, second in zip(terms, terms[1:])]
+
+
+def fingerprint(question):
+    """SimHash of the analyzed ``question`` and its term pairs, or None when no terms are left."""
+    terms = analyze(question, keep_negations=True)
+    return simhash(shingles(terms)) if terms else None
+
+
+def distance(first, second):
+    return (first ^ second).bit_count()
+
+
+class AnswerEntry:
+    """A cached answer and how long it took to produce."""
+
+    __slots__ = ('fingerprint', 'answer', 'elapsed', 'expires_at')
+
+    def __init__(self, fingerprint, answer, elapsed, expires_at):
+        self.fingerprint = fingerprint
+        self.answer = answer
+        self.elapsed = elapsed
+        self.expires_at = expires_at
+
+
+class AnswerCache:
+    """LRU of answers with a TTL, looked up by fingerprint distance."""
+
+    def __init__(self, max_entries=1000, ttl=3600, max_distance=3, cache_alias='default', version_alias=None,
+                 unshared_ttl=60):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.band_count = max_distance + 1
+        self.band_bits = -(-FINGERPRINT_BITS // self.band_count)
+        self.stats = caches[cache_alias]
+        self.shared = caches[version_alias] if version_alias else None
+        if self.shared is None or not cache_is_shared(self.shared):
+            ttl = min(ttl, unshared_ttl)
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.bands = [{} for _ in range(self.band_count)]
+        self.version = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _band_keys(self, value):
+        mask = (1 << self.band_bits) - 1
+        return [value >> (band * self.band_bits) & mask for band in range(self.band_count)]
+
+    def _discard(self, value):
+        self.entries.pop(value, None)
+        for band, key in zip(self.bands, self._band_keys(value)):
+            candidates = band.get(key)
+            if candidates is not None:
+                candidates.discard(value)
+                if not candidates:
+                    del band[key]
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.bands = [{} for _ in range(self.band_count)]
+
+    def current_version(self):
+        """The shared resource version, emptying the cache when it moved since the last look."""
+        version = self.shared.get(VERSION_KEY) if self.shared is not None else None
+        if version != self.version:
+            self.clear()
+            self.version = version
+        return version
+
+    def _nearest(self, value):
+        if value in self.entries:
+            return self.entries[value]
+        best = None
+        for band, key in zip(self.bands, self._band_keys(value)):
+            for candidate in band.get(key, ()):
+                gap = distance(value, candidate)
+                if gap <= self.max_distance and (best is None or gap < best[0]):
+                    best = (gap, candidate)
+        return self.entries[best[1]] if best is not None else None
+
+    def get(self, value):
+        """The cached ``AnswerEntry`` nearest to the fingerprint ``value``, counting a hit or miss."""
+        self.current_version()
+        entry = None
+        if value is not None:
+            with self._lock:
+                entry = self._nearest(value)
+                if entry is not None and entry.expires_at <= time.monotonic():
+                    self._discard(entry.fingerprint)
+                    entry = None
+                if entry is not None:
+                    self.entries.move_to_end(entry.fingerprint)
+        if entry is None:
+            self._count('misses')
+        else:
+            self._count('hits')
+            self._count('saved_ms', round(entry.elapsed * 1000))
+        return entry
+
+    def set(self, value, answer, elapsed, version):
+        """
+        Cache ``answer`` under the fingerprint ``value``; ``version`` is the
+        ``current_version`` read before the answer was generated.
+        """
+        if value is None or self.current_version() != version:
+            return
+        with self._lock:
+            self._discard(value)
+            self.entries[value] = AnswerEntry(value, answer, elapsed, time.monotonic() + self.ttl)
+            for band, key in zip(self.bands, self._band_keys(value)):
+                band.setdefault(key, set()).add(value)
+            while len(self.entries) > self.max_entries:
+                self._discard(next(iter(self.entries)))
+
+    def _count(self, stat, amount=1):
+        key = STATS_KEY_PREFIX + stat
+        try:
+            self.stats.incr(key, amount)
+        except ValueError:
+            # First count, or the counter was evicted
+            if not self.stats.add(key, amount, None):
+                self.stats.incr(key, amount)
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """The process's ``AnswerCache``, or None when it is disabled."""
+    global _answer_cache
+    config = get_answer_cache_settings()
+    if not config['ENABLED']:
+        return None
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache(
+                    config['MAX_ENTRIES'], config['TTL'], config['MAX_DISTANCE'], config['CACHE_ALIAS'],
+                    get_retrieval_settings()['CACHE_ALIAS'], config['UNSHARED_TTL'],
+                )
+    return _answer_cache
+
+
+@receiver(setting_changed)
+def reset_answer_cache(setting, **kwargs):
+    global _answer_cache
+    if setting in ('CHATBOT_ANSWER_CACHE', 'CHATBOT_RETRIEVAL', 'CACHES'):
+        _answer_cache = None
+
+
+def clear_answer_cache():
+    if _answer_cache is not None:
+        _answer_cache.clear()
+
+
+def answer_cache_stats():
+    """
+    Hits, misses, hit rate and generation time saved, across processes when
+    ``shared``, and this process's entries.
+    """
+    config = get_answer_cache_settings()
+    stats_cache = caches[config['CACHE_ALIAS']]
+    counts = stats_cache.get_many([STATS_KEY_PREFIX + stat for stat in STATS])
+    stats = {stat: counts.get(STATS_KEY_PREFIX + stat, 0) for stat in STATS}
+    lookups = stats['hits'] + stats['misses']
+    return {
+        'enabled': config['ENABLED'],
+        'shared': cache_is_shared(stats_cache),
+        'hits': stats['hits'],
+        'misses': stats['misses'],
+        'hit_rate': round(stats['hits'] / lookups, 4) if lookups else None,
+        'saved_seconds': round(stats['saved_ms'] / 1000, 3),
+        'entries': len(_answer_cache) if _answer_cache is not None else 0,
+    }
+
+
+def reset_answer_cache_stats():
+    config = get_answer_cache_settings()
+    caches[config['CACHE_ALIAS']].delete_many([STATS_KEY_PREFIX + stat for stat in STATS])
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ChatbotConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.chatbot'
+    
+    def ready(self):
+        """Import signals when the app is ready."""
+        import apps.chatbot.signals
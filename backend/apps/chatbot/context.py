@@ -0,0 +1,204 @@
+"""
+Bounded conversation context for chat sessions.
+
+The context of a session is its most recent messages (at most
+``MAX_MESSAGES`` and ``TOKEN_BUDGET`` whitespace-separated tokens, the newest
+message always included) plus a compact summary of everything older. It is
+kept in the cache named by ``CACHE_ALIAS`` (Redis in production, an LRU
+``LocMemCache`` locally), so building it costs no query while the entry is
+warm and the cost of a turn does not grow with the length of the session:
+
+* ``record_turn`` writes the user's question and the bot's answer with one
+  ``bulk_create`` and appends them to the cached window;
+* messages pushed out of the window are folded into the summary, which is
+  saved on the session (``summary`` and ``summarized_until``) with one
+  ``UPDATE``;
+* on a cache miss the context is rebuilt from the session's summary and the
+  messages after ``summarized_until``, read through the
+  ``(session, timestamp)`` index.
+
+The summary is extractive: one line per earlier question, oldest lines
+dropped beyond ``SUMMARY_MAX_CHARS``. Messages written without
+``record_turn`` (e.g. by ``seed_data``) appear once the entry expires after
+``TIMEOUT`` seconds.
+
+The cache must be shared by every process serving chat sessions: a
+process-local one (LocMem, when ``REDIS_URL`` is unset) would hand out
+contexts missing the turns other processes recorded, and fold them into
+the saved summary. With one, contexts are not cached between requests and
+every turn rebuilds its context with one query.
+
+Settings are read from ``CHATBOT_CONTEXT``.
+"""
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from apps.users.authentication import cache_is_shared
+from .models import ChatMessage, ChatSession
+
+DEFAULTS = {
+    'MAX_MESSAGES': 10,
+    'TOKEN_BUDGET': 1500,
+    'SUMMARY_MAX_CHARS': 1000,
+    'EXCERPT_CHARS': 160,
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 3600,
+}
+
+CACHE_KEY_PREFIX = 'chatbot:session_context:'
+
+
+def get_context_settings():
+    return {**DEFAULTS, **getattr(settings, 'CHATBOT_CONTEXT', {})}
+
+
+def estimate_tokens(text):
+    return len(text.split())
+
+
+def excerpt(text, max_chars):
+    """``text`` on one line, cut at a word boundary to ``max_chars``."""
+    text = ' '.join(text.split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(' ', 1)[0] + '...'
+
+
+def summarize(summary, messages, max_chars=1000, excerpt_chars=160):
+    """``summary`` extended with the questions among ``messages``, oldest lines dropped past ``max_chars``."""
+    lines = summary.splitlines() if summary else []
+    lines += [f"Q: {excerpt(message['content'], excerpt_chars)}" for message in messages
+              if message['message_type'] == 'USER']
+    while lines and sum(len(line) + 1 for line in lines) - 1 > max_chars:
+        lines.pop(0)
+    return '\n'.join(lines)
+
+
+def message_entry(message):
+    return {
+        'id': message.id,
+        'message_type': message.message_type,
+        'content': message.content,
+        'timestamp': message.timestamp,
+    }
+
+
+class SessionContext:
+    """The summary of a session's older messages and its recent ``messages``, oldest first."""
+
+    def __init__(self, summary='', summarized_until=None, messages=None):
+        self.summary = summary
+        self.summarized_until = summarized_until
+        self.messages = messages or []
+
+    def tokens(self):
+        return sum(estimate_tokens(message['content']) for message in self.messages)
+
+
+class SessionContextStore:
+    """Cached ``SessionContext`` per chat session."""
+
+    def __init__(self, max_messages, token_budget, summary_max_chars, excerpt_chars, cache_alias, timeout):
+        self.max_messages = max_messages
+        self.token_budget = token_budget
+        self.summary_max_chars = summary_max_chars
+        self.excerpt_chars = excerpt_chars
+        self.cache = caches[cache_alias]
+        self.shared = cache_is_shared(self.cache)
+        self.timeout = timeout
+
+    @staticmethod
+    def key(session_id):
+        return f'{CACHE_KEY_PREFIX}{session_id}'
+
+    def _overflow(self, messages):
+        """How many of the oldest ``messages`` fall outside the window."""
+        kept, tokens = 0, 0
+        for message in reversed(messages):
+            tokens += estimate_tokens(message['content'])
+            if kept and (kept >= self.max_messages or tokens > self.token_budget):
+                break
+            kept += 1
+        return len(messages) - kept
+
+    def _fold(self, session, context):
+        """Fold the messages outside the window into the summary and save it on ``session``."""
+        overflow = self._overflow(context.messages)
+        if not overflow:
+            return
+        folded, context.messages = context.messages[:overflow], context.messages[overflow:]
+        context.summary = summarize(context.summary, folded, self.summary_max_chars, self.excerpt_chars)
+        context.summarized_until = folded[-1]['timestamp']
+        ChatSession.objects.filter(pk=session.pk).update(
+            summary=context.summary, summarized_until=context.summarized_until
+        )
+        session.summary = context.summary
+        session.summarized_until = context.summarized_until
+
+    def load(self, session):
+        """Rebuild the context of ``session`` from the database and cache it."""
+        messages = session.messages.order_by('timestamp', 'id')
+        if session.summarized_until is not None:
+            messages = messages.filter(timestamp__gt=session.summarized_until)
+        context = SessionContext(
+            session.summary, session.summarized_until, [message_entry(message) for message in messages]
+        )
+        # Only sessions older than the context cache have more than a window to fold here
+        self._fold(session, context)
+        self._save(session, context)
+        return context
+
+    def _save(self, session, context):
+        if self.shared:
+            self.cache.set(self.key(session.pk), context, self.timeout)
+
+    def get(self, session):
+        context = self.cache.get(self.key(session.pk)) if self.shared else None
+        return context if context is not None else self.load(session)
+
+    def record_turn(self, session, question, answer=None, context=None):
+        """
+        Save a turn of ``session``, the ``question`` and, unless generation
+        failed, the ``answer``, and add it to the context, the one ``get``
+        returned earlier in the request if given. Returns the saved messages.
+        """
+        context = context if context is not None else self.get(session)
+        messages = [ChatMessage(session=session, message_type='USER', content=question)]
+        if answer is not None:
+            messages.append(ChatMessage(session=session, message_type='BOT', content=answer))
+        ChatMessage.objects.bulk_create(messages)
+        context.messages.extend(message_entry(message) for message in messages)
+        self._fold(session, context)
+        self._save(session, context)
+        return messages
+
+    def invalidate(self, session_id):
+        self.cache.delete(self.key(session_id))
+
+
+_context_store = None
+_context_store_lock = threading.Lock()
+
+
+def get_context_store():
+    global _context_store
+    if _context_store is None:
+        with _context_store_lock:
+            if _context_store is None:
+                config = get_context_settings()
+                _context_store = SessionContextStore(
+                    config['MAX_MESSAGES'], config['TOKEN_BUDGET'], config['SUMMARY_MAX_CHARS'],
+                    config['EXCERPT_CHARS'], config['CACHE_ALIAS'], config['TIMEOUT'],
+                )
+    return _context_store
+
+
+@receiver(setting_changed)
+def reset_context_store(setting, **kwargs):
+    global _context_store
+    if setting in ('CHATBOT_CONTEXT', 'CACHES'):
+        _context_store = None
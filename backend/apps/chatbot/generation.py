@@ -0,0 +1,114 @@
+"""
+Answer generators for the streaming chatbot endpoint.
+
+A generator turns a question, the context of its session (see
+``apps.chatbot.context``) and the legal resources retrieved for it into an
+asynchronous stream of text tokens; the tokens joined together are the
+answer. The generator in use is ``CHATBOT_GENERATOR['BACKEND']``, a dotted
+path to a class instantiated with ``CHATBOT_GENERATOR['OPTIONS']`` as keyword
+arguments, so a model-backed generator can replace ``StubGenerator`` without
+touching the view.
+
+``StubGenerator`` needs no model or network access. It answers from the
+titles and opening sentences of the retrieved resources and can pause
+between tokens to imitate a model's pace, which makes the streaming path
+load-testable offline.
+
+Answers are cached by question (see ``apps.chatbot.answers``) only for
+generators with ``cacheable = True``: those whose answer does not depend on
+the session's context.
+"""
+import asyncio
+import re
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+DEFAULTS = {
+    'BACKEND': 'apps.chatbot.generation.StubGenerator',
+    'OPTIONS': {},
+}
+
+# Words and the whitespace that follows them, so the tokens join back into the text
+TOKEN_PATTERN = re.compile(r'\S+\s*')
+SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+
+
+def get_generator_settings():
+    return {**DEFAULTS, **getattr(settings, 'CHATBOT_GENERATOR', {})}
+
+
+class BaseGenerator:
+    """Interface of answer generators."""
+
+    # Whether answers depend only on the question and resources, so they may be shared between sessions
+    cacheable = False
+
+    async def stream(self, question, context, resources):
+        """
+        Yield the tokens of the answer to ``question``.
+
+        ``context`` is the session's ``SessionContext``: a summary of older
+        turns and the recent messages, oldest first. ``resources`` are the
+        retrieved ``LegalResource`` objects, best first.
+        """
+        raise NotImplementedError
+        yield
+
+
+class StubGenerator(BaseGenerator):
+    """Canned answers built from the retrieved resources, for development and load tests."""
+
+    cacheable = True
+
+    def __init__(self, token_delay=0.0, excerpt_sentences=1, max_resources=3):
+        self.token_delay = token_delay
+        self.excerpt_sentences = excerpt_sentences
+        self.max_resources = max_resources
+
+    def excerpt(self, content):
+        sentences = SENTENCE_END.split(content.strip())
+        return ' '.join(sentences[:self.excerpt_sentences])
+
+    def answer(self, question, resources):
+        resources = resources[:self.max_resources]
+        if not resources:
+            return (
+                "I could not find any legal resources about that. "
+                "Please rephrase your question or ask an attorney for advice."
+            )
+        parts = ["Here is some general legal information that may help."]
+        for resource in resources:
+            parts.append(f"{resource.title}: {self.excerpt(resource.content)}")
+        parts.append("This is not legal advice; an attorney can advise on your situation.")
+        return '\n\n'.join(parts)
+
+    async def stream(self, question, context, resources):
+        for token in TOKEN_PATTERN.findall(self.answer(question, resources)):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_generator():
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                config = get_generator_settings()
+                _generator = import_string(config['BACKEND'])(**config['OPTIONS'])
+    return _generator
+
+
+@receiver(setting_changed)
+def reset_generator(setting, **kwargs):
+    global _generator
+    if setting == 'CHATBOT_GENERATOR':
+        _generator = None
@@ -8,6 +8,9 @@ class ChatSession(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chat_sessions')
     started_at = models.DateTimeField(auto_now_add=True)
     ended_at = models.DateTimeField(blank=True, null=True)
+    # Compact record of the messages up to summarized_until, see apps.chatbot.context
+    summary = models.TextField(blank=True, default='')
+    summarized_until = models.DateTimeField(blank=True, null=True)
     
     class Meta:
         verbose_name = 'chat session'
@@ -37,6 +40,9 @@ class ChatMessage(models.Model):
         verbose_name_plural = 'chat messages'
         db_table = 'chat_messages'
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['session', 'timestamp'], name='chat_message_session_ts_idx'),
+        ]
     
     def __str__(self):
         return f"{self.session.user.email} - {self.message_type} - {self.timestamp}"
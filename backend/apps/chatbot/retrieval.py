@@ -0,0 +1,295 @@
+"""
+BM25 keyword retrieval over ``LegalResource``.
+
+Each process holds an in-memory inverted index (term -> {resource id: term
+frequency}) built from the resources' title, tags and content, analyzed by
+``apps.chatbot.text``. Title and tag terms are counted ``TITLE_WEIGHT`` and
+``TAG_WEIGHT`` times so that they outrank a passing mention in the body.
+A query scores only the postings of its own terms, so top-k retrieval costs
+the length of those postings lists rather than the number of resources.
+
+The index is built from the database on first use and then kept current
+incrementally:
+
+* saving or deleting a resource updates the index of the process that made
+  the change once the transaction commits (see ``apps.chatbot.signals``),
+  and bumps a version number in the shared cache;
+* before answering, other processes compare that version with their own and,
+  when it moved, re-index the resources updated since their last sync and
+  drop the ones that no longer exist.
+
+A process-local cache (LocMem) never carries another process's bump, so with
+one as ``CACHE_ALIAS``, or none at all, the index also catches up once its
+last sync is ``UNSHARED_MAX_AGE`` seconds old.
+
+``updated_at`` is set before the transaction commits, so a resource can
+become visible after others saved later. Each sync therefore re-reads
+``SYNC_OVERLAP`` seconds behind the newest ``updated_at`` read from the
+database.
+
+Settings are read from ``CHATBOT_RETRIEVAL``.
+"""
+import heapq
+import math
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from apps.users.authentication import cache_is_shared
+from .models import LegalResource
+from .text import analyze
+
+DEFAULTS = {
+    'K1': 1.5,
+    'B': 0.75,
+    'TITLE_WEIGHT': 3,
+    'TAG_WEIGHT': 2,
+    'CACHE_ALIAS': 'default',
+    'DEFAULT_LIMIT': 10,
+    'MAX_LIMIT': 50,
+    # Longest transaction, in seconds, whose resource changes a sync still picks up
+    'SYNC_OVERLAP': 60,
+    # How stale other processes' changes may be when CACHE_ALIAS is process-local
+    'UNSHARED_MAX_AGE': 60,
+}
+
+VERSION_KEY = 'chatbot:resource_index_version'
+
+# Columns needed to index a resource
+INDEX_FIELDS = ('id', 'title', 'content', 'tags', 'resource_type', 'updated_at')
+
+
+def get_retrieval_settings():
+    return {**DEFAULTS, **getattr(settings, 'CHATBOT_RETRIEVAL', {})}
+
+
+def shared_resource_version():
+    """The resource version shared between processes, or None without a shared cache."""
+    alias = get_retrieval_settings()['CACHE_ALIAS']
+    return caches[alias].get(VERSION_KEY) if alias else None
+
+
+def resource_version_is_shared():
+    """Whether other processes see the resource version bumps of this one."""
+    alias = get_retrieval_settings()['CACHE_ALIAS']
+    return bool(alias) and cache_is_shared(caches[alias])
+
+
+def resource_terms(title, content, tags, title_weight=1, tag_weight=1):
+    """Analyzed terms of a resource, with title and tag terms repeated by their weight."""
+    tags = tags if isinstance(tags, (list, tuple)) else []
+    terms = analyze(title) * title_weight
+    terms += analyze(' '.join(str(tag) for tag in tags)) * tag_weight
+    terms += analyze(content)
+    return terms
+
+
+class InvertedIndex:
+    """BM25-scored inverted index of documents keyed by id."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_terms = {}
+        self.lengths = {}
+        self.kinds = {}
+        self.total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.lengths
+
+    def add(self, doc_id, terms, kind=None):
+        """Index ``terms`` under ``doc_id``, replacing its previous terms."""
+        counts = Counter(terms)
+        with self._lock:
+            self.remove(doc_id)
+            for term, frequency in counts.items():
+                self.postings.setdefault(term, {})[doc_id] = frequency
+            self.doc_terms[doc_id] = tuple(counts)
+            self.lengths[doc_id] = len(terms)
+            self.kinds[doc_id] = kind
+            self.total_length += len(terms)
+
+    def remove(self, doc_id):
+        with self._lock:
+            length = self.lengths.pop(doc_id, None)
+            if length is None:
+                return False
+            self.kinds.pop(doc_id, None)
+            self.total_length -= length
+            for term in self.doc_terms.pop(doc_id):
+                docs = self.postings[term]
+                del docs[doc_id]
+                if not docs:
+                    del self.postings[term]
+            return True
+
+    def idf(self, term):
+        frequency = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.lengths) - frequency + 0.5) / (frequency + 0.5))
+
+    def search(self, terms, limit=10, kind=None):
+        """The ``limit`` best ``(doc_id, score)`` pairs for ``terms``, best first."""
+        with self._lock:
+            if not self.lengths:
+                return []
+            average_length = self.total_length / len(self.lengths) or 1
+            scores = {}
+            for term in set(terms):
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = self.idf(term)
+                for doc_id, frequency in docs.items():
+                    if kind is not None and self.kinds[doc_id] != kind:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], str(item[0])))
+
+
+class ResourceIndex:
+    """``InvertedIndex`` over ``LegalResource`` kept in sync with the database."""
+
+    def __init__(self, k1, b, title_weight, tag_weight, cache_alias, sync_overlap=60, unshared_max_age=60):
+        self.index = InvertedIndex(k1, b)
+        self.title_weight = title_weight
+        self.tag_weight = tag_weight
+        self.shared = caches[cache_alias] if cache_alias else None
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        self.max_age = None if self.shared is not None and cache_is_shared(self.shared) else unshared_max_age
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._version = None
+        self._synced_at = None
+        self._checked_at = None
+
+    def _index_row(self, row):
+        terms = resource_terms(row['title'], row['content'], row['tags'], self.title_weight, self.tag_weight)
+        self.index.add(row['id'], terms, row['resource_type'])
+
+    def _index_rows(self, rows):
+        """Index ``rows`` read from the database and advance the high water mark past them."""
+        for row in rows:
+            self._index_row(row)
+            if self._synced_at is None or row['updated_at'] > self._synced_at:
+                self._synced_at = row['updated_at']
+
+    def _shared_version(self):
+        return self.shared.get(VERSION_KEY) if self.shared is not None else None
+
+    def _bump_version(self):
+        if self.shared is None:
+            return
+        try:
+            version = self.shared.incr(VERSION_KEY)
+        except ValueError:
+            version = 1
+            self.shared.set(VERSION_KEY, version, None)
+        # Nobody else changed anything in between, so there is nothing to catch up on
+        if self._loaded and version == (self._version or 0) + 1:
+            self._version = version
+
+    def build(self):
+        """Index every resource from scratch."""
+        with self._lock:
+            self._version = self._shared_version()
+            self.index = InvertedIndex(self.index.k1, self.index.b)
+            self._synced_at = None
+            self._checked_at = time.monotonic()
+            self._index_rows(LegalResource.objects.values(*INDEX_FIELDS).iterator(chunk_size=2000))
+            self._loaded = True
+
+    def sync(self):
+        """Catch up with changes other processes made since the last build or sync."""
+        if not self._loaded:
+            self.build()
+            return
+        version = self._shared_version()
+        expired = self.max_age is not None and time.monotonic() - self._checked_at >= self.max_age
+        if version == self._version and not expired:
+            return
+        with self._lock:
+            self._version = version
+            self._checked_at = time.monotonic()
+            changed = LegalResource.objects.values(*INDEX_FIELDS)
+            if self._synced_at is not None:
+                # Overlap, so rows committed after later saves are not missed
+                changed = changed.filter(updated_at__gte=self._synced_at - self.sync_overlap)
+            self._index_rows(changed)
+            existing = set(LegalResource.objects.values_list('id', flat=True))
+            for doc_id in [doc_id for doc_id in self.index.lengths if doc_id not in existing]:
+                self.index.remove(doc_id)
+
+    def updated(self, resource):
+        """
+        Re-index a saved resource here and tell other processes. The high
+        water mark is left alone: it tracks rows read from the database only.
+        """
+        with self._lock:
+            if self._loaded:
+                self._index_row({field: getattr(resource, field) for field in INDEX_FIELDS})
+            self._bump_version()
+
+    def deleted(self, resource_id):
+        """Drop a deleted resource here and tell other processes."""
+        with self._lock:
+            if self._loaded:
+                self.index.remove(resource_id)
+            self._bump_version()
+
+    def search(self, query, limit=10, resource_type=None):
+        """The ``limit`` best ``(resource id, score)`` pairs for the text ``query``."""
+        self.sync()
+        return self.index.search(analyze(query), limit, resource_type)
+
+
+_resource_index = None
+_resource_index_lock = threading.Lock()
+
+
+def get_resource_index():
+    global _resource_index
+    if _resource_index is None:
+        with _resource_index_lock:
+            if _resource_index is None:
+                config = get_retrieval_settings()
+                _resource_index = ResourceIndex(
+                    config['K1'], config['B'], config['TITLE_WEIGHT'], config['TAG_WEIGHT'], config['CACHE_ALIAS'],
+                    config['SYNC_OVERLAP'], config['UNSHARED_MAX_AGE'],
+                )
+    return _resource_index
+
+
+@receiver(setting_changed)
+def reset_resource_index(setting, **kwargs):
+    global _resource_index
+    if setting in ('CHATBOT_RETRIEVAL', 'CACHES'):
+        _resource_index = None
+
+
+def search_resources(query, limit=10, resource_type=None):
+    """
+    The best matching resources for ``query``, best first, each with a
+    ``score`` attribute. Costs one query once the index is loaded.
+    """
+    ranked = get_resource_index().search(query, limit, resource_type)
+    resources = LegalResource.objects.in_bulk([resource_id for resource_id, _ in ranked])
+    results = []
+    for resource_id, score in ranked:
+        resource = resources.get(resource_id)
+        if resource is not None:
+            resource.score = score
+            results.append(resource)
+    return results
@@ -0,0 +1,32 @@
+from rest_framework import serializers
+from .models import ChatMessage, ChatSession, LegalResource
+
+
+class LegalResourceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LegalResource
+        fields = ['id', 'title', 'content', 'resource_type', 'tags', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class LegalResourceMatchSerializer(LegalResourceSerializer):
+    """A retrieved resource with its relevance score (BM25 or cosine similarity)."""
+    score = serializers.FloatField(read_only=True)
+    
+    class Meta(LegalResourceSerializer.Meta):
+        fields = LegalResourceSerializer.Meta.fields + ['score']
+        read_only_fields = fields
+
+
+class ChatSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChatSession
+        fields = ['id', 'started_at', 'ended_at']
+        read_only_fields = fields
+
+
+class ChatMessageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChatMessage
+        fields = ['id', 'session', 'message_type', 'content', 'timestamp']
+        read_only_fields = fields
@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import LegalResource
+from .answers import clear_answer_cache
+from .retrieval import get_resource_index
+from .tasks import update_resource_vectors
+
+
+@receiver(post_save, sender=LegalResource)
+def index_legal_resource(sender, instance, **kwargs):
+    """Signal to re-index and re-embed a legal resource and drop cached answers once its transaction commits."""
+    transaction.on_commit(lambda: get_resource_index().updated(instance))
+    transaction.on_commit(clear_answer_cache)
+    transaction.on_commit(update_resource_vectors.delay)
+
+
+@receiver(post_delete, sender=LegalResource)
+def unindex_legal_resource(sender, instance, **kwargs):
+    """Signal to drop a deleted legal resource from the retrieval index, vectors and cached answers."""
+    resource_id = instance.pk
+    transaction.on_commit(lambda: get_resource_index().deleted(resource_id))
+    transaction.on_commit(clear_answer_cache)
+    transaction.on_commit(update_resource_vectors.delay)
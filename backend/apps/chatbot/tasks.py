@@ -0,0 +1,9 @@
+from celery import shared_task
+from .vectors import sync_resource_vectors
+
+
+@shared_task
+def update_resource_vectors():
+    """Embed new and changed legal resources and retire deleted ones."""
+    written, retired = sync_resource_vectors()
+    return {'written': written, 'retired': retired}
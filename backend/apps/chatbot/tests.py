@@ -0,0 +1,587 @@
+import asyncio
+import json
+import tempfile
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from apps.users.authentication import ClaimsRefreshToken
+from apps.users.models import User
+from .answers import (
+    AnswerCache, answer_cache_stats, clear_answer_cache, distance, fingerprint, reset_answer_cache_stats,
+)
+from .context import SessionContextStore, summarize
+from .generation import BaseGenerator
+from .models import ChatMessage, ChatSession, LegalResource
+from .retrieval import VERSION_KEY, InvertedIndex, get_resource_index
+from .text import analyze
+from . import vectors
+from .vectors import VectorStore, get_vector_settings, get_vector_store, sync_resource_vectors
+
+
+class TextAnalysisTestCase(TestCase):
+    """Test case for question and resource normalization."""
+    
+    def test_analyze_strips_stopwords_and_stems(self):
+        self.assertEqual(analyze('How do I file for divorce?'), ['file', 'divorc'])
+        self.assertEqual(analyze('Divorcing'), analyze('divorced'))
+
+
+class InvertedIndexTestCase(TestCase):
+    """Test case for BM25 scoring in the inverted index."""
+    
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.add('a', analyze('divorce divorce custody'), 'FAQ')
+        self.index.add('b', analyze('divorce tenant lease lease lease'), 'LAW')
+        self.index.add('c', analyze('tenant rights'), 'FAQ')
+    
+    def test_ranking(self):
+        """Test that denser and rarer matches rank higher."""
+        ranked = [doc_id for doc_id, _ in self.index.search(analyze('divorce'))]
+        self.assertEqual(ranked, ['a', 'b'])
+        ranked = [doc_id for doc_id, _ in self.index.search(analyze('tenant lease'), limit=1)]
+        self.assertEqual(ranked, ['b'])
+        ranked = [doc_id for doc_id, _ in self.index.search(analyze('tenant'), kind='FAQ')]
+        self.assertEqual(ranked, ['c'])
+    
+    def test_replace_and_remove(self):
+        """Test that re-adding replaces a document's terms and removing drops its postings."""
+        self.index.add('a', analyze('bankruptcy'))
+        self.assertEqual(self.index.search(analyze('custody')), [])
+        self.assertTrue(self.index.remove('b'))
+        self.assertNotIn('lease', self.index.postings)
+        self.assertEqual(self.index.total_length, 3)
+
+
+class VectorStoreTestCase(TestCase):
+    """Test case for the memory-mapped vector store."""
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = VectorStore(directory.name, dimensions=256, initial_capacity=2)
+        self.store.upsert([
+            ('a', analyze('divorce custody of children')),
+            ('b', analyze('tenant lease deposit')),
+            ('c', analyze('divorce and lease')),
+        ])
+    
+    def search(self, text, limit=10):
+        return [doc_id for doc_id, _ in self.store.search(analyze(text), limit)]
+    
+    def test_ranking(self):
+        """Test that results are ranked by cosine similarity and unrelated rows are left out."""
+        ranked = self.store.search(analyze('custody after divorce'))
+        self.assertEqual([doc_id for doc_id, _ in ranked][:2], ['a', 'c'])
+        self.assertTrue(all(0 < score <= 1.0001 for _, score in ranked))
+        self.assertEqual(self.search('tenant', limit=1), ['b'])
+        self.assertEqual(self.search('bankruptcy'), [])
+    
+    def test_append_replace_and_remove(self):
+        """Test that rows are appended, replaced rows retired and storage compacted."""
+        self.assertEqual(len(self.store), 3)
+        self.store.upsert([('b', analyze('bankruptcy'))])
+        self.assertEqual(self.search('tenant'), [])
+        self.assertEqual(self.search('bankruptcy'), ['b'])
+        self.store.remove(['a', 'c'])
+        self.assertEqual(self.store.ids(), ['b'])
+        self.assertEqual(self.search('divorce'), [])
+    
+    def test_reopened_store_sees_writes(self):
+        """Test that another store on the same directory reads the appended rows."""
+        other = VectorStore(self.store.directory, dimensions=256)
+        self.assertEqual(other.search(analyze('custody'), 1)[0][0], 'a')
+        self.store.upsert([('d', analyze('trademark registration'))])
+        self.assertEqual(other.search(analyze('trademark'))[0][0], 'd')
+        with self.assertRaises(ValueError):
+            VectorStore(self.store.directory, dimensions=128).search(analyze('custody'))
+
+
+class SessionContextTestCase(TestCase):
+    """Test case for the per-session context window and turn persistence."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='client@example.com', password='password123')
+        self.session = ChatSession.objects.create(user=self.user)
+        # Contexts are only cached in a cache other processes share
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(CACHES={
+            **settings.CACHES,
+            'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name},
+        }))
+        self.store = self.make_store('shared')
+    
+    def make_store(self, cache_alias):
+        return SessionContextStore(
+            max_messages=4, token_budget=50, summary_max_chars=60, excerpt_chars=20, cache_alias=cache_alias, timeout=60
+        )
+    
+    def test_summarize_keeps_recent_questions(self):
+        messages = [
+            {'message_type': 'USER', 'content': 'How do I file for divorce in my state?'},
+            {'message_type': 'BOT', 'content': 'File a petition.'},
+        ]
+        self.assertEqual(summarize('', messages, excerpt_chars=20), 'Q: How do I file for...')
+        self.assertEqual(summarize('Q: an old question', messages, max_chars=25, excerpt_chars=20),
+                         'Q: How do I file for...')
+    
+    def test_turns_cost_constant_queries(self):
+        """Test that a turn is one insert, plus one update once older turns are folded."""
+        self.store.get(self.session)
+        with self.assertNumQueries(1):
+            user_message, bot_message = self.store.record_turn(self.session, 'First question', 'First answer')
+        self.assertEqual((user_message.message_type, bot_message.message_type), ('USER', 'BOT'))
+        self.store.record_turn(self.session, 'Second question', 'Second answer')
+        with self.assertNumQueries(2):
+            self.store.record_turn(self.session, 'Third question', 'Third answer')
+        
+        context = self.store.get(self.session)
+        self.assertEqual([message['content'] for message in context.messages],
+                         ['Second question', 'Second answer', 'Third question', 'Third answer'])
+        self.assertEqual(context.summary, 'Q: First question')
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.summary, 'Q: First question')
+        self.assertEqual(ChatMessage.objects.filter(session=self.session).count(), 6)
+    
+    def test_token_budget_and_rebuild(self):
+        """Test that long messages shrink the window and a cache miss rebuilds the same context."""
+        self.store.record_turn(self.session, 'Short question', 'word ' * 48)
+        self.store.record_turn(self.session, 'Next question', 'Short answer')
+        context = self.store.get(self.session)
+        self.assertEqual([message['content'] for message in context.messages], ['Next question', 'Short answer'])
+        
+        self.store.invalidate(self.session.pk)
+        self.session.refresh_from_db()
+        with self.assertNumQueries(1):
+            rebuilt = self.store.get(self.session)
+        self.assertEqual(rebuilt.messages, context.messages)
+        self.assertEqual(rebuilt.summary, 'Q: Short question')
+    
+    def test_process_local_cache_is_not_trusted(self):
+        """Test that a store on a process-local cache rebuilds the context, seeing turns saved elsewhere."""
+        store = self.make_store('default')
+        context = store.get(self.session)
+        with self.assertNumQueries(1):
+            store.record_turn(self.session, 'First question', 'First answer', context)
+        self.make_store('default').record_turn(self.session, 'Second question', 'Second answer')
+        with self.assertNumQueries(1):
+            context = store.get(self.session)
+        self.assertEqual([message['content'] for message in context.messages],
+                         ['First question', 'First answer', 'Second question', 'Second answer'])
+    
+    def test_long_history_is_folded_on_load(self):
+        """Test that sessions with history older than the cache are folded once when loaded."""
+        ChatMessage.objects.bulk_create(
+            [ChatMessage(session=self.session, message_type='USER', content=f'Question {index}') for index in range(6)]
+        )
+        context = self.store.get(self.session)
+        self.assertEqual(len(context.messages), 4)
+        self.assertEqual(context.summary, 'Q: Question 0\nQ: Question 1')
+        self.session.refresh_from_db()
+        self.assertIsNotNone(self.session.summarized_until)
+
+
+class AnswerCacheTestCase(TestCase):
+    """Test case for question fingerprints and the answer LRU."""
+    
+    def setUp(self):
+        cache.delete(VERSION_KEY)
+        reset_answer_cache_stats()
+        self.answers = AnswerCache(max_entries=2, ttl=60, max_distance=3, version_alias='default')
+    
+    def test_fingerprints(self):
+        """Test that rephrasings share a fingerprint and unrelated questions are far apart."""
+        self.assertEqual(fingerprint('How do I file for divorce?'), fingerprint('how can I file for a divorce'))
+        self.assertGreater(
+            distance(fingerprint('How do I file for divorce?'), fingerprint('What are my rights as a tenant?')), 3
+        )
+        self.assertIsNone(fingerprint('How can I?'))
+    
+    def test_negation_and_word_order_change_fingerprints(self):
+        """Test that questions differing only in a negation or in word order do not share answers."""
+        pairs = [
+            ('Can I be evicted if I have not paid rent?', 'Can I be evicted if I have paid rent?'),
+            ("Can't I break my lease?", 'Can I break my lease?'),
+            ('Can my employer fire me?', 'Can I fire my employer?'),
+        ]
+        for first, second in pairs:
+            self.answers.set(fingerprint(first), 'answer', 0.1, None)
+            self.assertIsNone(self.answers.get(fingerprint(second)), second)
+        self.assertEqual(fingerprint("I don't have a lease"), fingerprint('I do not have a lease'))
+    
+    def test_near_duplicates_hit(self):
+        value = fingerprint('file for divorce')
+        self.answers.set(value, 'answer', 0.5, None)
+        self.assertEqual(self.answers.get(value ^ 0b101).answer, 'answer')
+        self.assertIsNone(self.answers.get(value ^ 0b1111))
+        self.assertEqual(answer_cache_stats()['saved_seconds'], 0.5)
+    
+    def test_lru_and_ttl_eviction(self):
+        first, second, third = (fingerprint(text) for text in ('divorce', 'tenant lease', 'trademark'))
+        self.answers.set(first, 'first', 0.1, None)
+        self.answers.set(second, 'second', 0.1, None)
+        self.answers.get(first)
+        self.answers.set(third, 'third', 0.1, None)
+        self.assertIsNone(self.answers.get(second))
+        self.assertIsNotNone(self.answers.get(first))
+        
+        self.answers.entries[first].expires_at = 0
+        self.assertIsNone(self.answers.get(first))
+        self.assertEqual(len(self.answers), 1)
+    
+    def test_process_local_version_cache_caps_ttl(self):
+        """Test that entries expire sooner when other processes' resource changes cannot be seen."""
+        self.assertEqual(AnswerCache(ttl=3600, version_alias='default', unshared_ttl=60).ttl, 60)
+        self.assertFalse(answer_cache_stats()['shared'])
+    
+    def test_resource_version_invalidates(self):
+        """Test that entries are dropped, and late answers not stored, once the resource version moves."""
+        value = fingerprint('divorce')
+        version = self.answers.current_version()
+        self.answers.set(value, 'answer', 0.1, version)
+        cache.set(VERSION_KEY, 1, None)
+        self.assertIsNone(self.answers.get(value))
+        self.answers.set(value, 'stale', 0.1, version)
+        self.assertEqual(len(self.answers), 0)
+
+
+class LegalResourceSearchAPITestCase(APITestCase):
+    """Test case for the legal resource search endpoint."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='client@example.com', password='password123')
+        self.divorce = LegalResource.objects.create(
+            title='Filing for divorce',
+            content='Steps to file a divorce petition with the family court.',
+            resource_type='PROCEDURE',
+            tags=['family', 'divorce']
+        )
+        self.lease = LegalResource.objects.create(
+            title='Breaking a lease',
+            content='When a tenant may end a lease early, for example after a divorce.',
+            resource_type='FAQ',
+            tags=['tenant']
+        )
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(user=self.user)
+        self.url = reverse('chatbot:legal-resource-search')
+        cache.delete(VERSION_KEY)
+        get_resource_index().build()
+    
+    def search(self, **params):
+        response = self.api_client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data]
+    
+    def test_search_ranks_resources(self):
+        """Test that title and tag matches outrank body mentions, in one query."""
+        with self.assertNumQueries(1):
+            self.assertEqual(self.search(q='how do I get divorced'), [str(self.divorce.pk), str(self.lease.pk)])
+        self.assertEqual(self.search(q='divorce', limit=1, resource_type='FAQ'), [str(self.lease.pk)])
+    
+    def test_index_follows_saves_and_deletes(self):
+        """Test that the index is updated incrementally when resources change."""
+        with self.captureOnCommitCallbacks(execute=True):
+            resource = LegalResource.objects.create(
+                title='Trademark registration', content='How to register a mark.', resource_type='PROCEDURE'
+            )
+        self.assertEqual(self.search(q='trademarks'), [str(resource.pk)])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lease.delete()
+        self.assertEqual(self.search(q='tenant'), [])
+    
+    def test_index_catches_up_with_other_processes(self):
+        """Test that changes made elsewhere are picked up through the shared version."""
+        LegalResource.objects.filter(pk=self.lease.pk).update(title='Ending a tenancy agreement')
+        cache.set(VERSION_KEY, 1000, None)  # Bumped by another process
+        self.assertEqual(self.search(q='tenancy'), [str(self.lease.pk)])
+    
+    def test_index_ages_out_with_process_local_cache(self):
+        """Test that changes no shared version announced are picked up once the index is old enough."""
+        LegalResource.objects.filter(pk=self.lease.pk).update(title='Ending a tenancy agreement')
+        self.assertEqual(self.search(q='tenancy'), [])
+        get_resource_index()._checked_at -= get_resource_index().max_age
+        self.assertEqual(self.search(q='tenancy'), [str(self.lease.pk)])
+    
+    def test_index_picks_up_late_commits(self):
+        """Test that a resource committed elsewhere after a later local save is still indexed."""
+        with self.captureOnCommitCallbacks(execute=True):
+            saved = LegalResource.objects.create(
+                title='Trademark registration', content='How to register a mark.', resource_type='PROCEDURE'
+            )
+        self.search(q='trademarks')
+        # Saved by another process before ours but committed after it
+        late = LegalResource.objects.bulk_create([
+            LegalResource(title='Patent filing', content='How to file a patent.', resource_type='PROCEDURE')
+        ])[0]
+        LegalResource.objects.filter(pk=late.pk).update(updated_at=saved.updated_at - timedelta(seconds=1))
+        cache.set(VERSION_KEY, 1000, None)
+        self.assertEqual(self.search(q='patent'), [str(late.pk)])
+    
+    def test_query_is_required(self):
+        response = self.api_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LegalResourceSimilarAPITestCase(APITestCase):
+    """Test case for the vector similarity endpoint."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='client@example.com', password='password123')
+        self.divorce = LegalResource.objects.create(
+            title='Filing for divorce',
+            content='Steps to file a divorce petition with the family court.',
+            resource_type='PROCEDURE',
+            tags=['family', 'divorce']
+        )
+        self.lease = LegalResource.objects.create(
+            title='Breaking a lease',
+            content='When a tenant may end a lease early.',
+            resource_type='FAQ',
+            tags=['tenant']
+        )
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(user=self.user)
+        self.url = reverse('chatbot:legal-resource-similar')
+        sync_resource_vectors(rebuild=True)
+    
+    def similar(self, **params):
+        response = self.api_client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data]
+    
+    def test_similar_ranks_resources(self):
+        """Test that resources are ranked by similarity, in one query."""
+        with self.assertNumQueries(1):
+            self.assertEqual(self.similar(q='divorce petition'), [str(self.divorce.pk)])
+        self.assertEqual(self.similar(q='tenant leases', limit=1), [str(self.lease.pk)])
+    
+    def test_vectors_follow_saves_and_deletes(self):
+        """Test that new resources are appended and deleted ones retired on commit."""
+        with self.captureOnCommitCallbacks(execute=True):
+            resource = LegalResource.objects.create(
+                title='Trademark registration', content='How to register a mark.', resource_type='PROCEDURE'
+            )
+        self.assertEqual(self.similar(q='trademarks'), [str(resource.pk)])
+        self.assertEqual(sync_resource_vectors(), (0, 0))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lease.delete()
+        self.assertEqual(self.similar(q='tenant'), [])
+        self.assertEqual(len(get_vector_store()), 2)
+    
+    def test_vectors_catch_up_with_other_processes(self):
+        """Test that a change synced elsewhere is picked up once the shared version moves."""
+        resource = LegalResource.objects.create(
+            title='Trademark registration', content='How to register a mark.', resource_type='PROCEDURE'
+        )
+        self.assertEqual(self.similar(q='trademarks'), [])
+        
+        cache.set(VERSION_KEY, (cache.get(VERSION_KEY) or 0) + 1, None)
+        self.assertEqual(self.similar(q='trademarks'), [str(resource.pk)])
+        with self.assertNumQueries(1):
+            self.similar(q='trademarks')
+    
+    def test_vectors_age_out_with_process_local_cache(self):
+        """Test that changes no shared version announced are picked up once the last sync is old enough."""
+        resource = LegalResource.objects.create(
+            title='Trademark registration', content='How to register a mark.', resource_type='PROCEDURE'
+        )
+        self.assertEqual(self.similar(q='trademarks'), [])
+        vectors._synced_clock -= get_vector_settings()['UNSHARED_MAX_AGE']
+        self.assertEqual(self.similar(q='trademarks'), [str(resource.pk)])
+    
+    def test_vectors_pick_up_late_commits(self):
+        """Test that a resource committed after a later sync is embedded, and synced rows are not redone."""
+        resource = LegalResource.objects.create(
+            title='Trademark registration', content='How to register a mark.', resource_type='PROCEDURE'
+        )
+        sync_resource_vectors()
+        # Saved before the synced resource but committed after the sync
+        late = LegalResource.objects.bulk_create([
+            LegalResource(title='Patent filing', content='How to file a patent.', resource_type='PROCEDURE')
+        ])[0]
+        LegalResource.objects.filter(pk=late.pk).update(updated_at=resource.updated_at - timedelta(seconds=1))
+        self.assertEqual(sync_resource_vectors(), (1, 0))
+        self.assertEqual(sync_resource_vectors(), (0, 0))
+        self.assertEqual(self.similar(q='patent'), [str(late.pk)])
+    
+    def test_query_is_required(self):
+        response = self.api_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FailingGenerator(BaseGenerator):
+    async def stream(self, question, context, resources):
+        yield 'Partial '
+        raise RuntimeError('model unavailable')
+
+
+class StalledGenerator(BaseGenerator):
+    async def stream(self, question, context, resources):
+        yield 'Partial '
+        await asyncio.sleep(60)
+        yield 'never sent'
+
+
+class ContextGenerator(BaseGenerator):
+    async def stream(self, question, context, resources):
+        yield f'Answer {len(context.messages)}'
+
+
+class ChatStreamAPITestCase(APITestCase):
+    """Test case for chat sessions and the streaming answer endpoint."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='client@example.com', password='password123')
+        self.other = User.objects.create_user(email='other@example.com', password='password123')
+        self.resource = LegalResource.objects.create(
+            title='Filing for divorce',
+            content='File a divorce petition with the family court. Fees vary by state.',
+            resource_type='PROCEDURE',
+            tags=['divorce']
+        )
+        cache.delete(VERSION_KEY)
+        get_resource_index().build()
+        clear_answer_cache()
+        reset_answer_cache_stats()
+        self.session = ChatSession.objects.create(user=self.user)
+        self.url = reverse('chatbot:chat-session-stream', args=[self.session.pk])
+        self.headers = {'Authorization': f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}'}
+    
+    async def post(self, url=None, body=None, headers=None):
+        return await self.async_client.post(
+            url or self.url, json.dumps(body or {}), content_type='application/json',
+            headers=self.headers if headers is None else headers,
+        )
+    
+    async def events(self, response):
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        events = []
+        for block in body.strip().split('\n\n'):
+            event, data = block.split('\n')
+            events.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+        return events
+    
+    async def test_streams_and_saves_answer(self):
+        """Test that the answer is streamed token by token and saved when the stream ends."""
+        response = await self.post(body={'message': 'How do I file for divorce?'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = await self.events(response)
+        
+        tokens = [data['token'] for event, data in events if event == 'token']
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual(events[-1][0], 'done')
+        answer = events[-1][1]
+        self.assertEqual(answer['content'], ''.join(tokens))
+        self.assertIn('Filing for divorce: File a divorce petition with the family court.', answer['content'])
+        
+        messages = [message async for message in ChatMessage.objects.filter(session=self.session).order_by('timestamp')]
+        self.assertEqual([message.message_type for message in messages], ['USER', 'BOT'])
+        self.assertEqual(messages[0].content, 'How do I file for divorce?')
+        self.assertEqual(str(messages[1].pk), answer['id'])
+    
+    def rename_resource(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resource.title = title
+            self.resource.save()
+    
+    async def test_near_identical_questions_are_served_from_cache(self):
+        """Test that rephrased questions hit the answer cache until a resource changes."""
+        first = await self.post(body={'message': 'How do I file for divorce?'})
+        self.assertEqual(first['X-Answer-Cache'], 'miss')
+        answer = (await self.events(first))[-1][1]['content']
+        
+        second = await self.post(body={'message': 'how can I file for a divorce'})
+        self.assertEqual(second['X-Answer-Cache'], 'hit')
+        self.assertEqual((await self.events(second))[-1][1]['content'], answer)
+        self.assertEqual(await ChatMessage.objects.filter(session=self.session).acount(), 4)
+        
+        await sync_to_async(self.rename_resource)('Divorce filing')
+        third = await self.post(body={'message': 'How do I file for divorce?'})
+        self.assertEqual(third['X-Answer-Cache'], 'miss')
+        await self.events(third)
+        
+        stats = await sync_to_async(answer_cache_stats)()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 2, 0.3333))
+    
+    def test_answer_cache_stats_are_admin_only(self):
+        admin = User.objects.create_user(email='admin@example.com', password='password123', user_type='ADMIN')
+        api_client = APIClient()
+        api_client.force_authenticate(user=self.user)
+        self.assertEqual(api_client.get(reverse('chatbot:answer-cache-list')).status_code, status.HTTP_403_FORBIDDEN)
+        api_client.force_authenticate(user=admin)
+        response = api_client.get(reverse('chatbot:answer-cache-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['hits'], 0)
+    
+    @override_settings(CHATBOT_GENERATOR={'BACKEND': 'apps.chatbot.tests.ContextGenerator', 'OPTIONS': {}})
+    async def test_context_dependent_answers_are_not_cached(self):
+        """Test that answers of generators that are not cacheable bypass the answer cache."""
+        first = await self.post(body={'message': 'How do I file for divorce?'})
+        self.assertNotIn('X-Answer-Cache', first)
+        self.assertEqual((await self.events(first))[-1][1]['content'], 'Answer 0')
+        second = await self.post(body={'message': 'How do I file for divorce?'})
+        self.assertEqual((await self.events(second))[-1][1]['content'], 'Answer 2')
+        stats = await sync_to_async(answer_cache_stats)()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (0, 0, 0))
+    
+    @override_settings(CHATBOT_GENERATOR={'BACKEND': 'apps.chatbot.tests.StalledGenerator', 'OPTIONS': {}})
+    async def test_disconnect_saves_partial_turn(self):
+        """Test that a client leaving mid-stream still saves the question and the answer sent so far."""
+        response = await self.post(body={'message': 'Custody?'})
+        chunks = aiter(response)
+        self.assertIn(b'Partial', await anext(chunks))
+        # The server cancels the response task when the client disconnects
+        reader = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0.05)
+        reader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reader
+        messages = [
+            (message.message_type, message.content)
+            async for message in ChatMessage.objects.filter(session=self.session).order_by('message_type')
+        ]
+        self.assertEqual(messages, [('BOT', 'Partial '), ('USER', 'Custody?')])
+    
+    @override_settings(CHATBOT_GENERATOR={'BACKEND': 'apps.chatbot.tests.FailingGenerator', 'OPTIONS': {}})
+    async def test_failed_generation_is_not_saved(self):
+        """Test that a failing generator ends the stream with an error and saves only the question."""
+        with self.assertLogs('django', 'ERROR'):
+            events = await self.events(await self.post(body={'message': 'Custody?'}))
+        self.assertEqual([event for event, _ in events], ['token', 'error'])
+        types = [message.message_type async for message in ChatMessage.objects.filter(session=self.session)]
+        self.assertEqual(types, ['USER'])
+    
+    async def test_rejects_bad_requests(self):
+        """Test authentication, session ownership and message validation."""
+        response = await self.post(body={'message': 'Hello'}, headers={})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        other_session = await ChatSession.objects.acreate(user=self.other)
+        url = reverse('chatbot:chat-session-stream', args=[other_session.pk])
+        self.assertEqual((await self.post(url, {'message': 'Hello'})).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual((await self.post(body={'message': '  '})).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(await ChatMessage.objects.filter(session=self.session).aexists())
+    
+    def test_sessions_are_per_user(self):
+        """Test that users create and list only their own sessions and read their messages."""
+        api_client = APIClient()
+        api_client.force_authenticate(user=self.user)
+        response = api_client.post(reverse('chatbot:chat-session-list'))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ChatSession.objects.create(user=self.other)
+        response = api_client.get(reverse('chatbot:chat-session-list'))
+        self.assertEqual(response.data['count'], 2)
+        
+        ChatMessage.objects.create(session=self.session, message_type='USER', content='Hello')
+        response = api_client.get(reverse('chatbot:chat-session-messages', args=[self.session.pk]))
+        self.assertEqual([row['content'] for row in response.data['results']], ['Hello'])
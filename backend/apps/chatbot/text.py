@@ -0,0 +1,78 @@
+"""
+Text normalization shared by the chatbot's retrieval and caching.
+
+Text is split into word tokens, lowercased, stripped of English stopwords and
+reduced to Snowball stems with ``nltk``, so "divorcing", "divorced" and
+"divorce" all become the term ``divorc``. Only parts of ``nltk`` that need no
+downloaded data are used; the stopword list comes from the ``stopwords``
+corpus when it is installed and from a built-in copy of it otherwise.
+
+The stopword list includes negations ("not", "no", the halves of "don't"),
+which matter little for retrieval but reverse the meaning of a question, so
+``analyze`` can keep them as the single term ``not`` instead.
+"""
+from functools import lru_cache
+
+from nltk.stem.snowball import SnowballStemmer
+from nltk.tokenize import RegexpTokenizer
+
+# NLTK's English stopword list, for installs without the corpus
+FALLBACK_STOPWORDS = frozenset("""
+a about above after again against ain all am an and any are aren aren't as at be because been before
+being below between both but by can couldn couldn't d did didn didn't do does doesn doesn't doing don
+don't down during each few for from further had hadn hadn't has hasn hasn't have haven haven't having
+he her here hers herself him himself his how i if in into is isn isn't it it's its itself just ll m ma
+me mightn mightn't more most mustn mustn't my myself needn needn't no nor not now o of off on once only
+or other our ours ourselves out over own re s same shan shan't she she's should should've shouldn
+shouldn't so some such t than that that'll the their theirs them themselves then there these they this
+those through to too under until up ve very was wasn wasn't we were weren weren't what when where which
+while who whom why will with won won't wouldn wouldn't y you you'd you'll you're you've your yours
+yourself yourselves
+""".split())
+
+_tokenizer = RegexpTokenizer(r'\w+')
+_stemmer = SnowballStemmer('english')
+
+
+def _load_stopwords():
+    try:
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words('english'))
+    except LookupError:
+        return FALLBACK_STOPWORDS
+
+
+STOPWORDS = _load_stopwords()
+
+# Tokens that negate, including both halves of contractions ("don't" is "don" "t", "can't" is "can" "t")
+NEGATIONS = frozenset({'ain', 'cannot', 'never', 'no', 'nor', 'not', 't'}) | frozenset(
+    word for word in FALLBACK_STOPWORDS if f"{word}'t" in FALLBACK_STOPWORDS
+)
+NEGATION_TERM = 'not'
+
+
+def tokenize(text):
+    """Lowercased word tokens of ``text``."""
+    return _tokenizer.tokenize(text.lower()) if text else []
+
+
+@lru_cache(maxsize=50000)
+def stem(token):
+    return _stemmer.stem(token)
+
+
+def analyze(text, keep_negations=False):
+    """
+    Stemmed terms of ``text`` with stopwords removed, in order. With
+    ``keep_negations`` each run of negating tokens becomes the term ``not``.
+    """
+    if not keep_negations:
+        return [stem(token) for token in tokenize(text) if token not in STOPWORDS]
+    terms = []
+    for token in tokenize(text):
+        if token in NEGATIONS:
+            if not terms or terms[-1] != NEGATION_TERM:
+                terms.append(NEGATION_TERM)
+        elif token not in STOPWORDS:
+            terms.append(stem(token))
+    return terms
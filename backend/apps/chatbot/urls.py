@@ -1,7 +1,15 @@
-from django.urls import path
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import AnswerCacheViewSet, ChatSessionViewSet, LegalResourceViewSet, stream_message
 
 app_name = 'chatbot'
 
+router = DefaultRouter()
+router.register('resources', LegalResourceViewSet, basename='legal-resource')
+router.register('sessions', ChatSessionViewSet, basename='chat-session')
+router.register('answer-cache', AnswerCacheViewSet, basename='answer-cache')
+
 urlpatterns = [
-    # Chatbot URLs will be added here
-] 
\ No newline at end of file
+    path('sessions/<uuid:session_id>/stream/', stream_message, name='chat-session-stream'),
+    path('', include(router.urls)),
+]
@@ -0,0 +1,425 @@
+"""
+Vector similarity ranking of ``LegalResource`` with NumPy.
+
+Resources are embedded locally, without any downloaded model, as hashed bags
+of words: each analyzed term (see ``apps.chatbot.text``) is hashed to one of
+``DIMENSIONS`` buckets with a hashed sign, weighted by ``1 + log(tf)``, and
+the row is L2-normalized. Inverse document frequencies are kept per bucket
+and applied to the query only, so stored rows never change as the corpus
+grows and new resources are appended rather than the matrix being refitted.
+A query is ranked against every resource with one matrix-vector product.
+
+The rows live in ``DIRECTORY`` next to their metadata:
+
+``matrix.f32``
+    float32 matrix of ``capacity`` x ``DIMENSIONS``, memory-mapped, grown
+    by doubling.
+``df.npy``
+    number of live rows with a non-zero value in each bucket.
+``meta.json``
+    the resource id of every row (``null`` for rows that were replaced or
+    deleted, which are zeroed), the row count, the ``updated_at`` high
+    water mark of the last sync, the ``updated_at`` of each row synced
+    within ``SYNC_OVERLAP`` seconds of it, and the resource version the
+    store caught up with.
+
+One writer at a time (serialized with a file lock) appends and retires rows:
+``sync_resource_vectors`` embeds the resources updated since the last sync
+and retires deleted ones. ``updated_at`` is set before the transaction
+commits, so each sync re-reads ``SYNC_OVERLAP`` seconds behind the high water
+mark and skips the rows it already embedded at the same ``updated_at``.
+Readers reopen the files whenever ``meta.json``
+changes. Once more than ``COMPACT_RATIO`` of the rows are retired the matrix
+is rewritten without them.
+
+``DIRECTORY`` is local to each host, and Celery workers may run on another
+one, so the process answering a query keeps its own copy current:
+``similar_resources`` syncs first when the store has not caught up with the
+resource version shared through ``CHATBOT_RETRIEVAL['CACHE_ALIAS']``, which
+every save or delete bumps (see ``apps.chatbot.retrieval``). The sync is
+incremental, so that costs the rows changed since, and nothing otherwise.
+The ``update_resource_vectors`` task, queued when a resource changes, does
+the same ahead of time for processes that share its directory. Bumps made
+elsewhere never reach a process-local cache (LocMem), so with one the store
+also syncs once its last sync is ``UNSHARED_MAX_AGE`` seconds old.
+
+Settings are read from ``CHATBOT_VECTORS``.
+"""
+import fcntl
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.dateparse import parse_datetime
+
+from .models import LegalResource
+from .retrieval import INDEX_FIELDS, resource_terms, resource_version_is_shared, shared_resource_version
+from .text import analyze
+
+DEFAULTS = {
+    'DIRECTORY': os.path.join(settings.BASE_DIR, 'var', 'chatbot_vectors'),
+    'DIMENSIONS': 2048,
+    'TITLE_WEIGHT': 3,
+    'TAG_WEIGHT': 2,
+    'COMPACT_RATIO': 0.5,
+    'INITIAL_CAPACITY': 1024,
+    # Longest transaction, in seconds, whose resource changes a sync still picks up
+    'SYNC_OVERLAP': 60,
+    # How stale other processes' changes may be when the resource version cache is process-local
+    'UNSHARED_MAX_AGE': 60,
+}
+
+DTYPE = np.float32
+
+
+def get_vector_settings():
+    return {**DEFAULTS, **getattr(settings, 'CHATBOT_VECTORS', {})}
+
+
+@lru_cache(maxsize=100000)
+def _bucket(term, dimensions):
+    digest = int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+    # The top bit picks the sign, so colliding terms tend to cancel rather than add up
+    return digest % dimensions, -1.0 if digest >> 63 else 1.0
+
+
+def embed(terms, dimensions):
+    """Unnormalized hashed bag-of-words vector of ``terms``."""
+    vector = np.zeros(dimensions, dtype=DTYPE)
+    for term, count in Counter(terms).items():
+        index, sign = _bucket(term, dimensions)
+        vector[index] += sign * (1.0 + math.log(count))
+    return vector
+
+
+def _normalized(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class VectorStore:
+    """Append-only, memory-mapped matrix of document vectors keyed by id."""
+
+    def __init__(self, directory, dimensions, compact_ratio=0.5, initial_capacity=1024):
+        self.directory = directory
+        self.dimensions = dimensions
+        self.compact_ratio = compact_ratio
+        self.initial_capacity = initial_capacity
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._matrix = None
+        self._df = None
+        self._meta = self._empty_meta()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _empty_meta(self):
+        return {
+            'dimensions': self.dimensions, 'rows': 0, 'capacity': 0, 'ids': [], 'synced_at': None, 'synced_rows': {},
+            'version': None,
+        }
+
+    def _open(self, mode):
+        """Load the metadata, document frequencies and matrix from disk."""
+        try:
+            with open(self._path('meta.json')) as meta_file:
+                meta = json.load(meta_file)
+        except FileNotFoundError:
+            return self._empty_meta(), None, np.zeros(self.dimensions, dtype=np.int64)
+        if meta['dimensions'] != self.dimensions:
+            raise ValueError(
+                f"Vector store has {meta['dimensions']} dimensions, expected {self.dimensions}; rebuild it"
+            )
+        matrix = None
+        if meta['capacity']:
+            matrix = np.memmap(
+                self._path('matrix.f32'), dtype=DTYPE, mode=mode, shape=(meta['capacity'], self.dimensions)
+            )
+        return meta, matrix, np.load(self._path('df.npy'))
+
+    def _refresh(self):
+        try:
+            stamp = os.stat(self._path('meta.json')).st_mtime_ns
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._stamp:
+            self._meta, self._matrix, self._df = self._open('r')
+            self._stamp = stamp
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return sum(1 for doc_id in self._meta['ids'] if doc_id is not None)
+
+    def checkpoint(self):
+        """
+        The ``updated_at`` of the last synced row, and the ``updated_at`` by
+        id of the rows synced within the overlap window behind it.
+        """
+        with self._lock:
+            self._refresh()
+            synced_at = parse_datetime(self._meta['synced_at']) if self._meta['synced_at'] else None
+            synced_rows = {
+                doc_id: parse_datetime(updated_at) for doc_id, updated_at in self._meta.get('synced_rows', {}).items()
+            }
+            return synced_at, synced_rows
+
+    def is_behind(self, version):
+        """Whether the store was never synced or last caught up with another resource ``version``."""
+        with self._lock:
+            self._refresh()
+            return self._stamp is None or self._meta.get('version') != version
+
+    def set_version(self, version):
+        with self._writing() as state:
+            state['meta']['version'] = version
+
+    def ids(self):
+        with self._lock:
+            self._refresh()
+            return [doc_id for doc_id in self._meta['ids'] if doc_id is not None]
+
+    def search(self, terms, limit=10):
+        """The ``limit`` most similar ``(doc_id, cosine)`` pairs for ``terms``, best first."""
+        with self._lock:
+            self._refresh()
+            meta, matrix, df = self._meta, self._matrix, self._df
+        rows = meta['rows']
+        live = rows - meta['ids'].count(None)
+        if not live or not limit:
+            return []
+        query = embed(terms, self.dimensions)
+        if not query.any():
+            return []
+        idf = np.log((1.0 + live) / (1.0 + df)) + 1.0
+        query = _normalized(query * idf.astype(DTYPE))
+
+        scores = matrix[:rows] @ query
+        limit = min(limit, rows)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        ids = meta['ids']
+        # Retired rows are zeroed, so they never score above zero
+        return [(ids[row], float(scores[row])) for row in top if scores[row] > 0 and ids[row] is not None]
+
+    @contextmanager
+    def _writing(self):
+        """Exclusive access to the on-disk state; changes are published when the block exits."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path('.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                state = dict(zip(('meta', 'matrix', 'df'), self._open('r+')))
+                yield state
+                self._publish(state)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _publish(self, state):
+        if state['matrix'] is not None:
+            state['matrix'].flush()
+        np.save(self._path('df.npy.tmp'), state['df'], allow_pickle=False)
+        os.replace(self._path('df.npy.tmp.npy'), self._path('df.npy'))
+        # meta.json is replaced last: readers reload when it changes
+        with open(self._path('meta.json.tmp'), 'w') as meta_file:
+            json.dump(state['meta'], meta_file)
+        os.replace(self._path('meta.json.tmp'), self._path('meta.json'))
+
+    def _resize(self, state, capacity):
+        """Rewrite the matrix with room for ``capacity`` rows, keeping ``state``'s rows in order."""
+        meta = state['meta']
+        matrix = np.memmap(self._path('matrix.f32.tmp'), dtype=DTYPE, mode='w+', shape=(capacity, self.dimensions))
+        if meta['rows']:
+            matrix[:meta['rows']] = state['matrix'][:meta['rows']]
+        matrix.flush()
+        os.replace(self._path('matrix.f32.tmp'), self._path('matrix.f32'))
+        state['matrix'] = matrix
+        meta['capacity'] = capacity
+
+    def _retire(self, state, rows):
+        matrix = state['matrix']
+        for row in rows:
+            state['df'] -= matrix[row] != 0
+            matrix[row] = 0
+            state['meta']['ids'][row] = None
+
+    def _live_rows(self, meta, doc_ids):
+        wanted = set(doc_ids)
+        return [row for row, doc_id in enumerate(meta['ids']) if doc_id in wanted]
+
+    def upsert(self, documents, synced_at=None, synced_rows=None):
+        """
+        Append rows for ``(doc_id, terms)`` pairs, retiring the rows they
+        replace, and record the ``checkpoint``. Returns the number of rows
+        written.
+        """
+        vectors = {}
+        for doc_id, terms in documents:
+            vectors[str(doc_id)] = _normalized(embed(terms, self.dimensions))
+        with self._writing() as state:
+            meta = state['meta']
+            if vectors:
+                self._retire(state, self._live_rows(meta, vectors))
+                needed = meta['rows'] + len(vectors)
+                if needed > meta['capacity']:
+                    self._resize(state, max(needed, 2 * meta['capacity'], self.initial_capacity))
+                start = meta['rows']
+                state['matrix'][start:needed] = np.stack(list(vectors.values()))
+                state['df'] += (state['matrix'][start:needed] != 0).sum(axis=0)
+                meta['ids'].extend(vectors)
+                meta['rows'] = needed
+            if synced_at is not None:
+                meta['synced_at'] = synced_at.isoformat()
+                meta['synced_rows'] = {
+                    doc_id: updated_at.isoformat() for doc_id, updated_at in (synced_rows or {}).items()
+                }
+                meta.pop('synced_ids', None)
+            self._maybe_compact(state)
+        return len(vectors)
+
+    def remove(self, doc_ids):
+        """Retire the rows of ``doc_ids``. Returns the number of rows retired."""
+        doc_ids = [str(doc_id) for doc_id in doc_ids]
+        if not doc_ids:
+            return 0
+        with self._writing() as state:
+            rows = self._live_rows(state['meta'], doc_ids)
+            self._retire(state, rows)
+            self._maybe_compact(state)
+        return len(rows)
+
+    def _maybe_compact(self, state):
+        meta = state['meta']
+        retired = meta['ids'].count(None)
+        if not retired or retired <= self.compact_ratio * meta['rows']:
+            return
+        live = [row for row, doc_id in enumerate(meta['ids']) if doc_id is not None]
+        rows = np.array(state['matrix'][live]) if live else np.zeros((0, self.dimensions), dtype=DTYPE)
+        meta['ids'] = [meta['ids'][row] for row in live]
+        meta['rows'] = 0
+        self._resize(state, max(self.initial_capacity, 2 * len(live)))
+        state['matrix'][:len(live)] = rows
+        meta['rows'] = len(live)
+
+    def clear(self):
+        with self._writing() as state:
+            state['meta'] = self._empty_meta()
+            state['matrix'] = None
+            state['df'] = np.zeros(self.dimensions, dtype=np.int64)
+            if os.path.exists(self._path('matrix.f32')):
+                os.remove(self._path('matrix.f32'))
+
+
+_vector_store = None
+_vector_store_lock = threading.Lock()
+# When this process last synced the store
+_synced_clock = None
+
+
+def get_vector_store():
+    global _vector_store
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                config = get_vector_settings()
+                _vector_store = VectorStore(
+                    config['DIRECTORY'], config['DIMENSIONS'], config['COMPACT_RATIO'], config['INITIAL_CAPACITY']
+                )
+    return _vector_store
+
+
+@receiver(setting_changed)
+def reset_vector_store(setting, **kwargs):
+    global _vector_store, _synced_clock
+    if setting == 'CHATBOT_VECTORS':
+        _vector_store = None
+        _synced_clock = None
+
+
+def sync_resource_vectors(rebuild=False, batch_size=500):
+    """
+    Embed resources updated since the last sync and retire deleted ones.
+
+    With ``rebuild`` every resource is embedded again from an empty store.
+    Returns ``(written, retired)``.
+    """
+    global _synced_clock
+    _synced_clock = time.monotonic()
+    store = get_vector_store()
+    config = get_vector_settings()
+    # Read before the rows, so changes made meanwhile leave the store behind rather than skipped
+    version = shared_resource_version()
+    if rebuild:
+        store.clear()
+    since, synced_rows = store.checkpoint()
+    overlap = timedelta(seconds=config['SYNC_OVERLAP'])
+
+    changed = LegalResource.objects.values(*INDEX_FIELDS).order_by('updated_at')
+    if since is not None:
+        # Overlap, so rows committed after later saves are not missed
+        changed = changed.filter(updated_at__gte=since - overlap)
+    written = 0
+    batch = []
+    high_water = since
+
+    def flush():
+        cutoff = high_water - overlap
+        recent = {doc_id: updated_at for doc_id, updated_at in synced_rows.items() if updated_at >= cutoff}
+        return store.upsert(batch, high_water, recent)
+
+    for row in changed.iterator(chunk_size=batch_size):
+        doc_id = str(row['id'])
+        if synced_rows.get(doc_id) == row['updated_at']:
+            continue
+        synced_rows[doc_id] = row['updated_at']
+        if high_water is None or row['updated_at'] > high_water:
+            high_water = row['updated_at']
+        batch.append((doc_id, resource_terms(
+            row['title'], row['content'], row['tags'], config['TITLE_WEIGHT'], config['TAG_WEIGHT']
+        )))
+        if len(batch) >= batch_size:
+            written += flush()
+            batch = []
+    if batch:
+        written += flush()
+
+    existing = {str(pk) for pk in LegalResource.objects.values_list('id', flat=True)}
+    retired = store.remove([doc_id for doc_id in store.ids() if doc_id not in existing])
+    if store.is_behind(version):
+        store.set_version(version)
+    return written, retired
+
+
+def similar_resources(query, limit=10):
+    """
+    The resources most similar to ``query``, best first, each with a
+    ``score`` attribute (cosine similarity). Costs one query once the store
+    is current.
+    """
+    store = get_vector_store()
+    expired = not resource_version_is_shared() and (
+        _synced_clock is None or time.monotonic() - _synced_clock >= get_vector_settings()['UNSHARED_MAX_AGE']
+    )
+    if expired or store.is_behind(shared_resource_version()):
+        sync_resource_vectors()
+    ranked = store.search(analyze(query), limit)
+    resources = LegalResource.objects.in_bulk([doc_id for doc_id, _ in ranked])
+    results = []
+    for doc_id, score in ranked:
+        resource = resources.get(LegalResource._meta.pk.to_python(doc_id))
+        if resource is not None:
+            resource.score = score
+            results.append(resource)
+    return results
@@ -0,0 +1,259 @@
+import asyncio
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import mixins, viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from apps.users.permissions import IsAdmin
+from .answers import answer_cache_stats, fingerprint, get_answer_cache
+from .context import get_context_store
+from .generation import TOKEN_PATTERN, get_generator
+from .models import ChatSession, LegalResource
+from .retrieval import get_retrieval_settings, search_resources
+from .serializers import (
+    ChatMessageSerializer, ChatSessionSerializer, LegalResourceSerializer, LegalResourceMatchSerializer,
+)
+from .vectors import similar_resources
+
+logger = logging.getLogger('django')
+
+MAX_MESSAGE_LENGTH = 4000
+# Retrieved resources handed to the generator per turn
+STREAM_RESOURCES = 3
+
+
+class LegalResourceViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for the legal resources the chatbot answers from.
+    
+    list:
+    Return a list of legal resources.
+    
+    retrieve:
+    Return a specific legal resource.
+    """
+    queryset = LegalResource.objects.all()
+    serializer_class = LegalResourceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_limit(self, request):
+        config = get_retrieval_settings()
+        try:
+            limit = int(request.query_params.get('limit', config['DEFAULT_LIMIT']))
+        except ValueError:
+            raise ValidationError({"limit": "Expected a number."})
+        return max(1, min(limit, config['MAX_LIMIT']))
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Get the legal resources best matching ``q``, ranked by BM25.
+        
+        Optional ``limit`` (default 10) caps the number of results and
+        ``resource_type`` restricts them to one type.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({"q": "A search query is required."})
+        limit = self.get_limit(request)
+        
+        resource_type = request.query_params.get('resource_type') or None
+        if resource_type and resource_type not in dict(LegalResource.RESOURCE_TYPE_CHOICES):
+            raise ValidationError({"resource_type": "Unknown resource type."})
+        
+        resources = search_resources(query, limit, resource_type)
+        serializer = LegalResourceMatchSerializer(resources, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def similar(self, request):
+        """
+        Get the legal resources most similar to ``q`` by cosine similarity
+        of their hashed bag-of-words vectors.
+        
+        Optional ``limit`` (default 10) caps the number of results.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({"q": "A query is required."})
+        
+        resources = similar_resources(query, self.get_limit(request))
+        serializer = LegalResourceMatchSerializer(resources, many=True)
+        return Response(serializer.data)
+
+
+class ChatSessionViewSet(mixins.CreateModelMixin,
+                         mixins.ListModelMixin,
+                         mixins.RetrieveModelMixin,
+                         viewsets.GenericViewSet):
+    """
+    API endpoint for the authenticated user's chat sessions.
+    
+    Answers are posted to ``sessions/<id>/stream/``, see ``stream_message``.
+    """
+    serializer_class = ChatSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return ChatSession.objects.filter(user=self.request.user)
+    
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+    
+    @action(detail=True, methods=['get'])
+    def messages(self, request, pk=None):
+        """Get the messages of a session, oldest first."""
+        session = self.get_object()
+        page = self.paginate_queryset(session.messages.order_by('timestamp', 'id'))
+        serializer = ChatMessageSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+def authenticate(request):
+    """The user authenticated by the API's authentication classes, or ``AnonymousUser``."""
+    authenticators = [authentication() for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    # OAuth2 authentication may read the token from the parsed body
+    parsers = [parser() for parser in api_settings.DEFAULT_PARSER_CLASSES]
+    return Request(request, parsers=parsers, authenticators=authenticators).user
+
+
+def server_sent_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def cached_tokens(answer):
+    for token in TOKEN_PATTERN.findall(answer):
+        yield token
+
+
+async def save_turn(store, session, context, question, answer=None):
+    # Shielded, so that a client disconnect cancelling the stream cannot interrupt the save
+    return await asyncio.shield(sync_to_async(store.record_turn)(session, question, answer, context))
+
+
+async def answer_events(session, question, context, cached=None):
+    """
+    Stream the answer's tokens as events, then save the turn and send the
+    answer as ``done``. The answer is ``cached`` or generated and cached.
+    
+    If the client disconnects mid-stream the turn is still saved, with the
+    part of the answer sent so far (or only the question).
+    """
+    store = get_context_store()
+    generator = get_generator()
+    answer_cache = get_answer_cache() if generator.cacheable else None
+    started = time.perf_counter()
+    if cached is not None:
+        tokens = cached_tokens(cached.answer)
+    else:
+        version = answer_cache.current_version() if answer_cache is not None else None
+        resources = await sync_to_async(search_resources)(question, STREAM_RESOURCES)
+        tokens = generator.stream(question, context, resources)
+    
+    answer = []
+    saved = False
+    try:
+        try:
+            async for token in tokens:
+                answer.append(token)
+                yield server_sent_event('token', {'token': token})
+        except Exception:
+            logger.exception("Chatbot answer generation failed for session %s", session.pk)
+            saved = True
+            await save_turn(store, session, context, question)
+            yield server_sent_event('error', {'detail': 'The answer could not be generated.'})
+            return
+        answer = ''.join(answer)
+        if cached is None and answer_cache is not None:
+            await sync_to_async(answer_cache.set)(
+                fingerprint(question), answer, time.perf_counter() - started, version
+            )
+        saved = True
+        _, message = await save_turn(store, session, context, question, answer)
+        yield server_sent_event('done', ChatMessageSerializer(message).data)
+    finally:
+        if not saved:
+            # Cancelled or closed by a disconnect
+            await save_turn(store, session, context, question, ''.join(answer) or None)
+
+
+@csrf_exempt
+@require_POST
+async def stream_message(request, session_id):
+    """
+    Post a user message to a chat session and stream the bot's answer as
+    Server-Sent Events.
+    
+    The body is ``{"message": "..."}``. The response is a ``token`` event
+    per token of the answer followed by a ``done`` event carrying the saved
+    bot message, or an ``error`` event if generation fails. Both messages
+    are saved together once the stream ends; only the user message when
+    generation fails. When the generator is cacheable, answers to
+    near-identical questions are served from the answer cache, reported in
+    the ``X-Answer-Cache`` header.
+    """
+    # Read the body before authenticating, which may parse it, so it can still be read below
+    body = request.body
+    try:
+        user = await sync_to_async(authenticate)(request)
+    except APIException as exc:
+        return JsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+    if not user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    
+    session = await ChatSession.objects.filter(pk=session_id, user=user).afirst()
+    if session is None:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    if session.ended_at is not None:
+        return JsonResponse({'detail': 'This chat session has ended.'}, status=400)
+    
+    try:
+        question = json.loads(body or b'{}').get('message', '')
+    except (ValueError, AttributeError):
+        return JsonResponse({'detail': 'Expected a JSON object.'}, status=400)
+    question = question.strip() if isinstance(question, str) else ''
+    if not question:
+        return JsonResponse({'message': ['A message is required.']}, status=400)
+    if len(question) > MAX_MESSAGE_LENGTH:
+        return JsonResponse(
+            {'message': [f'Ensure this field has no more than {MAX_MESSAGE_LENGTH} characters.']}, status=400
+        )
+    
+    context = await sync_to_async(get_context_store().get)(session)
+    answer_cache = get_answer_cache() if get_generator().cacheable else None
+    cached = None
+    if answer_cache is not None:
+        cached = await sync_to_async(answer_cache.get)(fingerprint(question))
+    
+    response = StreamingHttpResponse(
+        answer_events(session, question, context, cached), content_type='text/event-stream'
+    )
+    if answer_cache is not None:
+        response['X-Answer-Cache'] = 'hit' if cached is not None else 'miss'
+    response['Cache-Control'] = 'no-cache'
+    # Keep proxies such as nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class AnswerCacheViewSet(viewsets.ViewSet):
+    """
+    API endpoint for chatbot answer cache metrics.
+    
+    list:
+    Return the answer cache's hit rate and the generation time it saved.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    
+    def list(self, request):
+        return Response(answer_cache_stats())
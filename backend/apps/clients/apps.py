@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class ClientsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.clients' 
\ No newline at end of file
+    name = 'apps.clients'
+    
+    def ready(self):
+        """Import signals when the app is ready."""
+        import apps.clients.signals
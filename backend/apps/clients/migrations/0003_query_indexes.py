@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clientattorneyreview',
+            index=models.Index(fields=['attorney', '-created_at'], name='review_attorney_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientattorneyreview',
+            index=models.Index(fields=['client', '-created_at'], name='review_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='legalrequest',
+            index=models.Index(fields=['client', 'status', '-created_at'], name='legal_request_client_st_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='legalrequest',
+            index=models.Index(fields=['attorney', 'status', '-created_at'], name='legal_request_attorney_st_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='legalrequest',
+            index=models.Index(fields=['-created_at', '-id'], name='legal_request_created_id_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from apps.attorneys.models import Attorney
+from apps.attorneys.ratings import apply_rating_change
 import uuid
 
 class Client(models.Model):
@@ -46,6 +47,12 @@ class LegalRequest(models.Model):
         verbose_name_plural = 'legal requests'
         db_table = 'legal_requests'
         ordering = ['-created_at']
+        # Back the per-party status lists and summary, and the keyset order of the list
+        indexes = [
+            models.Index(fields=['client', 'status', '-created_at'], name='legal_request_client_st_idx'),
+            models.Index(fields=['attorney', 'status', '-created_at'], name='legal_request_attorney_st_idx'),
+            models.Index(fields=['-created_at', '-id'], name='legal_request_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.client.user.email} - {self.title} ({self.status})"
@@ -67,15 +74,36 @@ class ClientAttorneyReview(models.Model):
         db_table = 'client_attorney_reviews'
         ordering = ['-created_at']
         unique_together = ['client', 'attorney', 'legal_request']
+        indexes = [
+            models.Index(fields=['attorney', '-created_at'], name='review_attorney_created_idx'),
+            models.Index(fields=['client', '-created_at'], name='review_client_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.client.user.email} - {self.attorney.user.email} ({self.rating} stars)"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the persisted rating so edits can be applied as a delta
+        instance._loaded_rating = getattr(instance, 'rating', None)
+        instance._loaded_attorney_id = getattr(instance, 'attorney_id', None)
+        return instance
+    
     def save(self, *args, **kwargs):
-        # Update attorney rating when a review is saved
-        super().save(*args, **kwargs)
-        attorney = self.attorney
-        reviews = ClientAttorneyReview.objects.filter(attorney=attorney)
-        attorney.ratings_count = reviews.count()
-        attorney.ratings_average = reviews.aggregate(models.Avg('rating'))['rating__avg'] or 0.0
-        attorney.save() 
\ No newline at end of file
+        # Update attorney rating aggregates incrementally when a review is saved
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                apply_rating_change(self.attorney_id, added=self.rating)
+            else:
+                old_attorney_id = getattr(self, '_loaded_attorney_id', self.attorney_id)
+                old_rating = getattr(self, '_loaded_rating', self.rating)
+                if old_attorney_id != self.attorney_id:
+                    apply_rating_change(old_attorney_id, removed=old_rating)
+                    apply_rating_change(self.attorney_id, added=self.rating)
+                elif old_rating != self.rating:
+                    apply_rating_change(self.attorney_id, added=self.rating, removed=old_rating)
+        self._loaded_rating = self.rating
+        self._loaded_attorney_id = self.attorney_id
@@ -52,6 +52,15 @@ class LegalRequestSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'client', 'created_at', 'updated_at']
 
 
+class LegalRequestSummarySerializer(serializers.ModelSerializer):
+    """Compact legal request for dashboard summaries."""
+    
+    class Meta:
+        model = LegalRequest
+        fields = ['id', 'client', 'attorney', 'title', 'status', 'is_pro_bono', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
 class LegalRequestUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = LegalRequest
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from apps.attorneys.ratings import apply_rating_change
+from .models import ClientAttorneyReview
+
+
+@receiver(post_delete, sender=ClientAttorneyReview)
+def remove_review_rating(sender, instance, **kwargs):
+    """
+    Signal to remove a deleted review from the attorney's rating aggregates.
+    
+    Handled as a signal rather than in delete() so that queryset deletes and
+    cascades from deleted clients are counted too.
+    """
+    rating = getattr(instance, '_loaded_rating', instance.rating)
+    attorney_id = getattr(instance, '_loaded_attorney_id', instance.attorney_id)
+    apply_rating_change(attorney_id, removed=rating)
@@ -5,6 +5,8 @@ from rest_framework import status
 from apps.users.models import User
 from .models import Client, LegalRequest, ClientAttorneyReview
 from apps.attorneys.models import Attorney
+from apps.attorneys.ratings import reconcile_ratings
+from decimal import Decimal
 import uuid
 
 
@@ -159,6 +161,65 @@ class ClientReviewModelTestCase(TestCase):
         self.assertEqual(self.attorney.ratings_average, 5.0)
 
 
+class ClientReviewRatingAggregateTestCase(TestCase):
+    """Test case for incrementally maintained attorney rating aggregates."""
+    
+    def setUp(self):
+        self.client_obj = User.objects.create_user(
+            email='client@example.com',
+            password='password123',
+            user_type='CLIENT'
+        ).client_details
+        self.attorney = User.objects.create_user(
+            email='attorney@example.com',
+            password='password123',
+            user_type='ATTORNEY'
+        ).attorney_details
+        self.review = ClientAttorneyReview.objects.create(
+            client=self.client_obj,
+            attorney=self.attorney,
+            rating=5
+        )
+    
+    def test_review_edit_and_delete_update_attorney_rating(self):
+        """Test that editing and deleting reviews adjust the rating aggregates."""
+        second_review = ClientAttorneyReview.objects.create(
+            client=self.client_obj,
+            attorney=self.attorney,
+            rating=2
+        )
+        self.attorney.refresh_from_db()
+        self.assertEqual(self.attorney.ratings_count, 2)
+        self.assertEqual(self.attorney.ratings_average, Decimal('3.50'))
+        
+        review = ClientAttorneyReview.objects.get(pk=second_review.pk)
+        review.rating = 4
+        review.save()
+        self.attorney.refresh_from_db()
+        self.assertEqual(self.attorney.ratings_count, 2)
+        self.assertEqual(self.attorney.ratings_sum, 9)
+        self.assertEqual(self.attorney.ratings_average, Decimal('4.50'))
+        self.assertEqual(self.attorney.ratings_histogram, {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+        
+        self.review.delete()
+        self.attorney.refresh_from_db()
+        self.assertEqual(self.attorney.ratings_count, 1)
+        self.assertEqual(self.attorney.ratings_average, Decimal('4.00'))
+        self.assertEqual(self.attorney.ratings_5_count, 0)
+    
+    def test_reconcile_ratings_fixes_drift(self):
+        """Test that reconciliation recomputes aggregates from reviews."""
+        Attorney.objects.filter(pk=self.attorney.pk).update(
+            ratings_count=7, ratings_sum=10, ratings_average=Decimal('1.43')
+        )
+        self.assertEqual(reconcile_ratings(), 1)
+        self.attorney.refresh_from_db()
+        self.assertEqual(self.attorney.ratings_count, 1)
+        self.assertEqual(self.attorney.ratings_sum, 5)
+        self.assertEqual(self.attorney.ratings_average, Decimal('5.00'))
+        self.assertEqual(reconcile_ratings(), 0)
+
+
 class ClientAPITestCase(APITestCase):
     """Test case for the Client API."""
     
@@ -296,6 +357,77 @@ class LegalRequestAPITestCase(APITestCase):
         self.assertEqual(response.data['status'], 'CANCELLED')
 
 
+class LegalRequestSummaryAPITestCase(APITestCase):
+    """Test case for the legal request status summary and status lists."""
+    
+    def setUp(self):
+        self.client_user = User.objects.create_user(
+            email='client@example.com',
+            password='password123',
+            user_type='CLIENT'
+        )
+        attorney_user = User.objects.create_user(
+            email='attorney@example.com',
+            password='password123',
+            user_type='ATTORNEY'
+        )
+        other_user = User.objects.create_user(
+            email='other@example.com',
+            password='password123',
+            user_type='CLIENT'
+        )
+        statuses = ['PENDING'] * 4 + ['COMPLETED'] * 2 + ['CANCELLED']
+        for index, request_status in enumerate(statuses):
+            LegalRequest.objects.create(
+                client=self.client_user.client_details,
+                attorney=attorney_user.attorney_details,
+                title=f'Request {index}',
+                description='Description',
+                status=request_status
+            )
+        LegalRequest.objects.create(
+            client=other_user.client_details,
+            attorney=attorney_user.attorney_details,
+            title='Other client',
+            description='Description'
+        )
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(user=self.client_user)
+        self.summary_url = reverse('clients:legal-request-summary')
+    
+    def test_summary_counts_and_recent(self):
+        """Test that the summary counts every status and returns the latest rows in two queries."""
+        with self.assertNumQueries(2):
+            response = self.api_client.get(self.summary_url, {'recent': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 7)
+        self.assertEqual(response.data['counts']['PENDING'], 4)
+        self.assertEqual(response.data['counts']['ACCEPTED'], 0)
+        
+        pending = response.data['recent']['PENDING']
+        expected = LegalRequest.objects.filter(
+            client=self.client_user.client_details, status='PENDING'
+        ).order_by('-created_at', '-id').values_list('id', flat=True)[:3]
+        self.assertEqual([row['id'] for row in pending], [str(pk) for pk in expected])
+        self.assertEqual(len(response.data['recent']['COMPLETED']), 2)
+        self.assertEqual(response.data['recent']['ACCEPTED'], [])
+    
+    def test_summary_rejects_invalid_recent(self):
+        """Test that a non-integer recent parameter is rejected."""
+        response = self.api_client.get(self.summary_url, {'recent': 'many'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_status_list_is_paginated(self):
+        """Test that status lists are returned a page at a time."""
+        url = reverse('clients:legal-request-pending')
+        response = self.api_client.get(url, {'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        response = self.api_client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+
 class ClientAttorneyReviewAPITestCase(APITestCase):
     """Test case for the ClientAttorneyReview API."""
     
@@ -1,6 +1,8 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
 from .models import Client, LegalRequest, ClientAttorneyReview
 from .serializers import (
     ClientSerializer, 
@@ -8,12 +10,23 @@ from .serializers import (
     LegalRequestSerializer, 
     LegalRequestCreateSerializer,
     LegalRequestUpdateSerializer,
+    LegalRequestSummarySerializer,
     ClientAttorneyReviewSerializer
 )
 from apps.users.permissions import IsClient, IsClientOwner, IsAttorney
+from apps.users.mixins import QueryPlan, QueryPlanMixin
+from apps.users.pagination import KeysetPagination
 
 
-class ClientViewSet(viewsets.ModelViewSet):
+# Relations walked by the nested UserSerializer
+USER_RELATIONS = ['user', 'user__client_profile', 'user__attorney_profile']
+
+# Most recent legal requests returned per status by the summary action
+SUMMARY_RECENT_DEFAULT = 5
+SUMMARY_RECENT_MAX = 20
+
+
+class ClientViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     """
     API endpoint for client profile management.
     
@@ -30,6 +43,10 @@ class ClientViewSet(viewsets.ModelViewSet):
     serializer_class = ClientSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    query_plans = {
+        'default': QueryPlan(select_related=USER_RELATIONS),
+    }
+    
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return ClientDetailSerializer
@@ -47,10 +64,11 @@ class ClientViewSet(viewsets.ModelViewSet):
             return Client.objects.none()
             
         user = self.request.user
+        queryset = self.apply_query_plan(Client.objects.all())
         if user.is_superuser or user.user_type == 'ADMIN':
-            return Client.objects.all()
+            return queryset
         elif user.user_type == 'CLIENT':
-            return Client.objects.filter(user=user)
+            return queryset.filter(user=user)
         return Client.objects.none()
     
     @action(detail=False, methods=['get'])
@@ -63,7 +81,7 @@ class ClientViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            client = Client.objects.get(user=request.user)
+            client = self.apply_query_plan(Client.objects.all()).get(user=request.user)
             serializer = ClientDetailSerializer(client)
             return Response(serializer.data)
         except Client.DoesNotExist:
@@ -73,7 +91,7 @@ class ClientViewSet(viewsets.ModelViewSet):
             )
 
 
-class LegalRequestViewSet(viewsets.ModelViewSet):
+class LegalRequestViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     """
     API endpoint for legal requests management.
     
@@ -98,12 +116,27 @@ class LegalRequestViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'description', 'status']
     ordering_fields = ['created_at', 'updated_at', 'status']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    query_plans = {
+        'default': QueryPlan(
+            select_related=(
+                ['client__' + relation for relation in USER_RELATIONS]
+                + ['attorney__' + relation for relation in USER_RELATIONS]
+            ),
+            prefetch_related=['attorney__specialties'],
+        ),
+        # Dashboard rows carry ids rather than nested profiles
+        'summary': QueryPlan(only=LegalRequestSummarySerializer.Meta.fields),
+    }
     
     def get_serializer_class(self):
         if self.action == 'create':
             return LegalRequestCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return LegalRequestUpdateSerializer
+        elif self.action == 'summary':
+            return LegalRequestSummarySerializer
         return LegalRequestSerializer
     
     def get_queryset(self):
@@ -113,48 +146,90 @@ class LegalRequestViewSet(viewsets.ModelViewSet):
             return LegalRequest.objects.none()
             
         user = self.request.user
+        queryset = self.apply_query_plan(LegalRequest.objects.all())
         if user.is_superuser or user.user_type == 'ADMIN':
-            return LegalRequest.objects.all()
+            return queryset
         elif user.user_type == 'CLIENT':
-            return LegalRequest.objects.filter(client__user=user)
+            return queryset.filter(client__user=user)
         elif user.user_type == 'ATTORNEY':
-            return LegalRequest.objects.filter(attorney__user=user)
+            return queryset.filter(attorney__user=user)
         return LegalRequest.objects.none()
     
+    def list_status(self, status_value):
+        """Paginated legal requests in ``status_value``."""
+        queryset = self.get_queryset().filter(status=status_value)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+    
     @action(detail=False, methods=['get'])
     def pending(self, request):
         """Get current client's pending legal requests."""
-        queryset = self.get_queryset().filter(status='PENDING')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.list_status('PENDING')
     
     @action(detail=False, methods=['get'])
     def accepted(self, request):
         """Get current client's accepted legal requests."""
-        queryset = self.get_queryset().filter(status='ACCEPTED')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.list_status('ACCEPTED')
     
     @action(detail=False, methods=['get'])
     def in_progress(self, request):
         """Get current client's in-progress legal requests."""
-        queryset = self.get_queryset().filter(status='IN_PROGRESS')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.list_status('IN_PROGRESS')
     
     @action(detail=False, methods=['get'])
     def completed(self, request):
         """Get current client's completed legal requests."""
-        queryset = self.get_queryset().filter(status='COMPLETED')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.list_status('COMPLETED')
     
     @action(detail=False, methods=['get'])
     def cancelled(self, request):
         """Get current client's cancelled legal requests."""
-        queryset = self.get_queryset().filter(status='CANCELLED')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.list_status('CANCELLED')
+    
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Get per-status counts and the most recent requests in each status.
+        
+        Two queries whatever the number of statuses: a grouped count and a
+        ``ROW_NUMBER()`` window over each status partition, limited to
+        ``?recent=`` rows per status.
+        """
+        try:
+            recent = int(request.query_params.get('recent', SUMMARY_RECENT_DEFAULT))
+        except ValueError:
+            return Response(
+                {"detail": "recent must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        recent = max(0, min(recent, SUMMARY_RECENT_MAX))
+        
+        queryset = self.get_queryset()
+        counts = {choice: 0 for choice, _ in LegalRequest.STATUS_CHOICES}
+        for row in queryset.order_by().values('status').annotate(count=Count('id')):
+            counts[row['status']] = row['count']
+        
+        latest = {choice: [] for choice in counts}
+        if recent:
+            ranked = queryset.annotate(
+                status_rank=Window(
+                    RowNumber(),
+                    partition_by=[F('status')],
+                    order_by=[F('created_at').desc(), F('id').desc()],
+                )
+            ).filter(status_rank__lte=recent).order_by('status', 'status_rank')
+            for legal_request in self.get_serializer(ranked, many=True).data:
+                latest[legal_request['status']].append(legal_request)
+        
+        return Response({
+            'total': sum(counts.values()),
+            'counts': counts,
+            'recent': latest,
+        })
     
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -175,7 +250,7 @@ class LegalRequestViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ClientAttorneyReviewViewSet(viewsets.ModelViewSet):
+class ClientAttorneyReviewViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     """
     API endpoint for client reviews of attorneys.
     
@@ -196,6 +271,10 @@ class ClientAttorneyReviewViewSet(viewsets.ModelViewSet):
     """
     serializer_class = ClientAttorneyReviewSerializer
     permission_classes = [permissions.IsAuthenticated, IsClient]
+    query_plans = {
+        # The serializer renders client, attorney and legal request via __str__
+        'default': QueryPlan(select_related=['client__user', 'attorney__user', 'legal_request__client__user']),
+    }
     
     def get_queryset(self):
         # Check if this is being called for Swagger schema generation
@@ -204,12 +283,13 @@ class ClientAttorneyReviewViewSet(viewsets.ModelViewSet):
             return ClientAttorneyReview.objects.none()
             
         user = self.request.user
+        queryset = self.apply_query_plan(ClientAttorneyReview.objects.all())
         if user.is_superuser or user.user_type == 'ADMIN':
-            return ClientAttorneyReview.objects.all()
+            return queryset
         elif user.user_type == 'CLIENT':
-            return ClientAttorneyReview.objects.filter(client__user=user)
+            return queryset.filter(client__user=user)
         elif user.user_type == 'ATTORNEY':
-            return ClientAttorneyReview.objects.filter(attorney__user=user)
+            return queryset.filter(attorney__user=user)
         return ClientAttorneyReview.objects.none()
     
     def perform_create(self, serializer):
@@ -225,6 +305,6 @@ class ClientAttorneyReviewViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        queryset = ClientAttorneyReview.objects.filter(attorney_id=attorney_id)
+        queryset = self.apply_query_plan(ClientAttorneyReview.objects.filter(attorney_id=attorney_id))
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data) 
\ No newline at end of file
@@ -0,0 +1,270 @@
+"""
+Batched audit sink for ``UserActivity`` events.
+
+Auth views and signals call ``log_activity()`` instead of
+``UserActivity.objects.create()``. Events are handed to the sink configured
+by the ``AUDIT_LOG`` setting:
+
+``sync``
+    Insert each event immediately. Used by the test settings.
+``buffered``
+    Keep events in process memory and ``bulk_create`` them once
+    ``BATCH_SIZE`` events are waiting or the oldest is ``FLUSH_INTERVAL``
+    seconds old. The buffer is flushed at interpreter exit and on Celery
+    worker shutdown.
+``redis``
+    Push events onto a Redis list so they survive the web process, and drain
+    it in batches when it reaches ``BATCH_SIZE`` or from the periodic
+    ``flush_audit_log`` task.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import User, UserActivity
+
+logger = logging.getLogger('django')
+
+DEFAULTS = {
+    'BACKEND': 'buffered',
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 5,
+    'REDIS_URL': None,
+    'REDIS_KEY': 'audit:user_activities',
+}
+
+
+def get_audit_settings():
+    return {**DEFAULTS, **getattr(settings, 'AUDIT_LOG', {})}
+
+
+def write_activities(activities):
+    """
+    Insert ``activities`` in one ``bulk_create``.
+
+    Events whose user has been deleted since they were logged are dropped
+    rather than failing the whole batch.
+    """
+    if not activities:
+        return 0
+    try:
+        with transaction.atomic():
+            UserActivity.objects.bulk_create(activities)
+        return len(activities)
+    except IntegrityError:
+        existing = set(
+            User.objects.filter(pk__in={activity.user_id for activity in activities}).values_list('pk', flat=True)
+        )
+        kept = [activity for activity in activities if activity.user_id in existing]
+        if len(kept) < len(activities):
+            logger.warning(f"Dropped {len(activities) - len(kept)} audit events for deleted users")
+        UserActivity.objects.bulk_create(kept)
+        return len(kept)
+
+
+class SyncAuditSink:
+    """Write every event as it is logged."""
+
+    def emit(self, activity):
+        write_activities([activity])
+
+    def flush(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+class BufferedAuditSink:
+    """Buffer events in process memory and write them in batches."""
+
+    def __init__(self, batch_size, flush_interval):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_timer(self):
+        # Threads don't survive fork, so start one per worker process
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='audit-log-flusher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            if self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval:
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("Failed to flush audit log buffer")
+
+    def emit(self, activity):
+        with self._lock:
+            self._buffer.append(activity)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+        else:
+            self._ensure_timer()
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer, self._oldest = self._buffer, [], None
+        try:
+            return write_activities(batch)
+        except Exception:
+            # Put the batch back so a later flush can retry it
+            with self._lock:
+                self._buffer[:0] = batch
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+            raise
+
+    def close(self):
+        self._stopped.set()
+        self.flush()
+
+
+class RedisAuditSink:
+    """Queue events on a Redis list shared by all processes."""
+
+    def __init__(self, batch_size, redis_url, key):
+        import redis
+
+        self.batch_size = batch_size
+        self.key = key
+        self.redis = redis.Redis.from_url(redis_url)
+
+    @staticmethod
+    def serialize(activity):
+        return json.dumps({
+            'id': str(activity.id),
+            'user_id': str(activity.user_id),
+            'activity_type': activity.activity_type,
+            'ip_address': activity.ip_address,
+            'user_agent': activity.user_agent,
+            'timestamp': activity.timestamp.isoformat(),
+            'details': activity.details,
+        })
+
+    @staticmethod
+    def deserialize(payload):
+        data = json.loads(payload)
+        data['timestamp'] = parse_datetime(data['timestamp'])
+        return UserActivity(**data)
+
+    def emit(self, activity):
+        if self.redis.rpush(self.key, self.serialize(activity)) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        written = 0
+        while True:
+            # Take a batch off the head of the list atomically
+            with self.redis.pipeline() as pipe:
+                pipe.lrange(self.key, 0, self.batch_size - 1)
+                pipe.ltrim(self.key, self.batch_size, -1)
+                payloads, _ = pipe.execute()
+            if not payloads:
+                return written
+            activities = [self.deserialize(payload) for payload in payloads]
+            try:
+                written += write_activities(activities)
+            except Exception:
+                self.redis.lpush(self.key, *reversed(payloads))
+                raise
+            if len(payloads) < self.batch_size:
+                return written
+
+    def close(self):
+        pass
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def build_audit_sink(config=None):
+    config = config or get_audit_settings()
+    backend = config['BACKEND']
+    if backend == 'sync':
+        return SyncAuditSink()
+    if backend == 'buffered':
+        return BufferedAuditSink(config['BATCH_SIZE'], config['FLUSH_INTERVAL'])
+    if backend == 'redis':
+        redis_url = config['REDIS_URL'] or settings.CELERY_BROKER_URL
+        return RedisAuditSink(config['BATCH_SIZE'], redis_url, config['REDIS_KEY'])
+    raise ValueError(f"Unknown AUDIT_LOG backend: {backend}")
+
+
+def get_audit_sink():
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = build_audit_sink()
+    return _sink
+
+
+def flush_audit_log():
+    """Write any buffered events now. Returns the number written."""
+    return get_audit_sink().flush()
+
+
+def close_audit_sink():
+    global _sink
+    with _sink_lock:
+        sink, _sink = _sink, None
+    if sink is not None:
+        sink.close()
+
+
+def log_activity(user, activity_type, ip_address=None, user_agent=None, details=None):
+    """Record a ``UserActivity`` event through the configured audit sink."""
+    # Keep only the id so buffered events don't pin user instances in memory
+    activity = UserActivity(
+        id=uuid.uuid4(),
+        user_id=user.pk,
+        activity_type=activity_type,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        timestamp=timezone.now(),
+        details=details,
+    )
+    get_audit_sink().emit(activity)
+    return activity
+
+
+atexit.register(close_audit_sink)
+
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def flush_on_worker_shutdown(**kwargs):
+    close_audit_sink()
+
+
+@receiver(setting_changed)
+def reset_audit_sink(setting, **kwargs):
+    if setting == 'AUDIT_LOG':
+        close_audit_sink()
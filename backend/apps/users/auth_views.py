@@ -1,18 +1,20 @@
 from rest_framework import status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import ClaimsRefreshToken
 from rest_framework.decorators import api_view, permission_classes
 from django.contrib.auth import get_user_model
 from .serializers import (
     UserRegistrationSerializer, UserSerializer, CustomTokenObtainPairSerializer,
     ClientRegistrationSerializer, AttorneyRegistrationSerializer
 )
-from .models import UserActivity
+from .audit import log_activity
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .utils import create_verification_token, send_verification_email, verify_email_token
+from .utils import (
+    create_verification_token, get_or_create_verification_token, send_verification_email, verify_email_token
+)
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 import logging
 
@@ -52,10 +54,10 @@ class RegisterView(APIView):
             user = serializer.save()
             
             # Create tokens for the user
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             
             # Log the activity
-            UserActivity.objects.create(
+            log_activity(
                 user=user,
                 activity_type='REGISTRATION',
                 ip_address=self.get_client_ip(request),
@@ -131,7 +133,7 @@ class CustomTokenObtainPairView(TokenObtainPairView):
                 client_ip = self.get_client_ip(request)
                 user_agent = request.META.get('HTTP_USER_AGENT', '')
                 
-                UserActivity.objects.create(
+                log_activity(
                     user=user,
                     activity_type='LOGIN',
                     ip_address=client_ip,
@@ -223,11 +225,11 @@ class LogoutView(APIView):
                 logger.warning(f"Logout failed: No refresh token provided - User: {request.user.email}")
                 return Response({"detail": "Refresh token is required."}, status=status.HTTP_400_BAD_REQUEST)
                 
-            token = RefreshToken(refresh_token)
+            token = ClaimsRefreshToken(refresh_token)
             token.blacklist()
             
             # Log the activity
-            UserActivity.objects.create(
+            log_activity(
                 user=request.user,
                 activity_type='LOGOUT',
                 ip_address=self.get_client_ip(request),
@@ -318,7 +320,7 @@ def change_password(request):
     
     # Log the activity
     client_ip = get_client_ip(request)
-    UserActivity.objects.create(
+    log_activity(
         user=user,
         activity_type='PASSWORD_CHANGE',
         ip_address=client_ip,
@@ -356,7 +358,7 @@ def toggle_mfa(request):
     
     # Log the activity
     client_ip = get_client_ip(request)
-    UserActivity.objects.create(
+    log_activity(
         user=user,
         activity_type=f"MFA_{'ENABLED' if user.mfa_enabled else 'DISABLED'}",
         ip_address=client_ip,
@@ -415,7 +417,7 @@ class ClientRegistrationView(APIView):
             user = serializer.save()
             
             # Create tokens for the user
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             
             # Set verification status based on probono request
             client_profile = user.client_details
@@ -427,7 +429,7 @@ class ClientRegistrationView(APIView):
                 verification_message = "Your account has been created successfully. Please check your email to verify your account."
             
             # Log the activity
-            UserActivity.objects.create(
+            log_activity(
                 user=user,
                 activity_type='CLIENT_REGISTRATION',
                 ip_address=self.get_client_ip(request),
@@ -498,13 +500,13 @@ class AttorneyRegistrationView(APIView):
             user = serializer.save()
             
             # Create tokens for the user
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             
             # Attorney accounts always start with pending verification
             verification_message = "Your account has been created successfully. Your credentials are pending verification by administrators. Please check your email to verify your account."
             
             # Log the activity
-            UserActivity.objects.create(
+            log_activity(
                 user=user,
                 activity_type='ATTORNEY_REGISTRATION',
                 ip_address=self.get_client_ip(request),
@@ -642,15 +644,15 @@ def resend_verification(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create and send verification token
-        token = create_verification_token(user)
+        # Resend the outstanding token, or a fresh one if it is about to expire
+        token = get_or_create_verification_token(user)
         send_verification_email(user, token)
         
         # Log the activity
         client_ip = get_client_ip(request)
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         
-        UserActivity.objects.create(
+        log_activity(
             user=user,
             activity_type='VERIFICATION_EMAIL_RESENT',
             ip_address=client_ip,
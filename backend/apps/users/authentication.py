@@ -0,0 +1,278 @@
+"""
+JWT authentication with embedded claims and a cached user lookup.
+
+Tokens issued through ``ClaimsRefreshToken.for_user`` carry the user's
+``user_type``, ``verification_status`` and profile ids (``client_id``,
+``attorney_id``) next to ``user_id``; access tokens copy them from their
+refresh token. Profile ids never change, so object permissions can use them
+without a query (see ``apps.users.ownership``). Type and status are a
+snapshot taken at login; views still read the live values from
+``request.user``.
+
+``CachedJWTAuthentication`` resolves ``request.user`` through ``UserCache``
+rather than a query per request:
+
+* a process-local tier, ``LOCAL_TTL`` seconds (short, because other
+  processes cannot clear it), then
+* the shared cache named by ``CACHE_ALIAS`` (Redis in production),
+  ``SHARED_TTL`` seconds,
+
+and only then the database, loading the user together with every profile
+``UserSerializer`` and the permissions touch. Saving or deleting a user or one
+of its profiles invalidates both tiers (see ``apps.users.signals``); writes
+that bypass signals, such as ``QuerySet.update()``, show up once the entries
+expire.
+
+The tiers hold a projection of the user's and profiles' columns rather than
+model instances, and never the password hash: the user is rebuilt with
+``password`` deferred (loaded on first access, e.g. by ``check_password``,
+and left alone by ``save()``), and revoke checks compare a digest of it.
+When the shared cache is not shared between processes (``LocMemCache``),
+other processes cannot see its invalidations, so it keeps entries only for
+``LOCAL_TTL``.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ValidationError
+from django.core.signals import setting_changed
+from django.db import router, transaction
+from django.db.models.fields.files import FieldFile
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .blacklist import CachedBlacklistMixin
+from .models import User
+
+DEFAULTS = {
+    'LOCAL_TTL': 5,
+    'LOCAL_MAX_SIZE': 10000,
+    'SHARED_TTL': 300,
+    'CACHE_ALIAS': 'default',
+}
+
+CACHE_KEY_PREFIX = 'users:auth_user:'
+
+# Relations loaded with a cached user: profiles read by UserSerializer and the permissions
+USER_RELATIONS = ('client_details', 'attorney_details', 'client_profile', 'attorney_profile')
+
+# Columns kept out of the cache; the user is rebuilt with them deferred
+UNCACHED_FIELDS = ('password',)
+
+PROFILE_CLAIMS = {
+    'client_id': 'client_details',
+    'attorney_id': 'attorney_details',
+}
+
+
+def get_user_cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'USER_CACHE', {})}
+
+
+def user_claims(user):
+    """Claims embedded in tokens issued for ``user``."""
+    claims = {
+        'user_type': user.user_type,
+        'verification_status': user.verification_status,
+    }
+    for claim, accessor in PROFILE_CLAIMS.items():
+        profile = getattr(user, accessor, None)
+        claims[claim] = str(profile.pk) if profile is not None else None
+    return claims
+
+
+class ClaimsRefreshToken(CachedBlacklistMixin, RefreshToken):
+    """
+    Refresh token (and derived access tokens) carrying ``user_claims``, with
+    blacklist checks going through ``apps.users.blacklist``.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, value in user_claims(user).items():
+            token[claim] = value
+        return token
+
+
+def cache_is_shared(cache):
+    """Whether other processes read and write the same entries as ``cache``."""
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def _columns(instance, exclude=()):
+    values = {}
+    for field in instance._meta.concrete_fields:
+        if field.attname in exclude:
+            continue
+        value = getattr(instance, field.attname)
+        values[field.attname] = value.name if isinstance(value, FieldFile) else value
+    return values
+
+
+def _from_columns(model, values):
+    return model.from_db(router.db_for_read(model), list(values), list(values.values()))
+
+
+def project_user(user):
+    """Cacheable projection of ``user`` and its ``USER_RELATIONS`` profiles, without the password."""
+    relations = {}
+    for accessor in USER_RELATIONS:
+        profile = getattr(user, accessor, None)
+        relations[accessor] = _columns(profile) if profile is not None else None
+    return {
+        'user': _columns(user, UNCACHED_FIELDS),
+        'password_digest': get_md5_hash_password(user.password),
+        'relations': relations,
+    }
+
+
+def restore_user(projection):
+    """A ``User`` rebuilt from ``project_user``, with its profiles cached and ``password`` deferred."""
+    user = _from_columns(User, projection['user'])
+    user.password_digest = projection['password_digest']
+    for accessor, values in projection['relations'].items():
+        relation = User._meta.get_field(accessor)
+        profile = _from_columns(relation.related_model, values) if values is not None else None
+        relation.set_cached_value(user, profile)
+        if profile is not None:
+            relation.field.set_cached_value(profile, user)
+    return user
+
+
+class UserCache:
+    """Two-tier cache of user projections keyed by id."""
+
+    def __init__(self, local_ttl, local_max_size, shared_ttl, cache_alias):
+        self.local_ttl = local_ttl
+        self.local_max_size = local_max_size
+        self.shared = caches[cache_alias] if cache_alias else None
+        if self.shared is not None and not cache_is_shared(self.shared):
+            # Invalidations only reach this process, like the local tier's
+            shared_ttl = min(shared_ttl, local_ttl)
+        self.shared_ttl = shared_ttl
+        self._local = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(user_id):
+        return f'{CACHE_KEY_PREFIX}{user_id}'
+
+    def _get_local(self, user_id):
+        with self._lock:
+            entry = self._local.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._local[user_id]
+                return None
+            return entry[1]
+
+    def _set_local(self, user_id, projection):
+        if not self.local_ttl:
+            return
+        with self._lock:
+            if len(self._local) >= self.local_max_size:
+                now = time.monotonic()
+                self._local = {key: entry for key, entry in self._local.items() if entry[0] > now}
+                while len(self._local) >= self.local_max_size:
+                    # Dicts keep insertion order, so this drops the oldest entry
+                    del self._local[next(iter(self._local))]
+            self._local[user_id] = (time.monotonic() + self.local_ttl, projection)
+
+    def load(self, user_id):
+        return User.objects.select_related(*USER_RELATIONS).get(pk=user_id)
+
+    def get(self, user_id):
+        """
+        The user with ``user_id``, or raise ``User.DoesNotExist``.
+
+        Returns a new instance, so callers may modify it without affecting
+        other requests.
+        """
+        user_id = str(user_id)
+        projection = self._get_local(user_id)
+        if projection is None and self.shared is not None:
+            projection = self.shared.get(self.key(user_id))
+            if projection is not None:
+                self._set_local(user_id, projection)
+        if projection is None:
+            projection = project_user(self.load(user_id))
+            if self.shared is not None and self.shared_ttl:
+                self.shared.set(self.key(user_id), projection, self.shared_ttl)
+            self._set_local(user_id, projection)
+        return restore_user(projection)
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            self._local.pop(user_id, None)
+        if self.shared is not None:
+            self.shared.delete(self.key(user_id))
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+
+_user_cache = None
+_user_cache_lock = threading.Lock()
+
+
+def get_user_cache():
+    global _user_cache
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                config = get_user_cache_settings()
+                _user_cache = UserCache(
+                    config['LOCAL_TTL'], config['LOCAL_MAX_SIZE'], config['SHARED_TTL'], config['CACHE_ALIAS']
+                )
+    return _user_cache
+
+
+def invalidate_cached_user(user_id):
+    """Drop ``user_id`` from the user cache now and again when the transaction commits."""
+    user_cache = get_user_cache()
+    user_cache.invalidate(user_id)
+    # A request reading the old row before the commit could otherwise re-cache it
+    transaction.on_commit(lambda: user_cache.invalidate(user_id))
+
+
+@receiver(setting_changed)
+def reset_user_cache(setting, **kwargs):
+    global _user_cache
+    if setting in ('USER_CACHE', 'CACHES'):
+        _user_cache = None
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that reads users through ``UserCache``."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from exc
+
+        try:
+            user = get_user_cache().get(user_id)
+        except (User.DoesNotExist, ValidationError) as exc:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from exc
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != user.password_digest:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -0,0 +1,360 @@
+"""
+Fast refresh-token blacklist checks.
+
+simplejwt checks every refresh against ``BlacklistedToken`` joined to the
+ever-growing ``OutstandingToken`` table. With the layer configured by the
+``TOKEN_BLACKLIST`` setting, blacklisted JTIs are also written to a shared
+store, and each process keeps a Bloom filter of them:
+
+* a JTI the filter has never seen is not blacklisted, with no database query
+  and no store lookup beyond the incremental sync;
+* a filter hit (blacklisted, or a false positive at ``ERROR_RATE``) is
+  confirmed against the store.
+
+Before answering, the filter pulls in the JTIs other processes added since
+its last sync (every call when ``SYNC_INTERVAL`` is 0, so a logout is seen
+everywhere at once). It is rebuilt from the store every ``REBUILD_INTERVAL``
+seconds, which also drops expired tokens, since Bloom filters cannot delete,
+and whenever it holds more entries than it was sized for.
+
+The store is only as complete as what was written to it, so it is seeded
+from the unexpired ``BlacklistedToken`` rows when a filter is built and the
+store has not been seeded yet: on first use after a deploy, and after Redis
+lost its data. Rows written outside ``CachedBlacklistMixin`` (e.g. by the
+simplejwt admin) are added when they are saved (see ``apps.users.signals``).
+A filter hit that the store does not confirm is checked in the database,
+since the store may have lost the entry since the filter was built.
+
+Backends:
+
+``redis``
+    A sorted set of JTIs scored by the time they were blacklisted. Entries
+    older than the refresh token lifetime are purged, as the tokens have
+    expired by then.
+``memory``
+    The same in process memory; only for single-process use and tests.
+``database``
+    No layer: simplejwt's own database check.
+
+``BlacklistedToken`` rows are still written, so the admin and
+``flushexpiredtokens`` keep working. ``purge_expired_tokens`` deletes expired
+``OutstandingToken`` rows (and their blacklist entries) in batches.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+logger = logging.getLogger('django')
+
+DEFAULTS = {
+    'BACKEND': 'database',
+    'REDIS_URL': None,
+    'REDIS_KEY': 'auth:token_blacklist',
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.001,
+    'SYNC_INTERVAL': 0,
+    'REBUILD_INTERVAL': 3600,
+    'PURGE_BATCH_SIZE': 1000,
+}
+
+
+def get_blacklist_settings():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_BLACKLIST', {})}
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # Double hashing: two 64-bit halves of one digest give every position
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hash_count)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class MemoryBlacklistStore:
+    """Blacklisted JTIs in process memory."""
+
+    def __init__(self):
+        self._added = {}
+        self._seeded = False
+        self._lock = threading.Lock()
+
+    def add(self, jti, added_at):
+        with self._lock:
+            self._added[jti] = added_at
+
+    def is_seeded(self):
+        return self._seeded
+
+    def seed(self, entries):
+        with self._lock:
+            for jti, added_at in entries:
+                self._added.setdefault(jti, added_at)
+            self._seeded = True
+
+    def contains(self, jti):
+        return jti in self._added
+
+    def added_since(self, since):
+        with self._lock:
+            return [jti for jti, added_at in self._added.items() if added_at > since]
+
+    def purge(self, before):
+        with self._lock:
+            expired = [jti for jti, added_at in self._added.items() if added_at < before]
+            for jti in expired:
+                del self._added[jti]
+        return len(expired)
+
+
+class RedisBlacklistStore:
+    """Blacklisted JTIs in a Redis sorted set scored by the time they were added."""
+
+    def __init__(self, redis_url, key, batch_size=1000):
+        import redis
+
+        self.key = key
+        self.seeded_key = f'{key}:seeded'
+        self.batch_size = batch_size
+        self.redis = redis.Redis.from_url(redis_url)
+
+    def _expire(self, pipe):
+        # Nothing stays relevant longer than a refresh token lives
+        lifetime = int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()) + 60
+        pipe.expire(self.key, lifetime)
+        pipe.expire(self.seeded_key, lifetime)
+
+    def add(self, jti, added_at):
+        with self.redis.pipeline() as pipe:
+            pipe.zadd(self.key, {jti: added_at})
+            self._expire(pipe)
+            pipe.execute()
+
+    def is_seeded(self):
+        return bool(self.redis.exists(self.seeded_key))
+
+    def seed(self, entries):
+        batch = {}
+        for jti, added_at in entries:
+            batch[jti] = added_at
+            if len(batch) >= self.batch_size:
+                # nx: keep the time of entries added meanwhile, which other processes sync from
+                self.redis.zadd(self.key, batch, nx=True)
+                batch = {}
+        with self.redis.pipeline() as pipe:
+            if batch:
+                pipe.zadd(self.key, batch, nx=True)
+            # The marker expires with the set, so losing one loses both and triggers a new seed
+            pipe.set(self.seeded_key, 1)
+            self._expire(pipe)
+            pipe.execute()
+
+    def contains(self, jti):
+        return self.redis.zscore(self.key, jti) is not None
+
+    def added_since(self, since):
+        return [jti.decode() for jti in self.redis.zrangebyscore(self.key, f'({since}', '+inf')]
+
+    def purge(self, before):
+        return self.redis.zremrangebyscore(self.key, '-inf', f'({before}')
+
+
+def blacklisted_in_database():
+    """``(jti, blacklisted_at timestamp)`` of every blacklisted token that has not expired."""
+    rows = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now()).values_list(
+        'token__jti', 'blacklisted_at'
+    )
+    for jti, blacklisted_at in rows.iterator(chunk_size=2000):
+        yield jti, blacklisted_at.timestamp()
+
+
+class TokenBlacklist:
+    """Process-local Bloom filter in front of a shared blacklist store."""
+
+    def __init__(self, store, capacity, error_rate, sync_interval, rebuild_interval):
+        self.store = store
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self._filter = None
+        self._built_at = 0
+        self._synced_at = 0
+        self._cursor = 0
+
+    def _rebuild(self, now):
+        """Build a filter of the whole store, seeding the store first if needed, and swap it in."""
+        if not self.store.is_seeded():
+            self.store.seed(blacklisted_in_database())
+        cursor = time.time()
+        jtis = self.store.added_since(0)
+        # Room to grow before the filter fills up and is rebuilt again
+        bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        # Readers use the filter without the lock, so they only ever see a complete one
+        self._filter = bloom
+        self._cursor = cursor
+        self._built_at = now
+        self._synced_at = now
+
+    def sync(self):
+        """Add JTIs blacklisted by any process since the last sync to the filter."""
+        now = time.monotonic()
+        with self._lock:
+            if (
+                self._filter is None
+                or now - self._built_at >= self.rebuild_interval
+                or self._filter.count >= self._filter.capacity
+            ):
+                self._rebuild(now)
+                return
+            if now - self._synced_at < self.sync_interval:
+                return
+            cursor = time.time()
+            # Overlap by a second so entries written with a slightly skewed clock are not missed
+            for jti in self.store.added_since(self._cursor - 1):
+                self._filter.add(jti)
+            self._cursor = cursor
+            self._synced_at = now
+
+    def add(self, jti):
+        self.store.add(jti, time.time())
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+
+    def contains(self, jti):
+        self.sync()
+        if jti not in self._filter:
+            return False
+        if self.store.contains(jti):
+            return True
+        # A false positive, or an entry the store lost since the filter was built
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def purge(self):
+        """Drop entries whose tokens have expired from the store."""
+        lifetime = api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+        return self.store.purge(time.time() - lifetime)
+
+
+_blacklist = None
+_blacklist_lock = threading.Lock()
+
+
+def build_token_blacklist(config=None):
+    config = config or get_blacklist_settings()
+    backend = config['BACKEND']
+    if backend == 'database':
+        return None
+    if backend == 'memory':
+        store = MemoryBlacklistStore()
+    elif backend == 'redis':
+        store = RedisBlacklistStore(
+            config['REDIS_URL'] or settings.CELERY_BROKER_URL, config['REDIS_KEY'], config['PURGE_BATCH_SIZE']
+        )
+    else:
+        raise ValueError(f"Unknown TOKEN_BLACKLIST backend: {backend}")
+    return TokenBlacklist(
+        store, config['CAPACITY'], config['ERROR_RATE'], config['SYNC_INTERVAL'], config['REBUILD_INTERVAL']
+    )
+
+
+def get_token_blacklist():
+    """The configured ``TokenBlacklist``, or None when the database is checked directly."""
+    global _blacklist
+    if _blacklist is None:
+        with _blacklist_lock:
+            if _blacklist is None:
+                _blacklist = build_token_blacklist() or False
+    return _blacklist or None
+
+
+@receiver(setting_changed)
+def reset_token_blacklist(setting, **kwargs):
+    global _blacklist
+    if setting == 'TOKEN_BLACKLIST':
+        _blacklist = None
+
+
+class CachedBlacklistMixin:
+    """Token mixin routing simplejwt's blacklist checks through ``TokenBlacklist``."""
+
+    def check_blacklist(self):
+        blacklist = get_token_blacklist()
+        if blacklist is None:
+            return super().check_blacklist()
+        jti = self.payload[api_settings.JTI_CLAIM]
+        try:
+            blacklisted = blacklist.contains(jti)
+        except Exception:
+            logger.exception("Token blacklist store unavailable, checking the database")
+            return super().check_blacklist()
+        if blacklisted:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        blacklist = get_token_blacklist()
+        if blacklist is not None:
+            # Let failures propagate: a JTI missing from the store would pass other processes' checks
+            blacklist.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+
+def purge_expired_tokens(batch_size=None):
+    """
+    Delete expired ``OutstandingToken`` rows (and their ``BlacklistedToken``
+    rows) in batches, and expired entries from the blacklist store.
+
+    Returns the number of outstanding tokens deleted.
+    """
+    batch_size = batch_size or get_blacklist_settings()['PURGE_BATCH_SIZE']
+    now = timezone.now()
+    deleted = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lt=now)
+            .order_by('expires_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        BlacklistedToken.objects.filter(token_id__in=ids).delete()
+        deleted += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+
+    blacklist = get_token_blacklist()
+    if blacklist is not None:
+        blacklist.purge()
+    return deleted
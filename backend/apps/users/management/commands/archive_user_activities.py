@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from apps.users.retention import archive_activities, get_retention_settings
+
+
+class Command(BaseCommand):
+    help = 'Moves user activities older than the retention window into compressed archive chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Retention window in days (defaults to USER_ACTIVITY_RETENTION)')
+        parser.add_argument('--chunk-size', type=int, help='Rows per archive chunk')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else get_retention_settings()['DAYS']
+        archived, chunks = archive_activities(days=days, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} activities older than {days} days into {chunks} chunks'
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_useractivity_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailverificationtoken',
+            index=models.Index(fields=['user', 'is_used', 'expires_at'], name='email_token_user_state_idx'),
+        ),
+    ]
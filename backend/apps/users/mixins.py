@@ -0,0 +1,47 @@
+"""
+Shared viewset mixins.
+"""
+
+
+class QueryPlan:
+    """
+    Declarative description of how a viewset action should load its rows.
+
+    ``select_related`` and ``prefetch_related`` name the relations the action's
+    serializer walks; ``only`` optionally restricts the loaded columns.
+    """
+
+    def __init__(self, select_related=(), prefetch_related=(), only=()):
+        self.select_related = tuple(select_related)
+        self.prefetch_related = tuple(prefetch_related)
+        self.only = tuple(only)
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.only:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+
+class QueryPlanMixin:
+    """
+    Apply a per-action ``QueryPlan`` to a viewset's queryset.
+
+    Viewsets declare ``query_plans`` as a mapping of action name to plan, with
+    an optional ``'default'`` entry used by actions without their own plan, and
+    pass their queryset through ``apply_query_plan()`` in ``get_queryset()``.
+    """
+    query_plans = {}
+
+    def get_query_plan(self):
+        action = getattr(self, 'action', None)
+        return self.query_plans.get(action, self.query_plans.get('default'))
+
+    def apply_query_plan(self, queryset):
+        plan = self.get_query_plan()
+        if plan is None:
+            return queryset
+        return plan.apply(queryset)
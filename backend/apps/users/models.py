@@ -144,7 +144,8 @@ class UserActivity(models.Model):
     activity_type = models.CharField(max_length=50)
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     user_agent = models.TextField(blank=True, null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event is logged, not when a batched write reaches the database
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     details = models.JSONField(blank=True, null=True)
     
     class Meta:
@@ -152,6 +153,13 @@ class UserActivity(models.Model):
         verbose_name_plural = _('user activities')
         db_table = 'user_activities'
         ordering = ['-timestamp']
+        # Back the activity log filters (user, activity_type, timestamp range) and its keyset order
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='user_activity_user_ts_idx'),
+            models.Index(fields=['user', 'activity_type', '-timestamp'], name='user_activity_user_type_idx'),
+            models.Index(fields=['activity_type', '-timestamp'], name='user_activity_type_ts_idx'),
+            models.Index(fields=['-timestamp', '-id'], name='user_activity_ts_id_idx'),
+        ]
         
     def __str__(self):
         return f"{self.user.email} - {self.activity_type} - {self.timestamp}" 
@@ -184,4 +192,7 @@ class EmailVerificationToken(models.Model):
     class Meta:
         verbose_name = _('email verification token')
         verbose_name_plural = _('email verification tokens')
-        db_table = 'email_verification_tokens' 
\ No newline at end of file
+        db_table = 'email_verification_tokens'
+        indexes = [
+            models.Index(fields=['user', 'is_used', 'expires_at'], name='email_token_user_state_idx'),
+        ] 
\ No newline at end of file
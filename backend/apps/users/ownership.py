@@ -0,0 +1,142 @@
+"""
+Request-scoped ownership resolution for object permissions.
+
+Ownership used to be checked by walking ``obj.client.user`` and
+``obj.attorney.user``, one lazy query per hop. Instead an object's owner is
+read from its ``user_id`` / ``client_id`` / ``attorney_id`` columns and
+compared with the requesting user's id or profile ids. The profile ids are
+looked up at most once per request (in one query, and not at all when the
+user's profile relation is already loaded or the access token carries the
+``client_id`` / ``attorney_id`` claims) and memoized on the request, so
+object permission checks add no queries of their own.
+"""
+import uuid
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ForeignKey, OneToOneField
+
+from .models import User
+
+# Relations that identify an object's owner, in the order they are consulted
+OWNER_RELATIONS = ('user', 'client', 'attorney')
+
+# Reverse accessors from User to each kind of profile
+PROFILE_RELATIONS = {
+    'client': 'client_details',
+    'attorney': 'attorney_details',
+}
+
+_owner_columns = {}
+
+
+def owner_columns(model):
+    """``(relation, column)`` pairs for the owner foreign keys ``model`` declares."""
+    try:
+        return _owner_columns[model]
+    except KeyError:
+        pass
+    columns = []
+    for relation in OWNER_RELATIONS:
+        try:
+            field = model._meta.get_field(relation)
+        except FieldDoesNotExist:
+            continue
+        if isinstance(field, (ForeignKey, OneToOneField)):
+            columns.append((relation, field.attname))
+    _owner_columns[model] = columns
+    return columns
+
+
+class RequestIdentity:
+    """The requesting user's role and profile ids, resolved lazily."""
+
+    def __init__(self, user, claims=None):
+        self.user = user
+        self.user_id = user.pk
+        self.user_type = user.user_type
+        self.is_admin = user.user_type == 'ADMIN' or user.is_superuser
+        self._profile_ids = self._claimed_profile_ids(claims)
+
+    @staticmethod
+    def _claimed_profile_ids(claims):
+        # Tokens issued by ClaimsRefreshToken carry both ids; older tokens carry neither
+        if claims is None or not all(f'{kind}_id' in claims for kind in PROFILE_RELATIONS):
+            return None
+        ids = {}
+        for kind in PROFILE_RELATIONS:
+            value = claims[f'{kind}_id']
+            try:
+                ids[kind] = uuid.UUID(value) if value else None
+            except (TypeError, ValueError):
+                return None
+        return ids
+
+    def _load_profile_ids(self):
+        ids = {}
+        missing = []
+        for kind, accessor in PROFILE_RELATIONS.items():
+            # Reuse a profile already loaded with the user (select_related or earlier access)
+            relation = User._meta.get_field(accessor)
+            if relation.is_cached(self.user):
+                profile = relation.get_cached_value(self.user)
+                ids[kind] = profile.pk if profile is not None else None
+            else:
+                missing.append(kind)
+        if missing:
+            row = User.objects.filter(pk=self.user_id).values(
+                *(f'{PROFILE_RELATIONS[kind]}__id' for kind in missing)
+            ).first() or {}
+            for kind in missing:
+                ids[kind] = row.get(f'{PROFILE_RELATIONS[kind]}__id')
+        return ids
+
+    def profile_id(self, kind):
+        """Id of the user's ``'client'`` or ``'attorney'`` profile, or None."""
+        if self._profile_ids is None:
+            self._profile_ids = self._load_profile_ids()
+        return self._profile_ids[kind]
+
+    def owns(self, relation, owner_id):
+        if owner_id is None:
+            return False
+        if relation == 'user':
+            return owner_id == self.user_id
+        return owner_id == self.profile_id(relation)
+
+
+def get_request_identity(request):
+    """Memoized ``RequestIdentity`` for ``request.user``."""
+    # DRF wraps the Django request; memoize on the underlying one so both share it
+    target = getattr(request, '_request', request)
+    identity = getattr(target, '_ownership_identity', None)
+    if identity is None or identity.user is not request.user:
+        # Only read credentials that authentication already resolved
+        claims = getattr(request, '_auth', None)
+        identity = RequestIdentity(request.user, claims if hasattr(claims, 'get') else None)
+        target._ownership_identity = identity
+    return identity
+
+
+def owner_relation(obj, relations=OWNER_RELATIONS, skip_empty=False):
+    """
+    First of ``relations`` that ``obj`` has an owner column for, with its value.
+
+    Returns ``(relation, owner_id)`` or ``(None, None)``. With ``skip_empty``
+    a null relation is passed over in favour of the next one.
+    """
+    for relation, column in owner_columns(type(obj)):
+        if relation not in relations:
+            continue
+        owner_id = getattr(obj, column)
+        if owner_id is None and skip_empty:
+            continue
+        return relation, owner_id
+    return None, None
+
+
+def is_owner(request, obj, relations=OWNER_RELATIONS, skip_empty=False):
+    """Whether ``request.user`` owns ``obj`` through the first matching relation."""
+    relation, owner_id = owner_relation(obj, relations, skip_empty)
+    if relation is None:
+        return False
+    return get_request_identity(request).owns(relation, owner_id)
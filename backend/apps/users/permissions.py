@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from .ownership import get_request_identity, is_owner
 
 
 class IsClient(permissions.BasePermission):
@@ -30,13 +31,8 @@ class IsClientOwner(permissions.BasePermission):
     Permission to only allow clients to view/edit their own resources.
     """
     def has_object_permission(self, request, view, obj):
-        # Check if the user is the owner of the client profile
-        if hasattr(obj, 'user'):
-            return obj.user == request.user
-        # Check if the object has a client related field
-        if hasattr(obj, 'client'):
-            return obj.client.user == request.user
-        return False
+        # Owned through obj.user (the client profile itself) or obj.client
+        return is_owner(request, obj, relations=('user', 'client'))
 
 
 class IsAttorneyOwner(permissions.BasePermission):
@@ -44,13 +40,8 @@ class IsAttorneyOwner(permissions.BasePermission):
     Permission to only allow attorneys to view/edit their own resources.
     """
     def has_object_permission(self, request, view, obj):
-        # Check if the user is the owner of the attorney profile
-        if hasattr(obj, 'user'):
-            return obj.user == request.user
-        # Check if the object has an attorney related field
-        if hasattr(obj, 'attorney'):
-            return obj.attorney.user == request.user
-        return False
+        # Owned through obj.user (the attorney profile itself) or obj.attorney
+        return is_owner(request, obj, relations=('user', 'attorney'))
 
 
 class IsOwnerOrAdmin(permissions.BasePermission):
@@ -59,15 +50,8 @@ class IsOwnerOrAdmin(permissions.BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         # Allow admin users
-        if request.user.user_type == 'ADMIN' or request.user.is_superuser:
+        if get_request_identity(request).is_admin:
             return True
-            
-        # Check user relation based on the object type
-        if hasattr(obj, 'user'):
-            return obj.user == request.user
-        if hasattr(obj, 'client') and hasattr(obj.client, 'user'):
-            return obj.client.user == request.user
-        if hasattr(obj, 'attorney') and hasattr(obj.attorney, 'user'):
-            return obj.attorney.user == request.user
         
-        return False 
\ No newline at end of file
+        # Owned through obj.user, else obj.client, else obj.attorney
+        return is_owner(request, obj, skip_empty=True)
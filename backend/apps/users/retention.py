@@ -0,0 +1,161 @@
+"""
+Retention and archival for the ``user_activities`` table.
+
+Rows older than the retention window are moved, oldest first, into gzipped
+JSON Lines chunks and then deleted from the hot table. Each chunk is named
+after the first and last timestamps it holds (plus the last row's id)::
+
+    user_activities-20250101T000000000000-20250103T121500000000-1a2b3c4d5e6f.jsonl.gz
+
+so ``search_archive`` only opens chunks overlapping the requested range.
+Chunks are written before their rows are deleted; if a run dies in between,
+the next run selects the same rows, produces the same chunk name and
+overwrites it, so nothing is lost or duplicated.
+"""
+import gzip
+import io
+import json
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import UserActivity
+
+DEFAULTS = {
+    'DAYS': 90,
+    'ARCHIVE_DIR': None,
+    'CHUNK_SIZE': 10000,
+}
+
+CHUNK_TIME_FORMAT = '%Y%m%dT%H%M%S%f'
+CHUNK_NAME_RE = re.compile(r'^user_activities-(\d{8}T\d{12})-(\d{8}T\d{12})-[0-9a-f]{12}\.jsonl\.gz$')
+
+ARCHIVE_FIELDS = ['id', 'user_id', 'activity_type', 'ip_address', 'user_agent', 'timestamp', 'details']
+
+
+def get_retention_settings():
+    return {**DEFAULTS, **getattr(settings, 'USER_ACTIVITY_RETENTION', {})}
+
+
+def get_archive_storage():
+    location = get_retention_settings()['ARCHIVE_DIR'] or settings.BASE_DIR / 'archive' / 'user_activities'
+    return FileSystemStorage(location=location)
+
+
+def _format_time(value):
+    return value.astimezone(dt_timezone.utc).strftime(CHUNK_TIME_FORMAT)
+
+
+def _parse_time(value):
+    return datetime.strptime(value, CHUNK_TIME_FORMAT).replace(tzinfo=dt_timezone.utc)
+
+
+def chunk_name(rows):
+    first, last = rows[0], rows[-1]
+    # The last row's id keeps names unique when chunks share boundary timestamps
+    return (
+        f"user_activities-{_format_time(first['timestamp'])}-{_format_time(last['timestamp'])}"
+        f"-{last['id'].hex[:12]}.jsonl.gz"
+    )
+
+
+def write_chunk(storage, rows):
+    """Write ``rows`` as one gzipped JSON Lines chunk and return its name."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as archive:
+        for row in rows:
+            archive.write(json.dumps(row, cls=DjangoJSONEncoder).encode('utf-8'))
+            archive.write(b'\n')
+
+    name = chunk_name(rows)
+    if storage.exists(name):
+        # Left behind by a run that died before deleting its rows
+        storage.delete(name)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def archive_activities(days=None, chunk_size=None, now=None):
+    """
+    Move activities older than ``days`` into archive chunks.
+
+    Returns ``(rows_archived, chunks_written)``.
+    """
+    config = get_retention_settings()
+    days = config['DAYS'] if days is None else days
+    chunk_size = chunk_size or config['CHUNK_SIZE']
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    storage = get_archive_storage()
+
+    archived = chunks = 0
+    while True:
+        rows = list(
+            UserActivity.objects.filter(timestamp__lt=cutoff)
+            .order_by('timestamp', 'id')
+            .values(*ARCHIVE_FIELDS)[:chunk_size]
+        )
+        if not rows:
+            return archived, chunks
+
+        write_chunk(storage, rows)
+        with transaction.atomic():
+            UserActivity.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        archived += len(rows)
+        chunks += 1
+
+
+def list_chunks(storage=None, start=None, end=None):
+    """Archive chunk names overlapping ``start``..``end``, newest first."""
+    storage = storage or get_archive_storage()
+    try:
+        _, files = storage.listdir('')
+    except FileNotFoundError:
+        return []
+
+    chunks = []
+    for name in files:
+        match = CHUNK_NAME_RE.match(name)
+        if not match:
+            continue
+        first, last = _parse_time(match.group(1)), _parse_time(match.group(2))
+        if (start and last < start) or (end and first > end):
+            continue
+        chunks.append((last, name))
+    return [name for _, name in sorted(chunks, reverse=True)]
+
+
+def read_chunk(storage, name):
+    with storage.open(name, 'rb') as raw, gzip.GzipFile(fileobj=raw) as archive:
+        for line in archive:
+            row = json.loads(line)
+            row['timestamp'] = parse_datetime(row['timestamp'])
+            yield row
+
+
+def search_archive(user_id=None, activity_type=None, start=None, end=None, limit=100):
+    """
+    Search archived activities, newest first.
+
+    Only chunks overlapping the time range are decompressed.
+    """
+    storage = get_archive_storage()
+    results = []
+    for name in list_chunks(storage, start, end):
+        matches = [
+            row for row in read_chunk(storage, name)
+            if (user_id is None or row['user_id'] == str(user_id))
+            and (activity_type is None or row['activity_type'] == activity_type)
+            and (start is None or row['timestamp'] >= start)
+            and (end is None or row['timestamp'] <= end)
+        ]
+        # Chunks are stored oldest first
+        results.extend(reversed(matches))
+        if len(results) >= limit:
+            break
+    return results[:limit]
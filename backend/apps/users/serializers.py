@@ -4,7 +4,8 @@ from django.core.validators import RegexValidator
 from .models import UserActivity, ClientProfile, AttorneyProfile
 from django.contrib.auth import authenticate
 from django.utils.translation import gettext_lazy as _
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from .authentication import ClaimsRefreshToken
 
 User = get_user_model()
 
@@ -188,7 +189,11 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
             raise serializers.ValidationError('Must include "email" and "password".')
 
     def get_token(self, user):
-        return RefreshToken.for_user(user)
+        return ClaimsRefreshToken.for_user(user)
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh serializer whose rotated tokens keep claims and use the cached blacklist."""
+    token_class = ClaimsRefreshToken
 
 class PasswordChangeSerializer(serializers.Serializer):
     """Serializer for changing user password."""
@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import UserActivity
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from .audit import log_activity
+from .authentication import invalidate_cached_user
+from .blacklist import get_token_blacklist
+from .models import ClientProfile, AttorneyProfile
 from apps.clients.models import Client
 from apps.attorneys.models import Attorney
 
@@ -24,10 +29,39 @@ def create_user_profile(sender, instance, created, **kwargs):
             )
         
         # Log user creation activity
-        UserActivity.objects.create(
+        log_activity(
             user=instance,
             activity_type='USER_CREATED',
             details={
                 'user_type': instance.user_type
             }
-        )
\ No newline at end of file
+        )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Signal to drop a saved or deleted user from the authentication cache."""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=Attorney)
+@receiver(post_delete, sender=Attorney)
+@receiver(post_save, sender=ClientProfile)
+@receiver(post_delete, sender=ClientProfile)
+@receiver(post_save, sender=AttorneyProfile)
+@receiver(post_delete, sender=AttorneyProfile)
+def invalidate_profile_user_cache(sender, instance, **kwargs):
+    """Signal to drop a user whose cached profiles changed."""
+    invalidate_cached_user(instance.user_id)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_blacklisted_token(sender, instance, created, **kwargs):
+    """Signal to add tokens blacklisted outside ``CachedBlacklistMixin``, e.g. in the admin, to the blacklist store."""
+    blacklist = get_token_blacklist()
+    if created and blacklist is not None:
+        jti = instance.token.jti
+        transaction.on_commit(lambda: blacklist.add(jti))
@@ -0,0 +1,76 @@
+import logging
+from smtplib import SMTPException
+
+from celery import shared_task
+from django.core.mail import get_connection
+
+from . import audit, blacklist, retention
+from .models import EmailVerificationToken
+from .utils import build_verification_email, purge_verification_tokens as purge_tokens
+
+logger = logging.getLogger('django')
+
+EMAIL_RETRY_BASE_DELAY = 30
+EMAIL_RETRY_MAX_DELAY = 3600
+
+
+@shared_task(ignore_result=True)
+def flush_audit_log():
+    """Drain queued audit events. Scheduled via CELERY_BEAT_SCHEDULE."""
+    audit.flush_audit_log()
+
+
+@shared_task
+def archive_user_activities():
+    """Move activities past the retention window to the archive. Scheduled via CELERY_BEAT_SCHEDULE."""
+    archived, _ = retention.archive_activities()
+    return archived
+
+
+@shared_task
+def purge_verification_tokens():
+    """Delete used and expired email verification tokens. Scheduled via CELERY_BEAT_SCHEDULE."""
+    return purge_tokens()
+
+
+@shared_task
+def purge_expired_tokens():
+    """Delete expired outstanding and blacklisted refresh tokens. Scheduled via CELERY_BEAT_SCHEDULE."""
+    return blacklist.purge_expired_tokens()
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=6)
+def send_verification_emails(self, token_ids):
+    """
+    Render and send verification emails over a single SMTP connection.
+    
+    Messages that fail are retried with exponential backoff (30s, 60s, 120s,
+    ... capped at an hour); the rest of the batch is not resent. Tokens that
+    were used or deleted in the meantime are skipped.
+    """
+    tokens = list(
+        EmailVerificationToken.objects.filter(pk__in=token_ids, is_used=False).select_related('user')
+    )
+    
+    failed = []
+    connection = get_connection()
+    try:
+        connection.open()
+    except (SMTPException, OSError):
+        logger.warning("Failed to connect to the mail server", exc_info=True)
+        failed = [str(token.pk) for token in tokens]
+    else:
+        try:
+            for token in tokens:
+                message = build_verification_email(token.user, token, connection=connection)
+                try:
+                    message.send()
+                except (SMTPException, OSError):
+                    logger.warning(f"Failed to send verification email to {token.user.email}", exc_info=True)
+                    failed.append(str(token.pk))
+        finally:
+            connection.close()
+    
+    if failed:
+        countdown = min(EMAIL_RETRY_BASE_DELAY * 2 ** self.request.retries, EMAIL_RETRY_MAX_DELAY)
+        raise self.retry(args=[failed], countdown=countdown)
@@ -0,0 +1,33 @@
+"""
+Query budget assertions for API tests.
+
+Endpoint tests seed several rows and assert that the response is produced in a
+fixed number of queries, so an N+1 regression in a serializer or queryset
+fails the suite instead of silently slowing down every page.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Mixin for test cases that assert a per-request query budget."""
+
+    def assertQueryBudget(self, budget, func, *args, **kwargs):
+        """Call ``func`` and fail if it executes more than ``budget`` queries."""
+        with CaptureQueriesContext(connection) as context:
+            result = func(*args, **kwargs)
+
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f"{index}. {query['sql']}"
+                for index, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f"{executed} queries executed, budget is {budget}:\n{queries}")
+        return result
+
+    def get_within_budget(self, budget, url, data=None):
+        """GET ``url`` with ``self.api_client`` within a query budget."""
+        response = self.assertQueryBudget(budget, self.api_client.get, url, data)
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return response
@@ -0,0 +1,79 @@
+"""
+Query plan assertions for API tests.
+
+Tests seed a dataset, capture the queries an endpoint runs and ``EXPLAIN``
+each of them, failing when a table holding at least ``min_rows`` rows is read
+with a sequential scan, so a missing or unusable index fails the suite before
+the table grows large enough for anyone to notice.
+"""
+import re
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Plan lines reporting a full table read, per database vendor
+SEQ_SCAN_PATTERNS = {
+    # SQLite reports index-ordered full scans as "SCAN t USING [COVERING] INDEX i"
+    'sqlite': re.compile(r'^SCAN (?P<table>\w+)(?: AS \w+)?$'),
+    'postgresql': re.compile(r'Seq Scan on (?P<table>\w+)'),
+}
+
+
+def explain(sql):
+    """Plan lines for ``sql`` on the default connection."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN {sql}')
+        return [row[0] for row in cursor.fetchall()]
+
+
+def sequential_scans(plan):
+    """Tables read by a sequential scan in ``plan``."""
+    pattern = SEQ_SCAN_PATTERNS[connection.vendor]
+    return [match.group('table') for match in map(pattern.search, plan) if match]
+
+
+def table_size(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+        return cursor.fetchone()[0]
+
+
+class SeqScanMixin:
+    """Mixin for test cases that assert endpoints avoid sequential scans."""
+
+    min_rows = 200
+
+    def assertNoSeqScan(self, func, *args, **kwargs):
+        """
+        Call ``func`` and fail if any SELECT it runs sequentially scans a table
+        holding at least ``min_rows`` rows.
+        """
+        with CaptureQueriesContext(connection) as context:
+            result = func(*args, **kwargs)
+
+        failures = []
+        sizes = {}
+        # Scans of subqueries and CTEs are reported under their alias
+        tables = set(connection.introspection.table_names())
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            plan = explain(sql)
+            for table in sequential_scans(plan):
+                if table not in tables:
+                    continue
+                if table not in sizes:
+                    sizes[table] = table_size(table)
+                if sizes[table] >= self.min_rows:
+                    failures.append(f"{table} ({sizes[table]} rows):\n{sql}\n  " + '\n  '.join(plan))
+        if failures:
+            self.fail("Sequential scan on a large table:\n" + '\n\n'.join(failures))
+        return result
+
+    def assertQuerySetNoSeqScan(self, queryset):
+        """Fail if evaluating ``queryset`` sequentially scans a large table."""
+        return self.assertNoSeqScan(list, queryset)
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from apps.users.audit import BufferedAuditSink, get_audit_sink, log_activity, flush_audit_log
+from apps.users.models import UserActivity
+
+User = get_user_model()
+
+BUFFERED = {'BACKEND': 'buffered', 'BATCH_SIZE': 3, 'FLUSH_INTERVAL': 3600}
+
+
+class AuditSinkTests(TestCase):
+    """Test the batched user activity audit sink."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@example.com',
+            password='password123',
+            user_type='CLIENT'
+        )
+        UserActivity.objects.all().delete()
+    
+    def test_sync_mode_writes_immediately(self):
+        """Test that the test settings write each event as it is logged."""
+        log_activity(user=self.user, activity_type='LOGIN', ip_address='127.0.0.1')
+        self.assertEqual(UserActivity.objects.filter(activity_type='LOGIN').count(), 1)
+    
+    @override_settings(AUDIT_LOG=BUFFERED)
+    def test_buffered_mode_flushes_on_batch_size(self):
+        """Test that buffered events are written in one bulk insert once the batch fills."""
+        self.assertIsInstance(get_audit_sink(), BufferedAuditSink)
+        log_activity(user=self.user, activity_type='LOGIN')
+        log_activity(user=self.user, activity_type='LOGOUT')
+        self.assertEqual(UserActivity.objects.count(), 0)
+        
+        with CaptureQueriesContext(connection) as queries:
+            log_activity(user=self.user, activity_type='LOGIN')
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(UserActivity.objects.count(), 3)
+    
+    @override_settings(AUDIT_LOG=BUFFERED)
+    def test_buffered_events_keep_logged_timestamp(self):
+        """Test that events keep the time they were logged, not the time of the flush."""
+        activity = log_activity(user=self.user, activity_type='LOGIN')
+        activity.timestamp = timezone.now() - timedelta(minutes=5)
+        self.assertEqual(flush_audit_log(), 1)
+        self.assertEqual(UserActivity.objects.get().timestamp, activity.timestamp)
+    
+    @override_settings(AUDIT_LOG=BUFFERED)
+    def test_buffered_events_are_flushed_on_close(self):
+        """Test that pending events are written when the sink is shut down."""
+        log_activity(user=self.user, activity_type='LOGIN')
+        with override_settings(AUDIT_LOG={**BUFFERED, 'BATCH_SIZE': 10}):
+            # Replacing the configuration closes the old sink
+            self.assertEqual(UserActivity.objects.count(), 1)
+
+
+class AuditSinkDeletedUserTests(TransactionTestCase):
+    """Test that flushes survive users deleted while their events were buffered."""
+    
+    @override_settings(AUDIT_LOG={**BUFFERED, 'BATCH_SIZE': 10})
+    def test_events_for_deleted_users_are_dropped(self):
+        """Test that a batch still lands when one of its users was deleted."""
+        user = User.objects.create_user(email='user@example.com', password='password123', user_type='CLIENT')
+        other = User.objects.create_user(email='other@example.com', password='password123', user_type='CLIENT')
+        log_activity(user=user, activity_type='LOGIN')
+        log_activity(user=other, activity_type='LOGIN')
+        other.delete()
+        # The foreign key violation surfaces when the flush commits
+        self.assertEqual(flush_audit_log(), 2)
+        self.assertEqual(UserActivity.objects.filter(activity_type='LOGIN').get().user, user)
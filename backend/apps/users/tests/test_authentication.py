@@ -0,0 +1,105 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from django.contrib.auth import get_user_model
+from apps.attorneys.models import AttorneyCredential
+from apps.users.authentication import (
+    CACHE_KEY_PREFIX, CachedJWTAuthentication, ClaimsRefreshToken, UserCache, get_user_cache,
+)
+from apps.users.permissions import IsAttorneyOwner
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """Test token claims and the cached user lookup behind JWT authentication."""
+
+    def setUp(self):
+        get_user_cache().clear_local()
+        self.user = User.objects.create_user(
+            email='attorney@example.com',
+            password='password123',
+            first_name='Ada',
+            user_type='ATTORNEY'
+        )
+        self.access = ClaimsRefreshToken.for_user(self.user).access_token
+        self.api_client = APIClient()
+        self.api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        self.profile_url = reverse('user-profile')
+
+    def users_queries(self, queries):
+        return [query['sql'] for query in queries if 'FROM "users"' in query['sql']]
+
+    def test_token_claims(self):
+        """Test that access tokens carry the user's type, status and profile ids."""
+        self.assertEqual(self.access['user_type'], 'ATTORNEY')
+        self.assertEqual(self.access['verification_status'], 'PENDING')
+        self.assertEqual(self.access['attorney_id'], str(self.user.attorney_details.pk))
+        self.assertIsNone(self.access['client_id'])
+
+    def test_cached_user_skips_users_table(self):
+        """Test that repeated authenticated reads do not query the users table."""
+        response = self.api_client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        get_user_cache().clear_local()  # Served by the shared tier from here on
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api_client.get(self.profile_url)
+            response = self.api_client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Ada')
+        self.assertEqual(self.users_queries(queries.captured_queries), [])
+
+    def test_save_invalidates_cached_user(self):
+        """Test that saving the user or deactivating it is seen by the next request."""
+        self.api_client.get(self.profile_url)
+        self.user.first_name = 'Grace'
+        self.user.save()
+        self.assertEqual(self.api_client.get(self.profile_url).data['first_name'], 'Grace')
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.api_client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_is_a_copy(self):
+        """Test that changes to one request's user do not leak into the cache."""
+        user = get_user_cache().get(self.user.pk)
+        user.first_name = 'Changed'
+        self.assertEqual(get_user_cache().get(self.user.pk).first_name, 'Ada')
+
+    def test_cache_holds_no_password(self):
+        """Test that the cached projection leaves out the password and the rebuilt user defers it."""
+        user = get_user_cache().get(self.user.pk)
+        cached = get_user_cache().shared.get(f'{CACHE_KEY_PREFIX}{self.user.pk}')
+        self.assertNotIn('password', cached['user'])
+        self.assertNotIn(self.user.password, repr(cached))
+        self.assertEqual(user.get_deferred_fields(), {'password'})
+        with self.assertNumQueries(0):
+            self.assertEqual(user.attorney_details.pk, self.user.attorney_details.pk)
+
+        user.mfa_enabled = True
+        user.save()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.mfa_enabled)
+        self.assertTrue(self.user.check_password('password123'))
+        self.assertTrue(get_user_cache().get(self.user.pk).check_password('password123'))
+
+    def test_process_local_shared_tier_uses_local_ttl(self):
+        """Test that a LocMem shared tier keeps entries no longer than the local tier."""
+        self.assertEqual(UserCache(5, 100, 300, 'default').shared_ttl, 5)
+
+    def test_ownership_uses_claims(self):
+        """Test that object permissions read profile ids from the token claims."""
+        credential = AttorneyCredential.objects.create(
+            attorney=self.user.attorney_details, document_type='BAR', document='attorney_credentials/bar.pdf'
+        )
+        request = Request(APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.access}'))
+        request.authenticators = [CachedJWTAuthentication()]
+        request.user  # Authenticate outside the measured block
+        with self.assertNumQueries(0):
+            self.assertTrue(IsAttorneyOwner().has_object_permission(request, None, credential))
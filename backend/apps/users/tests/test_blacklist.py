@@ -0,0 +1,130 @@
+import time
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.exceptions import TokenError
+from django.contrib.auth import get_user_model
+from apps.users.authentication import ClaimsRefreshToken
+from apps.users.blacklist import (
+    BloomFilter, MemoryBlacklistStore, TokenBlacklist, get_token_blacklist, purge_expired_tokens
+)
+
+User = get_user_model()
+
+
+class BloomFilterTests(TestCase):
+    """Test the Bloom filter and the blacklist layer built on it."""
+
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for index in range(1000):
+            bloom.add(f'member-{index}')
+        self.assertTrue(all(f'member-{index}' in bloom for index in range(1000)))
+        false_positives = sum(f'other-{index}' in bloom for index in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_filter_syncs_entries_from_other_processes(self):
+        """Test that JTIs added through another process's layer are seen on the next check."""
+        store = MemoryBlacklistStore()
+        first = TokenBlacklist(store, 1000, 0.001, sync_interval=0, rebuild_interval=3600)
+        second = TokenBlacklist(store, 1000, 0.001, sync_interval=0, rebuild_interval=3600)
+        self.assertFalse(second.contains('jti-1'))
+        first.add('jti-1')
+        self.assertTrue(second.contains('jti-1'))
+        self.assertFalse(second.contains('jti-2'))
+
+    def test_rebuild_sizes_filter_from_store(self):
+        """Test that a store larger than the capacity does not force a rebuild on every check."""
+        store = MemoryBlacklistStore()
+        store.seed([(f'jti-{index}', time.time()) for index in range(50)])
+        blacklist = TokenBlacklist(store, 10, 0.001, sync_interval=0, rebuild_interval=3600)
+        blacklist.sync()
+        built = blacklist._filter
+        self.assertGreaterEqual(built.capacity, 100)
+        self.assertTrue(blacklist.contains('jti-49'))
+        self.assertIs(blacklist._filter, built)
+
+    def test_false_positive_is_confirmed_against_store(self):
+        blacklist = TokenBlacklist(MemoryBlacklistStore(), 1000, 0.001, sync_interval=0, rebuild_interval=3600)
+        blacklist.sync()
+        blacklist._filter.add('not-really-blacklisted')
+        self.assertFalse(blacklist.contains('not-really-blacklisted'))
+
+
+class TokenBlacklistFlowTests(TestCase):
+    """Test refresh rotation, logout and purging with the blacklist layer."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='client@example.com', password='password123', user_type='CLIENT')
+        self.api_client = APIClient()
+
+    def test_rotated_token_is_rejected_without_database_lookup(self):
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        response = self.api_client.post(reverse('token_refresh'), {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=refresh['jti']).exists())
+
+        rotated = ClaimsRefreshToken(response.data['refresh'], verify=False)
+        self.assertEqual(rotated['client_id'], str(self.user.client_details.pk))
+
+        with self.assertNumQueries(0):
+            with self.assertRaises(TokenError):
+                refresh.check_blacklist()
+            rotated.check_blacklist()
+
+        response = self.api_client.post(reverse('token_refresh'), {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_blacklists_token(self):
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        self.api_client.force_authenticate(user=self.user)
+        response = self.api_client.post(reverse('logout'), {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(get_token_blacklist().contains(refresh['jti']))
+
+    @override_settings(TOKEN_BLACKLIST={'BACKEND': 'memory'})
+    def test_store_is_seeded_from_database_rows(self):
+        """Test that tokens blacklisted only in the database, e.g. before a deploy, stay rejected."""
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=refresh['jti']))
+        with self.assertRaises(TokenError):
+            refresh.check_blacklist()
+        self.assertTrue(get_token_blacklist().store.contains(refresh['jti']))
+        ClaimsRefreshToken.for_user(self.user).check_blacklist()
+
+    def test_filter_hit_missing_from_store_checks_database(self):
+        """Test that an entry the store lost after the filter was built is still rejected."""
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        refresh.blacklist()
+        blacklist = get_token_blacklist()
+        blacklist.store._added.pop(refresh['jti'])
+        with self.assertRaises(TokenError):
+            refresh.check_blacklist()
+
+    def test_admin_blacklisting_reaches_store(self):
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=refresh['jti']))
+        self.assertTrue(get_token_blacklist().store.contains(refresh['jti']))
+
+    @override_settings(TOKEN_BLACKLIST={'BACKEND': 'database'})
+    def test_database_backend_uses_simplejwt_check(self):
+        self.assertIsNone(get_token_blacklist())
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        refresh.blacklist()
+        with self.assertRaises(TokenError):
+            refresh.check_blacklist()
+
+    def test_purge_expired_tokens(self):
+        expired = ClaimsRefreshToken.for_user(self.user)
+        expired.blacklist()
+        current = ClaimsRefreshToken.for_user(self.user)
+        OutstandingToken.objects.filter(jti=expired['jti']).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(purge_expired_tokens(batch_size=1), 1)
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [current['jti']])
+        self.assertFalse(BlacklistedToken.objects.exists())
@@ -3,9 +3,20 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
+from django.core.mail import get_connection
 from ..models import EmailVerificationToken
+from ..tasks import send_verification_emails as send_verification_emails_task
+from ..utils import (
+    create_verification_token, generate_verification_token, get_or_create_verification_token,
+    parse_verification_token, purge_verification_tokens, send_verification_email, verify_email_token
+)
+from celery.exceptions import Retry
+from smtplib import SMTPException
+from unittest.mock import patch
 import json
 from django.core import mail
+from django.utils import timezone
+from datetime import timedelta
 
 User = get_user_model()
 
@@ -157,4 +168,98 @@ class EmailVerificationTests(TestCase):
         self.assertFalse(response.data['success'])
         
         # Check that no email was sent
-        self.assertEqual(len(mail.outbox), 0) 
\ No newline at end of file
+        self.assertEqual(len(mail.outbox), 0) 
+
+class VerificationEmailTaskTests(TestCase):
+    """Test the Celery task that delivers verification emails."""
+    
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f'user{i}@example.com', password='password123', user_type='CLIENT')
+            for i in range(3)
+        ]
+        self.tokens = [create_verification_token(user) for user in self.users]
+    
+    def test_email_is_sent_after_commit(self):
+        """Test that queueing waits for the transaction and the eager task delivers the email."""
+        mail.outbox = []
+        with self.captureOnCommitCallbacks(execute=True):
+            send_verification_email(self.users[0], self.tokens[0])
+            self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user0@example.com'])
+        self.assertIn(self.tokens[0].token, mail.outbox[0].alternatives[0][0])
+    
+    def test_batch_reuses_one_connection(self):
+        """Test that a batch is sent over a single SMTP connection and skips used tokens."""
+        self.tokens[2].is_used = True
+        self.tokens[2].save()
+        mail.outbox = []
+        with patch('apps.users.tasks.get_connection', wraps=get_connection) as connection_factory:
+            send_verification_emails_task([str(token.pk) for token in self.tokens])
+        self.assertEqual(connection_factory.call_count, 1)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['user0@example.com', 'user1@example.com'])
+    
+    def test_failed_messages_are_retried_with_backoff(self):
+        """Test that only failed messages are retried, with an exponential countdown."""
+        with patch('django.core.mail.EmailMessage.send', side_effect=SMTPException('unavailable')), \
+                patch.object(send_verification_emails_task, 'retry', side_effect=Retry()) as retry:
+            with self.assertRaises(Retry):
+                send_verification_emails_task([str(self.tokens[0].pk)])
+        retry.assert_called_once_with(args=[[str(self.tokens[0].pk)]], countdown=30)
+
+
+class SignedVerificationTokenTests(TestCase):
+    """Test signed verification tokens and their cleanup."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='signed@example.com',
+            password='password123',
+            user_type='CLIENT'
+        )
+    
+    def test_token_is_created_without_uniqueness_check(self):
+        """Test that issuing a token is a single insert."""
+        with self.assertNumQueries(1):
+            token = create_verification_token(self.user)
+        self.assertEqual(parse_verification_token(token.token), (self.user.pk, token.expires_at))
+    
+    def test_valid_token_is_single_use(self):
+        """Test that a signed token verifies the email once."""
+        token = create_verification_token(self.user)
+        self.assertEqual(verify_email_token(token.token), (True, "Email successfully verified."))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.email_verified)
+        self.assertFalse(verify_email_token(token.token)[0])
+    
+    def test_forged_and_expired_tokens_need_no_queries(self):
+        """Test that tampered and expired tokens are rejected from the signature alone."""
+        token = create_verification_token(self.user).token
+        other_user = User.objects.create_user(email='other@example.com', password='password123')
+        forged = token.replace(self.user.pk.hex, other_user.pk.hex)
+        expired = generate_verification_token(self.user.pk, timezone.now() - timedelta(minutes=1))
+        with self.assertNumQueries(0):
+            self.assertFalse(verify_email_token(forged)[0])
+            self.assertFalse(verify_email_token(token[:-2])[0])
+            self.assertFalse(verify_email_token(expired)[0])
+    
+    def test_resend_reuses_unused_token(self):
+        """Test that a still-valid unused token is reused rather than a new one created."""
+        token = create_verification_token(self.user)
+        self.assertEqual(get_or_create_verification_token(self.user), token)
+        token.expires_at = timezone.now() + timedelta(minutes=10)
+        token.save()
+        self.assertNotEqual(get_or_create_verification_token(self.user), token)
+    
+    def test_purge_deletes_used_and_expired_tokens(self):
+        """Test that purging removes used and expired tokens in batches and keeps valid ones."""
+        valid = create_verification_token(self.user)
+        used = create_verification_token(self.user)
+        used.is_used = True
+        used.save()
+        expired = create_verification_token(self.user)
+        expired.expires_at = timezone.now() - timedelta(hours=1)
+        expired.save()
+        self.assertEqual(purge_verification_tokens(batch_size=1), 2)
+        self.assertEqual(list(EmailVerificationToken.objects.values_list('pk', flat=True)), [valid.pk])
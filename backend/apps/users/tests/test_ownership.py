@@ -0,0 +1,85 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from apps.attorneys.models import Attorney, AttorneyCredential
+from apps.clients.models import LegalRequest
+from apps.users.ownership import get_request_identity
+from apps.users.permissions import IsOwnerOrAdmin, IsClientOwner, IsAttorneyOwner
+
+User = get_user_model()
+
+
+class OwnershipPermissionTests(TestCase):
+    """Test object permissions resolved from owner id columns."""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.client_user = User.objects.create_user(
+            email='client@example.com', password='password123', user_type='CLIENT'
+        )
+        self.attorney_user = User.objects.create_user(
+            email='attorney@example.com', password='password123', user_type='ATTORNEY'
+        )
+        self.other_attorney_user = User.objects.create_user(
+            email='other@example.com', password='password123', user_type='ATTORNEY'
+        )
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='password123', user_type='ADMIN'
+        )
+        self.attorney = self.attorney_user.attorney_details
+        self.credential = AttorneyCredential.objects.create(
+            attorney=self.attorney, document_type='BAR', document='attorney_credentials/bar.pdf'
+        )
+        self.legal_request = LegalRequest.objects.create(
+            client=self.client_user.client_details,
+            attorney=self.attorney,
+            title='Contract Review',
+            description='I need help reviewing a contract'
+        )
+
+    def request_for(self, email):
+        request = Request(self.factory.get('/'))
+        # A fresh instance, as authentication would load it, with no profile cached
+        request.user = User.objects.get(email=email)
+        return request
+
+    def test_direct_owner_needs_no_queries(self):
+        """Test that objects with a user column are checked without queries."""
+        attorney = Attorney.objects.get(pk=self.attorney.pk)
+        owner = self.request_for('attorney@example.com')
+        other = self.request_for('other@example.com')
+        with self.assertNumQueries(0):
+            self.assertTrue(IsOwnerOrAdmin().has_object_permission(owner, None, attorney))
+            self.assertTrue(IsAttorneyOwner().has_object_permission(owner, None, attorney))
+            self.assertFalse(IsOwnerOrAdmin().has_object_permission(other, None, attorney))
+
+    def test_profile_ids_are_memoized_per_request(self):
+        """Test that profile ids are looked up once per request and never via the related objects."""
+        credential = AttorneyCredential.objects.get(pk=self.credential.pk)
+        request = self.request_for('attorney@example.com')
+        with self.assertNumQueries(1):
+            self.assertTrue(IsOwnerOrAdmin().has_object_permission(request, None, credential))
+            self.assertTrue(IsAttorneyOwner().has_object_permission(request, None, credential))
+            self.assertTrue(IsAttorneyOwner().has_object_permission(request, None, self.legal_request))
+        self.assertIs(get_request_identity(request), get_request_identity(request))
+
+    def test_loaded_profile_is_reused(self):
+        """Test that a profile loaded with the user saves the lookup."""
+        request = Request(self.factory.get('/'))
+        request.user = User.objects.select_related('client_details', 'attorney_details').get(
+            email='client@example.com'
+        )
+        with self.assertNumQueries(0):
+            self.assertTrue(IsClientOwner().has_object_permission(request, None, self.legal_request))
+
+    def test_owner_precedence_and_admin(self):
+        """Test that the client, not the attorney, owns a legal request, and admins own everything."""
+        client = self.request_for('client@example.com')
+        attorney = self.request_for('attorney@example.com')
+        admin = self.request_for('admin@example.com')
+        self.assertTrue(IsOwnerOrAdmin().has_object_permission(client, None, self.legal_request))
+        self.assertFalse(IsOwnerOrAdmin().has_object_permission(attorney, None, self.legal_request))
+        self.assertFalse(IsClientOwner().has_object_permission(attorney, None, self.legal_request))
+        with self.assertNumQueries(0):
+            self.assertTrue(IsOwnerOrAdmin().has_object_permission(admin, None, self.credential))
@@ -0,0 +1,64 @@
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth import get_user_model
+from apps.users.models import UserActivity
+from .query_budget import QueryBudgetMixin
+
+User = get_user_model()
+
+
+class KeysetPaginationTests(QueryBudgetMixin, APITestCase):
+    """Test keyset pagination on the user activity log."""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            user_type='ADMIN',
+            is_staff=True
+        )
+        UserActivity.objects.all().delete()
+        
+        # Groups of activities sharing a timestamp exercise the UUID tie-breaker
+        now = timezone.now()
+        activities = [
+            UserActivity(user=self.admin, activity_type=f'ACTIVITY_{i}')
+            for i in range(25)
+        ]
+        UserActivity.objects.bulk_create(activities)
+        for i, activity in enumerate(activities):
+            UserActivity.objects.filter(pk=activity.pk).update(timestamp=now - timedelta(minutes=i // 4))
+        
+        self.expected = list(
+            UserActivity.objects.order_by('-timestamp', '-id').values_list('id', flat=True)
+        )
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(user=self.admin)
+        self.url = reverse('user-activities-list')
+    
+    def test_walk_forward_and_back(self):
+        """Test that following next links visits every row once, in order."""
+        seen = []
+        pages = []
+        url, params = self.url, {'page_size': 10}
+        while url:
+            response = self.get_within_budget(1, url, params)
+            self.assertNotIn('count', response.data)
+            pages.append(response.data)
+            seen.extend(row['id'] for row in response.data['results'])
+            url, params = response.data['next'], None
+        
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(seen, [str(pk) for pk in self.expected])
+        self.assertIsNone(pages[0]['previous'])
+        
+        # The previous link of the last page returns the middle page again
+        response = self.get_within_budget(1, pages[-1]['previous'])
+        self.assertEqual(response.data['results'], pages[1]['results'])
+    
+    def test_invalid_cursor(self):
+        """Test that a tampered cursor is rejected."""
+        response = self.api_client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
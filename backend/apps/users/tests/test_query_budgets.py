@@ -0,0 +1,119 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth import get_user_model
+from apps.attorneys.models import Specialty, AttorneyCredential
+from apps.clients.models import LegalRequest, ClientAttorneyReview
+from apps.admin.models import AdminNotification
+from .query_budget import QueryBudgetMixin
+
+User = get_user_model()
+
+
+class EndpointQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """
+    Assert fixed query budgets for list and detail endpoints.
+    
+    Every endpoint is exercised with several rows so that per-row queries
+    would exceed the budget.
+    """
+    
+    ROWS = 4
+    
+    def setUp(self):
+        self.api_client = APIClient()
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            user_type='ADMIN',
+            is_staff=True
+        )
+        
+        specialties = [Specialty.objects.create(name=f'Specialty {i}') for i in range(2)]
+        self.attorneys = []
+        self.clients = []
+        for i in range(self.ROWS):
+            attorney_user = User.objects.create_user(
+                email=f'attorney{i}@example.com',
+                password='password123',
+                first_name='Attorney',
+                last_name=f'Number{i}',
+                user_type='ATTORNEY'
+            )
+            attorney = attorney_user.attorney_details
+            attorney.specialties.add(*specialties)
+            AttorneyCredential.objects.create(attorney=attorney, document_type='Bar License', document='license.pdf')
+            self.attorneys.append(attorney)
+            
+            client_user = User.objects.create_user(
+                email=f'client{i}@example.com',
+                password='password123',
+                user_type='CLIENT'
+            )
+            self.clients.append(client_user.client_details)
+            
+            AdminNotification.objects.create(
+                admin=self.admin,
+                title=f'Notification {i}',
+                message='Message',
+                category='OTHER'
+            )
+        
+        self.client_user = self.clients[0].user
+        for attorney in self.attorneys:
+            legal_request = LegalRequest.objects.create(
+                client=self.clients[0],
+                attorney=attorney,
+                title='Request',
+                description='Description',
+                status='COMPLETED'
+            )
+            ClientAttorneyReview.objects.create(
+                client=self.clients[0],
+                attorney=attorney,
+                legal_request=legal_request,
+                rating=5
+            )
+    
+    def test_attorney_list_budget(self):
+        self.api_client.force_authenticate(user=self.client_user)
+        response = self.get_within_budget(3, reverse('attorneys:attorney-list'))
+        self.assertEqual(response.data['count'], self.ROWS)
+    
+    def test_attorney_search_budget(self):
+        self.api_client.force_authenticate(user=self.client_user)
+        response = self.get_within_budget(2, reverse('attorneys:attorney-search'), {'search': 'attorney'})
+        self.assertEqual(len(response.data), self.ROWS)
+    
+    def test_attorney_retrieve_budget(self):
+        self.api_client.force_authenticate(user=self.client_user)
+        url = reverse('attorneys:attorney-detail', kwargs={'pk': self.attorneys[0].pk})
+        self.get_within_budget(4, url)
+    
+    def test_legal_request_list_budget(self):
+        self.api_client.force_authenticate(user=self.client_user)
+        response = self.get_within_budget(2, reverse('clients:legal-request-list'))
+        self.assertEqual(len(response.data['results']), self.ROWS)
+    
+    def test_review_list_budget(self):
+        self.api_client.force_authenticate(user=self.client_user)
+        response = self.get_within_budget(2, reverse('clients:review-list'))
+        self.assertEqual(response.data['count'], self.ROWS)
+    
+    def test_user_activity_list_budget(self):
+        self.api_client.force_authenticate(user=self.admin)
+        self.get_within_budget(1, reverse('user-activities-list'))
+    
+    def test_admin_attorney_verification_budget(self):
+        self.api_client.force_authenticate(user=self.admin)
+        response = self.get_within_budget(3, reverse('admin_app:attorney-verification-list'))
+        self.assertEqual(response.data['count'], self.ROWS)
+    
+    def test_admin_client_verification_budget(self):
+        self.api_client.force_authenticate(user=self.admin)
+        response = self.get_within_budget(2, reverse('admin_app:client-verification-list'))
+        self.assertEqual(response.data['count'], self.ROWS)
+    
+    def test_admin_notification_budget(self):
+        self.api_client.force_authenticate(user=self.admin)
+        response = self.get_within_budget(2, reverse('admin_app:notification-list'))
+        self.assertEqual(response.data['count'], self.ROWS)
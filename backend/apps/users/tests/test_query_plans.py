@@ -0,0 +1,115 @@
+from datetime import time, timedelta
+from django.contrib.auth.hashers import make_password
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth import get_user_model
+from apps.admin.models import AdminNotification
+from apps.attorneys.models import Attorney, AvailabilitySlot
+from apps.chatbot.models import ChatMessage, ChatSession
+from apps.clients.models import Client, ClientAttorneyReview, LegalRequest
+from apps.users.models import UserActivity
+from .query_plan import SeqScanMixin
+
+User = get_user_model()
+
+
+class QueryPlanTests(SeqScanMixin, APITestCase):
+    """Test that the main endpoint queries are served by indexes rather than sequential scans."""
+    
+    USERS = 20
+    PER_USER = 15
+    
+    @classmethod
+    def setUpTestData(cls):
+        password = make_password('password123')
+        cls.admin = User.objects.create(email='admin@example.com', password=password, user_type='ADMIN', is_staff=True)
+        clients = User.objects.bulk_create(
+            User(email=f'client{i}@example.com', password=password, user_type='CLIENT') for i in range(cls.USERS)
+        )
+        attorneys = User.objects.bulk_create(
+            User(email=f'attorney{i}@example.com', password=password, user_type='ATTORNEY') for i in range(cls.USERS)
+        )
+        # bulk_create skips the signals creating profiles
+        clients = Client.objects.bulk_create(Client(user=user) for user in clients)
+        attorneys = Attorney.objects.bulk_create(
+            Attorney(user=user, license_number=f'LIC{i}') for i, user in enumerate(attorneys)
+        )
+        statuses = [choice for choice, _ in LegalRequest.STATUS_CHOICES]
+        legal_requests = LegalRequest.objects.bulk_create(
+            LegalRequest(
+                client=client,
+                attorney=attorneys[(i + j) % cls.USERS],
+                title=f'Request {j}',
+                description='Description',
+                status=statuses[j % len(statuses)],
+            )
+            for i, client in enumerate(clients) for j in range(cls.PER_USER)
+        )
+        ClientAttorneyReview.objects.bulk_create(
+            ClientAttorneyReview(
+                client=legal_request.client, attorney=legal_request.attorney, legal_request=legal_request, rating=4
+            )
+            for legal_request in legal_requests
+        )
+        AvailabilitySlot.objects.bulk_create(
+            AvailabilitySlot(
+                attorney=attorney, day_of_week=j % 7, start_time=time(9 + j % 8), end_time=time(10 + j % 8),
+                is_available=j % 3 != 0,
+            )
+            for attorney in attorneys for j in range(cls.PER_USER)
+        )
+        admins = [cls.admin] + list(User.objects.bulk_create(
+            User(email=f'admin{i}@example.com', password=password, user_type='ADMIN') for i in range(cls.USERS)
+        ))
+        AdminNotification.objects.bulk_create(
+            AdminNotification(admin=admin, title='Notice', message='Message', category='OTHER', is_read=j % 2 == 0)
+            for admin in admins for j in range(cls.PER_USER)
+        )
+        now = timezone.now()
+        UserActivity.objects.bulk_create(
+            UserActivity(user=user, activity_type='LOGIN', timestamp=now - timedelta(minutes=j))
+            for user in admins for j in range(cls.PER_USER)
+        )
+        sessions = ChatSession.objects.bulk_create(ChatSession(user=client.user) for client in clients)
+        ChatMessage.objects.bulk_create(
+            ChatMessage(session=session, message_type='USER', content='Question')
+            for session in sessions for _ in range(cls.PER_USER)
+        )
+        cls.client_user = clients[0].user
+        cls.attorney = attorneys[0]
+        cls.session = sessions[0]
+    
+    def setUp(self):
+        self.api_client = APIClient()
+    
+    def get(self, user, url, data=None):
+        self.api_client.force_authenticate(user=user)
+        response = self.assertNoSeqScan(self.api_client.get, url, data)
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return response
+    
+    def test_legal_request_lists(self):
+        self.get(self.client_user, reverse('clients:legal-request-list'))
+        self.get(self.client_user, reverse('clients:legal-request-pending'))
+        self.get(self.attorney.user, reverse('clients:legal-request-completed'))
+        self.get(self.admin, reverse('clients:legal-request-list'))
+    
+    def test_legal_request_summary(self):
+        self.get(self.client_user, reverse('clients:legal-request-summary'))
+    
+    def test_review_list(self):
+        self.get(self.client_user, reverse('clients:review-list'))
+    
+    def test_attorney_slots(self):
+        self.get(self.attorney.user, reverse('attorneys:availability-attorney-slots'), {'attorney_id': self.attorney.pk})
+    
+    def test_admin_notifications(self):
+        self.get(self.admin, reverse('admin_app:notification-list'))
+        self.assertQuerySetNoSeqScan(AdminNotification.objects.filter(admin=self.admin, is_read=False))
+    
+    def test_user_activity_log(self):
+        self.get(self.admin, reverse('user-activities-list'), {'user_id': self.client_user.pk})
+    
+    def test_chat_session_messages(self):
+        self.assertQuerySetNoSeqScan(self.session.messages.order_by('timestamp'))
@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth import get_user_model
+from apps.users.models import UserActivity
+from apps.users.retention import archive_activities, list_chunks, search_archive
+
+User = get_user_model()
+
+
+class UserActivityRetentionTests(APITestCase):
+    """Test archival of old user activities and searching the archive."""
+    
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+        settings_override = override_settings(USER_ACTIVITY_RETENTION={'DAYS': 30, 'ARCHIVE_DIR': self.archive_dir})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            user_type='ADMIN',
+            is_staff=True
+        )
+        self.user = User.objects.create_user(email='user@example.com', password='password123', user_type='CLIENT')
+        UserActivity.objects.all().delete()
+        
+        now = timezone.now()
+        UserActivity.objects.bulk_create([
+            UserActivity(
+                user=self.user if i % 2 else self.admin,
+                activity_type='LOGIN' if i % 3 else 'LOGOUT',
+                timestamp=now - timedelta(days=40 + i),
+                details={'attempt': i}
+            )
+            for i in range(5)
+        ] + [UserActivity(user=self.user, activity_type='LOGIN', timestamp=now - timedelta(days=1))])
+        
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(user=self.admin)
+    
+    def test_archive_moves_old_rows_into_chunks(self):
+        """Test that rows past the retention window leave the hot table in chunks."""
+        self.assertEqual(archive_activities(chunk_size=2), (5, 3))
+        self.assertEqual(UserActivity.objects.count(), 1)
+        self.assertEqual(len(list_chunks()), 3)
+        
+        # Nothing left to archive on a second run
+        self.assertEqual(archive_activities(chunk_size=2), (0, 0))
+    
+    def test_search_archive_filters_and_orders(self):
+        """Test that archive search applies filters and returns newest first."""
+        archive_activities(chunk_size=2)
+        
+        rows = search_archive(user_id=self.user.id)
+        self.assertEqual([row['details']['attempt'] for row in rows], [1, 3])
+        
+        rows = search_archive(activity_type='LOGOUT')
+        self.assertEqual([row['details']['attempt'] for row in rows], [0, 3])
+        
+        start = timezone.now() - timedelta(days=42, hours=12)
+        rows = search_archive(start=start)
+        self.assertEqual([row['details']['attempt'] for row in rows], [0, 1, 2])
+        self.assertEqual(len(search_archive(limit=2)), 2)
+    
+    def test_archive_endpoint(self):
+        """Test that admins can search the archive through the activity log API."""
+        archive_activities()
+        response = self.api_client.get(
+            reverse('user-activities-archive'),
+            {'user_id': str(self.user.id), 'activity_type': 'LOGIN'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['details'], {'attempt': 1})
+        
+        response = self.api_client.get(reverse('user-activities-archive'), {'start_date': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for limit in ('0', '-1'):
+            response = self.api_client.get(reverse('user-activities-archive'), {'limit': limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -9,8 +9,9 @@ from .auth_views import (
 )
 
 router = DefaultRouter()
-router.register(r'', UserViewSet)
+# Register activities first so the user detail route does not swallow it
 router.register(r'activities', UserActivityViewSet, basename='user-activities')
+router.register(r'', UserViewSet)
 
 urlpatterns = [
     # Main viewsets
@@ -1,41 +1,85 @@
+import base64
 import secrets
-import string
-from django.core.mail import send_mail
+import uuid
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.db.models import Q
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
-from .models import EmailVerificationToken
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import base36_to_int, int_to_base36
+from .models import EmailVerificationToken, User
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 
-def generate_verification_token(length=32):
-    """Generate a random token for email verification."""
-    characters = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(characters) for _ in range(length))
+VERIFICATION_TOKEN_LIFETIME = timedelta(hours=24)
+VERIFICATION_TOKEN_SALT = 'apps.users.email_verification'
+PURGE_BATCH_SIZE = 1000
 
 
-def create_verification_token(user):
-    """Create and save a verification token for a user."""
-    token = generate_verification_token()
+def _b64encode(value):
+    return base64.urlsafe_b64encode(value).rstrip(b'=').decode('ascii')
+
+
+def _signature(payload):
+    return _b64encode(salted_hmac(VERIFICATION_TOKEN_SALT, payload, algorithm='sha256').digest())
+
+
+def generate_verification_token(user_id, expires_at):
+    """
+    Build a self-verifying token: ``<user id>.<expiry>.<nonce>.<signature>``.
     
-    # Check if token already exists
-    while EmailVerificationToken.objects.filter(token=token).exists():
-        token = generate_verification_token()
+    The signature is an HMAC (keyed by ``SECRET_KEY``) over the user id,
+    expiry and a random nonce, so a token can be checked without the
+    database and tokens are unique without asking it.
+    """
+    payload = '.'.join([
+        uuid.UUID(str(user_id)).hex,
+        int_to_base36(int(expires_at.timestamp())),
+        _b64encode(secrets.token_bytes(8)),
+    ])
+    return f"{payload}.{_signature(payload)}"
+
+
+def parse_verification_token(token_string):
+    """
+    Return ``(user_id, expires_at)`` for a correctly signed token, or None.
     
-    # Create token with 24-hour expiry
-    expires_at = timezone.now() + timedelta(hours=24)
-    token_obj = EmailVerificationToken.objects.create(
+    Expiry is not checked here.
+    """
+    try:
+        payload, signature = token_string.rsplit('.', 1)
+        user_hex, expiry, _ = payload.split('.')
+        if not constant_time_compare(signature, _signature(payload)):
+            return None
+        return uuid.UUID(hex=user_hex), datetime.fromtimestamp(base36_to_int(expiry), tz=dt_timezone.utc)
+    except ValueError:
+        return None
+
+
+def create_verification_token(user):
+    """Create and save a verification token for a user."""
+    # Whole seconds, matching the expiry carried in the token
+    expires_at = (timezone.now() + VERIFICATION_TOKEN_LIFETIME).replace(microsecond=0)
+    return EmailVerificationToken.objects.create(
         user=user,
-        token=token,
+        token=generate_verification_token(user.pk, expires_at),
         expires_at=expires_at
     )
-    
-    return token_obj
 
 
-def send_verification_email(user, token):
-    """Send verification email to the user."""
+def get_or_create_verification_token(user, min_remaining=timedelta(hours=1)):
+    """Reuse the user's unused token if it stays valid for ``min_remaining``, else create one."""
+    token = EmailVerificationToken.objects.filter(
+        user=user, is_used=False, expires_at__gt=timezone.now() + min_remaining
+    ).order_by('-expires_at').first()
+    return token or create_verification_token(user)
+
+
+def build_verification_email(user, token, connection=None):
+    """Render the verification email for ``token`` as a message ready to send."""
     verification_url = f"{settings.FRONTEND_URL}/verify-email/{token.token}"
     
     # Email content
@@ -48,35 +92,97 @@ def send_verification_email(user, token):
     html_message = render_to_string('email/verify_email.html', context)
     plain_message = strip_tags(html_message)
     
-    send_mail(
+    message = EmailMultiAlternatives(
         subject="Verify Your Email - Smart Legal Assistance Platform",
-        message=plain_message,
+        body=plain_message,
         from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        html_message=html_message,
-        fail_silently=False,
+        to=[user.email],
+        connection=connection,
     )
+    message.attach_alternative(html_message, 'text/html')
+    return message
+
+
+def send_verification_email(user, token):
+    """
+    Queue the verification email for ``token``.
+    
+    Rendering and SMTP happen in a Celery task once the current transaction
+    commits, so the calling request doesn't wait on the mail server.
+    """
+    send_verification_emails([token])
+
+
+def send_verification_emails(tokens):
+    """Queue verification emails for several tokens, sent over one SMTP connection."""
+    from .tasks import send_verification_emails as task
+    
+    token_ids = [str(token.pk) for token in tokens]
+    if token_ids:
+        transaction.on_commit(lambda: task.delay(token_ids))
 
 
 def verify_email_token(token_string):
-    """Verify an email verification token."""
-    try:
-        token = EmailVerificationToken.objects.get(token=token_string)
-        
-        # Check if token is valid
-        if not token.is_valid:
-            return False, "Invalid or expired token."
-        
-        # Mark token as used
-        token.is_used = True
-        token.save()
-        
-        # Mark user's email as verified
-        user = token.user
-        user.email_verified = True
-        user.save()
-        
-        return True, "Email successfully verified."
+    """
+    Verify an email verification token.
+    
+    Forged and expired tokens are rejected from the signature alone; only a
+    valid one costs queries, to mark it used (once) and verify the user.
+    """
+    if '.' not in token_string:
+        return _verify_legacy_token(token_string)
+    
+    parsed = parse_verification_token(token_string)
+    if parsed is None:
+        return False, "Invalid token."
+    user_id, expires_at = parsed
+    if expires_at <= timezone.now():
+        return False, "Invalid or expired token."
     
+    with transaction.atomic():
+        # Conditional update so a token racing with itself is only accepted once
+        claimed = EmailVerificationToken.objects.filter(
+            token=token_string, user_id=user_id, is_used=False
+        ).update(is_used=True)
+        if not claimed:
+            return False, "Invalid or expired token."
+        _mark_email_verified(User.objects.get(pk=user_id))
+    return True, "Email successfully verified."
+
+
+def _mark_email_verified(user):
+    user.email_verified = True
+    user.save()
+
+
+def _verify_legacy_token(token_string):
+    """Verify a random token issued before tokens were signed."""
+    try:
+        token = EmailVerificationToken.objects.select_related('user').get(token=token_string)
     except EmailVerificationToken.DoesNotExist:
-        return False, "Invalid token." 
\ No newline at end of file
+        return False, "Invalid token."
+    
+    # Check if token is valid
+    if not token.is_valid:
+        return False, "Invalid or expired token."
+    
+    # Mark token as used
+    token.is_used = True
+    token.save()
+    _mark_email_verified(token.user)
+    return True, "Email successfully verified."
+
+
+def purge_verification_tokens(batch_size=PURGE_BATCH_SIZE, now=None):
+    """
+    Delete used and expired verification tokens in batches.
+    
+    Returns the number of tokens deleted.
+    """
+    stale = EmailVerificationToken.objects.filter(Q(is_used=True) | Q(expires_at__lte=now or timezone.now()))
+    deleted = 0
+    while True:
+        ids = list(stale.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += EmailVerificationToken.objects.filter(pk__in=ids).delete()[0]
@@ -1,7 +1,13 @@
 from rest_framework import viewsets, status, permissions
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from datetime import datetime, time
 from .models import UserActivity
+from .mixins import QueryPlan, QueryPlanMixin
+from .pagination import KeysetPagination
+from .retention import search_archive
 from .serializers import (
     UserSerializer, 
     UserRegistrationSerializer, 
@@ -14,7 +20,7 @@ User = get_user_model()
 
 class UserViewSet(viewsets.ModelViewSet):
     """ViewSet for user management."""
-    queryset = User.objects.all()
+    queryset = User.objects.select_related('client_profile', 'attorney_profile')
     serializer_class = UserSerializer
     
     def get_serializer_class(self):
@@ -60,10 +66,15 @@ class UserViewSet(viewsets.ModelViewSet):
         return RegisterView().post(request)
 
 
-class UserActivityViewSet(viewsets.ReadOnlyModelViewSet):
+class UserActivityViewSet(QueryPlanMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing user activity logs."""
     serializer_class = UserActivitySerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-timestamp', '-id')
+    query_plans = {
+        'default': QueryPlan(select_related=['user', 'user__client_profile', 'user__attorney_profile']),
+    }
     
     @swagger_auto_schema(
         manual_parameters=[
@@ -81,7 +92,7 @@ class UserActivityViewSet(viewsets.ReadOnlyModelViewSet):
     )
     def get_queryset(self):
         """Get the queryset for user activities."""
-        queryset = UserActivity.objects.all()
+        queryset = self.apply_query_plan(UserActivity.objects.all())
         
         # Filter by user ID if provided
         user_id = self.request.query_params.get('user_id')
@@ -99,4 +110,52 @@ class UserActivityViewSet(viewsets.ReadOnlyModelViewSet):
         if start_date and end_date:
             queryset = queryset.filter(timestamp__range=[start_date, end_date])
         
-        return queryset.order_by('-timestamp') 
\ No newline at end of file
+        return queryset.order_by('-timestamp')
+    
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('user_id', openapi.IN_QUERY, description="Filter by user ID", type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+            openapi.Parameter('activity_type', openapi.IN_QUERY, description="Filter by activity type", type=openapi.TYPE_STRING),
+            openapi.Parameter('start_date', openapi.IN_QUERY, description="Filter by start date (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+            openapi.Parameter('end_date', openapi.IN_QUERY, description="Filter by end date (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Maximum number of results (default 100, max 1000)", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: "Archived activities, newest first",
+            400: "Invalid filter",
+            401: "Unauthorized",
+            403: "Forbidden"
+        },
+        operation_description="Search user activities that were moved to the archive by the retention job"
+    )
+    @action(detail=False, methods=['get'])
+    def archive(self, request):
+        """Search archived user activities."""
+        params = request.query_params
+        try:
+            limit = min(int(params.get('limit', 100)), 1000)
+            if limit < 1:
+                raise ValueError(limit)
+            start = self._parse_archive_date(params.get('start_date'))
+            end = self._parse_archive_date(params.get('end_date'), end_of_day=True)
+        except ValueError:
+            return Response(
+                {'detail': 'Invalid limit or date filter.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results = search_archive(
+            user_id=params.get('user_id') or None,
+            activity_type=params.get('activity_type') or None,
+            start=start,
+            end=end,
+            limit=limit,
+        )
+        return Response({'count': len(results), 'results': results})
+    
+    @staticmethod
+    def _parse_archive_date(value, end_of_day=False):
+        if not value:
+            return None
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+        return timezone.make_aware(datetime.combine(day, time.max if end_of_day else time.min))
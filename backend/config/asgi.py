@@ -1,7 +1,20 @@
-import os
+"""
+ASGI config for Smart Legal Assistance project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+The database is checked on load as for WSGI (see ``config.startup``).
+"""
 
+import os
+import sys
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.production')
+from config.startup import load_application
 
-application = get_asgi_application() 
\ No newline at end of file
+try:
+    # Same default as config.wsgi, which the start scripts relied on
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    application = load_application(get_asgi_application)
+except Exception as e:
+    print(f"⚠️ Error loading ASGI application: {e}", file=sys.stderr)
+    raise
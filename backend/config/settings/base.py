@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -34,6 +35,7 @@ THIRD_PARTY_APPS = [
     'oauth2_provider',
     'social_django',
     'drf_yasg',
+    'django_celery_beat',
 ]
 
 LOCAL_APPS = [
@@ -129,7 +131,7 @@ AUTH_USER_MODEL = 'users.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
         'oauth2_provider.contrib.rest_framework.OAuth2Authentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
@@ -173,6 +175,7 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.serializers.ClaimsTokenRefreshSerializer',
 }
 
 # CORS settings
@@ -189,6 +192,98 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    'generate-platform-stats': {
+        'task': 'apps.admin.tasks.generate_platform_stats',
+        'schedule': crontab(hour=23, minute=55),
+    },
+    'flush-audit-log': {
+        'task': 'apps.users.tasks.flush_audit_log',
+        'schedule': timedelta(seconds=30),
+    },
+    'archive-user-activities': {
+        'task': 'apps.users.tasks.archive_user_activities',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'purge-verification-tokens': {
+        'task': 'apps.users.tasks.purge_verification_tokens',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    'purge-expired-tokens': {
+        'task': 'apps.users.tasks.purge_expired_tokens',
+        'schedule': crontab(minute=15),
+    },
+    'update-resource-vectors': {
+        'task': 'apps.chatbot.tasks.update_resource_vectors',
+        'schedule': timedelta(minutes=10),
+    },
+}
+
+# User activity audit log: 'buffered' (in-process batches), 'redis' (shared queue) or 'sync'
+AUDIT_LOG = {
+    'BACKEND': os.environ.get('AUDIT_LOG_BACKEND', 'buffered'),
+    'BATCH_SIZE': int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 100)),
+    'FLUSH_INTERVAL': int(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', 5)),
+    'REDIS_URL': os.environ.get('REDIS_URL'),
+}
+
+# Refresh token blacklist: 'redis' (Bloom filter + shared sorted set), 'memory' or 'database' (simplejwt only)
+TOKEN_BLACKLIST = {
+    'BACKEND': os.environ.get('TOKEN_BLACKLIST_BACKEND', 'redis' if os.environ.get('REDIS_URL') else 'database'),
+    'REDIS_URL': os.environ.get('REDIS_URL'),
+    'CAPACITY': int(os.environ.get('TOKEN_BLACKLIST_CAPACITY', 100000)),
+    'ERROR_RATE': 0.001,
+}
+
+# Authenticated users are cached per process for LOCAL_TTL seconds and in CACHE_ALIAS for SHARED_TTL
+USER_CACHE = {
+    'LOCAL_TTL': int(os.environ.get('USER_CACHE_LOCAL_TTL', 5)),
+    'SHARED_TTL': int(os.environ.get('USER_CACHE_SHARED_TTL', 300)),
+    'CACHE_ALIAS': 'default',
+}
+
+# User activities older than DAYS are moved to gzipped JSON Lines chunks under ARCHIVE_DIR
+USER_ACTIVITY_RETENTION = {
+    'DAYS': int(os.environ.get('USER_ACTIVITY_RETENTION_DAYS', 90)),
+    'ARCHIVE_DIR': os.environ.get('USER_ACTIVITY_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive', 'user_activities')),
+    'CHUNK_SIZE': 10000,
+}
+
+# BM25 keyword retrieval over chatbot legal resources; CACHE_ALIAS carries the index version between processes
+CHATBOT_RETRIEVAL = {
+    'K1': 1.5,
+    'B': 0.75,
+    'CACHE_ALIAS': 'default',
+}
+
+# Hashed bag-of-words vectors of chatbot legal resources, memory-mapped from DIRECTORY (per host, synced on query)
+CHATBOT_VECTORS = {
+    'DIRECTORY': os.environ.get('CHATBOT_VECTORS_DIR', os.path.join(BASE_DIR, 'var', 'chatbot_vectors')),
+    'DIMENSIONS': 2048,
+}
+
+# Answer generator of the streaming chatbot endpoint; TOKEN_DELAY paces the offline stub like a model
+CHATBOT_GENERATOR = {
+    'BACKEND': os.environ.get('CHATBOT_GENERATOR', 'apps.chatbot.generation.StubGenerator'),
+    'OPTIONS': {'token_delay': float(os.environ.get('CHATBOT_STUB_TOKEN_DELAY', 0))},
+}
+
+# Recent messages and a summary of older turns per chat session, cached in CACHE_ALIAS
+CHATBOT_CONTEXT = {
+    'MAX_MESSAGES': 10,
+    'TOKEN_BUDGET': 1500,
+    'CACHE_ALIAS': 'default',
+}
+
+# Per-process LRU of chatbot answers for near-identical questions; hit metrics are counted in CACHE_ALIAS
+CHATBOT_ANSWER_CACHE = {
+    'ENABLED': os.environ.get('CHATBOT_ANSWER_CACHE_ENABLED', 'True') == 'True',
+    'MAX_ENTRIES': 1000,
+    'TTL': int(os.environ.get('CHATBOT_ANSWER_CACHE_TTL', 3600)),
+    'MAX_DISTANCE': 3,
+    'CACHE_ALIAS': 'default',
+}
 
 # API Documentation Settings
 API_DOCS_TITLE = "Smart Legal Assistance API"
@@ -241,4 +336,6 @@ EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@smartlegalassistance.com')
 
 # Frontend URL for email verification links
-FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000') 
\ No newline at end of file
+FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000') 
+# Admin dashboard: recompute metrics from the live tables instead of the materialized counters
+ADMIN_DASHBOARD_LIVE_METRICS = os.environ.get('ADMIN_DASHBOARD_LIVE_METRICS', 'False') == 'True'
@@ -154,6 +154,13 @@ REDIS_URL = os.environ.get('REDIS_URL', '')
 if REDIS_URL:
     CELERY_BROKER_URL = REDIS_URL
     CELERY_RESULT_BACKEND = REDIS_URL
+    # Share cached users and indexes between web processes
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
 else:
     # Disable Celery if Redis is not available
     CELERY_TASK_ALWAYS_EAGER = True
@@ -1,3 +1,5 @@
+import tempfile
+
 from .base import *
 
 # Test-specific settings
@@ -34,6 +36,15 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 # Disable celery tasks during testing
 CELERY_TASK_ALWAYS_EAGER = True
 
+# Write audit events synchronously so tests can assert on them
+AUDIT_LOG = {'BACKEND': 'sync'}
+
+# Exercise the Bloom filter layer without a Redis server
+TOKEN_BLACKLIST = {'BACKEND': 'memory'}
+
+# Keep the chatbot resource vectors out of the source tree
+CHATBOT_VECTORS = {'DIRECTORY': tempfile.mkdtemp(prefix='chatbot_vectors_'), 'DIMENSIONS': 2048}
+
 # Simple password hasher for testing
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
@@ -0,0 +1,75 @@
+"""
+Database checks run when the WSGI or ASGI application is loaded.
+
+The server retries the configured database a few times and, when it stays
+unreachable, falls back to a local SQLite database so the site still comes up.
+"""
+
+import os
+import time
+from pathlib import Path
+
+
+def test_db_connection(db_config, max_retries=3, retry_delay=2):
+    """Test database connection with retries."""
+    from django.db import connections
+    from django.db.utils import OperationalError
+    
+    print(f"Testing database connection (engine: {db_config['ENGINE']})...")
+    
+    for attempt in range(1, max_retries + 1):
+        try:
+            db_conn = connections['default']
+            db_conn.ensure_connection()
+            
+            # If we got here, the connection is working
+            print(f"✅ Database connection successful (attempt {attempt})")
+            return True
+        except OperationalError as e:
+            print(f"⚠️ Database connection error (attempt {attempt}/{max_retries}): {e}")
+            
+            if attempt < max_retries:
+                print(f"Retrying in {retry_delay} seconds...")
+                time.sleep(retry_delay)
+    
+    # If we get here, all retries failed
+    return False
+
+
+def load_application(get_application):
+    """
+    Load the application with ``get_application`` and check its database,
+    reloading it with SQLite when the database cannot be reached.
+    """
+    application = get_application()
+    
+    # Import database settings
+    from django.conf import settings
+    from django.db import connections
+    
+    # Test the database connection with retries
+    if test_db_connection(settings.DATABASES['default']):
+        print("Database connection confirmed working")
+    else:
+        # All connection attempts failed, switch to SQLite if not already using it
+        if not settings.DATABASES['default']['ENGINE'].endswith('sqlite3'):
+            print("⚠️ Switching to SQLite database")
+            
+            # Set the DATABASE_URL to use SQLite
+            os.environ['DATABASE_URL'] = 'sqlite:///db.sqlite3'
+            
+            # Prepare the SQLite database file
+            BASE_DIR = Path(__file__).resolve().parent.parent
+            sqlite_path = BASE_DIR / 'db.sqlite3'
+            
+            if not sqlite_path.exists():
+                print(f"Creating SQLite database at {sqlite_path}")
+                sqlite_path.touch(exist_ok=True)
+            
+            # Reload the application with the new database settings
+            print("Reloading application with SQLite...")
+            application = get_application()
+    
+    # Requests are served from other threads, which open their own connections
+    connections.close_all()
+    return application
@@ -20,6 +20,6 @@ python manage.py migrate
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
-# Start the server with Gunicorn
+# Start the server with Gunicorn, running ASGI workers so the chatbot can stream answers
 echo "Starting server on port 8000..."
-gunicorn config.wsgi:application --bind 0.0.0.0:8000
\ No newline at end of file
+gunicorn config.asgi:application --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000
\ No newline at end of file